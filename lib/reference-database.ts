@@ -148,6 +148,7 @@ export class ReferenceDatabase {
 // Utility functions for image processing
 export async function generateImageEmbedding(imageUrl: string): Promise<number[]> {
   // This would use a pre-trained model to generate embeddings
+  // Reference embeddings are generated offline by scripts/generate-embeddings.py
   // For now, return a mock embedding
   return new Array(512).fill(0).map(() => Math.random())
 }
@@ -159,6 +160,7 @@ export async function extractImageFeatures(imageUrl: string): Promise<{
   materialTexture: number
 }> {
   // This would use computer vision to extract features
+  // (scripts/extract-image-features.py computes the same four scores from pixels)
   // For now, return mock features
   return {
     paintQuality: Math.random() * 100,
@@ -0,0 +1,593 @@
+import os
+import json
+import time
+import base64
+import asyncio
+import argparse
+import multiprocessing
+import numpy as np
+import cv2
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from script_loader import load_script
+
+vector_search = load_script('vector-search')
+feature_extractor = load_script('extract-image-features')
+
+# Longest side handed to the analyzers, like the route's sharp resize
+ANALYSIS_MAX_SIDE = 512
+SIMILARITY_THRESHOLD = 0.7
+STAGE_TIMEOUTS = {
+    'decode': 2.0,
+    'embedding': 5.0,
+    'features': 3.0,
+    'lookup': 2.0,
+    'classifier': 5.0,
+}
+# Seconds a request may wait for a free pool slot before it is turned away with 503
+ADMISSION_TIMEOUT = 2.0
+MODEL_VERSIONS = {
+    'classifier': 'labubu-cnn',
+    'similarity': 'efficientnet-embeddings-512',
+    'features': 'extract-image-features-v1',
+}
+
+# Models loaded once per pool process by init_worker
+_worker = {}
+
+
+def init_worker(model_path, embeddings_dir, intra_op_threads):
+    """Load the classifier, embedding encoder and feature extractor in a pool process"""
+    trainer = load_script('train-labubu-classifier')
+    trainer.configure_threading(intra_op_threads, 1, profile='inference')
+    _worker['trainer'] = trainer
+    _worker['features'] = feature_extractor.ImageFeatureExtractor(workers=1)
+
+    if Path(model_path).exists():
+        from tensorflow import keras
+        _worker['model'] = keras.models.load_model(model_path, compile=False)
+        projection = Path(embeddings_dir) / 'projection.npy' if embeddings_dir else None
+        if projection is not None and projection.exists():
+            generate_embeddings = load_script('generate-embeddings')
+            embedder = generate_embeddings.EmbeddingGenerator(model_path, projection_path=projection)
+            embedder.build_encoder()
+            _worker['embedder'] = embedder
+
+
+def worker_ready():
+    return os.getpid()
+
+
+def worker_embed(bgr):
+    image = _worker['trainer'].preprocess_image(bgr)
+    return _worker['embedder'].embed(image[None])[0]
+
+
+def worker_features(bgr):
+    size = _worker['features'].size
+    resized = cv2.resize(bgr, (size, size), interpolation=cv2.INTER_AREA)
+    scores = _worker['features'].extract_batch(resized[None])[0]
+    return dict(zip(feature_extractor.FEATURE_NAMES, map(float, scores)))
+
+
+def worker_classify(bgr, feature_vector):
+    """CNN verdict, or the route's feature-weighted score when no model is trained"""
+    if 'model' not in _worker:
+        authenticity = (feature_vector[0] * 0.3 + feature_vector[1] * 0.3 +
+                        feature_vector[2] * 0.25 + feature_vector[3] * 0.15)
+        return float(authenticity), float(abs(authenticity - 0.5) * 2)
+    image = _worker['trainer'].preprocess_image(bgr)
+    authenticity, confidence = _worker['model'](
+        [image[None], np.asarray([feature_vector], np.float32)], training=False
+    )
+    return float(np.ravel(authenticity)[0]), float(np.ravel(confidence)[0])
+
+
+def decode_request_image(data):
+    """data:image/...;base64 -> BGR array no larger than ANALYSIS_MAX_SIDE"""
+    if not data or not data.startswith('data:image/'):
+        raise ValueError("Invalid image format")
+    buffer = np.frombuffer(base64.b64decode(data.split(',', 1)[1]), dtype=np.uint8)
+    img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    scale = ANALYSIS_MAX_SIDE / max(img.shape[:2])
+    if scale < 1:
+        img = cv2.resize(img, (round(img.shape[1] * scale), round(img.shape[0] * scale)),
+                         interpolation=cv2.INTER_AREA)
+    return img
+
+
+def build_feature_vector(features, metadata):
+    """The classifier's 7 inputs; photo conditions count as unknown unless the request gives them"""
+    return [
+        features['paintQuality'] / 100,
+        features['sculptDetails'] / 100,
+        features['packagingAuth'] / 100,
+        features['materialTexture'] / 100,
+        1 if metadata.get('quality') == 'high' else 0.5,
+        1 if metadata.get('lighting') == 'natural' else 0.5,
+        1 if metadata.get('background') == 'clean' else 0.5
+    ]
+
+
+def analyze_similarity(similar_images):
+    """Port of analyzeWithSimilarityComparison"""
+    if not similar_images:
+        return {'similarity': 0.0, 'matches': 0, 'avgAuthenticity': 0.5}
+
+    def is_authentic(img):
+        if 'authenticity' in img:
+            return img['authenticity'] == 'authentic'
+        return bool(img.get('series')) and 'fake' not in img['series'].lower()
+
+    authentic = [img for img in similar_images if is_authentic(img)]
+    return {
+        'similarity': sum(img.get('similarity', 0) for img in similar_images) / len(similar_images),
+        'matches': len(similar_images),
+        'avgAuthenticity': len(authentic) / len(similar_images)
+    }
+
+
+def analyze_rules(features, metadata):
+    """Port of analyzeWithRuleBasedSystem"""
+    flags = []
+    rule_score = 0.7
+
+    price = metadata.get('reportedPrice')
+    if price:
+        if price < 10:
+            flags.append({'category': 'Price Analysis', 'severity': 'high',
+                          'description': 'Price significantly below market value for authentic items',
+                          'confidence': 0.8})
+            rule_score -= 0.3
+        elif price > 100:
+            flags.append({'category': 'Price Analysis', 'severity': 'medium',
+                          'description': 'Price higher than typical range - verify authenticity',
+                          'confidence': 0.6})
+
+    seller = (metadata.get('seller') or '').lower()
+    if seller and ('new' in seller or '123' in seller or 'store' in seller):
+        flags.append({'category': 'Seller Analysis', 'severity': 'medium',
+                      'description': 'Seller profile shows characteristics common with counterfeit sellers',
+                      'confidence': 0.7})
+        rule_score -= 0.2
+
+    if features is not None:
+        if features['paintQuality'] < 60:
+            flags.append({'category': 'Paint Quality', 'severity': 'high',
+                          'description': 'Paint quality below standards for authentic Labubu items',
+                          'confidence': 0.9})
+            rule_score -= 0.4
+        if features['sculptDetails'] < 70:
+            flags.append({'category': 'Sculpt Details', 'severity': 'medium',
+                          'description': 'Sculpt details show deviations from authentic specifications',
+                          'confidence': 0.8})
+            rule_score -= 0.2
+
+    return {'ruleScore': max(0.0, min(1.0, rule_score)), 'flags': flags}
+
+
+def generate_explanation(label, score, flags):
+    explanation = {
+        'authentic': "Multiple AI models indicate strong consistency with authentic Labubu manufacturing "
+                     "patterns and reference database.",
+        'fake': "Analysis detected significant inconsistencies that strongly suggest this is a counterfeit item.",
+        'suspicious': "Mixed signals detected. Some features match authentic items while others raise concerns."
+    }[label]
+    high = [f for f in flags if f['severity'] == 'high']
+    if high:
+        explanation += f" Critical issues found: {', '.join(f['category'].lower() for f in high)}."
+    return explanation + f" Overall confidence: {round(score * 100)}%."
+
+
+def generate_recommendations(label, flags, similar_count):
+    if label == 'fake':
+        recommendations = ["❌ Strongly recommend avoiding this purchase",
+                           "🔍 Request additional photos from seller if still considering",
+                           "📋 Ask for proof of purchase or authenticity certificate"]
+    elif label == 'suspicious':
+        recommendations = ["⚠️ Proceed with extreme caution",
+                           "📸 Request high-resolution photos of all angles",
+                           "💰 Verify price is reasonable for authentic items",
+                           "🏪 Check seller reputation and return policy"]
+    else:
+        recommendations = ["✅ Analysis suggests authentic item",
+                           "📋 Still verify seller reputation for peace of mind",
+                           "💡 Compare with official product photos when available"]
+    if similar_count == 0:
+        recommendations.append("📚 No similar items in reference database - consider expert verification")
+    if any(f['category'] == 'Price Analysis' for f in flags):
+        recommendations.append("💸 Price analysis flagged - research market values")
+    return recommendations
+
+
+def combine_results(classifier, similarity, rules, features, similar_images, metadata):
+    """Port of combineAnalysisResults producing the DetailedAnalysisResult shape
+
+    Analyzers that failed or timed out are left out and the remaining
+    weights (0.5 classifier, 0.3 similarity, 0.2 rules) are renormalized.
+    """
+    parts = []
+    if classifier is not None:
+        parts.append((0.5, classifier[0]))
+    if similarity is not None:
+        parts.append((0.3, similarity['avgAuthenticity']))
+    if rules is not None:
+        parts.append((0.2, rules['ruleScore']))
+    final_score = sum(w * s for w, s in parts) / sum(w for w, _ in parts) if parts else 0.5
+
+    confidences = []
+    if classifier is not None:
+        confidences.append(classifier[1] * 0.6)
+    if similarity is not None:
+        confidences.append(similarity['similarity'] * 0.4)
+    confidence = max(confidences) if confidences else 0.5
+    flags = rules['flags'] if rules is not None else []
+
+    label = 'suspicious'
+    if final_score > 0.75 and confidence > 0.6:
+        label = 'authentic'
+    elif final_score < 0.4 or any(f['severity'] == 'high' for f in flags):
+        label = 'fake'
+
+    details = {'paintQuality': 50, 'sculptAccuracy': 50, 'packagingAuth': 50, 'materialTexture': 50}
+    if features is not None:
+        details = {
+            'paintQuality': features['paintQuality'],
+            'sculptAccuracy': features['sculptDetails'],
+            'packagingAuth': features['packagingAuth'],
+            'materialTexture': features['materialTexture']
+        }
+
+    suspected_series = metadata.get('suspectedSeries')
+    return {
+        'authenticity': {'label': label, 'confidence': round(confidence * 100), 'score': final_score},
+        'details': details,
+        'comparison': {
+            'similarImages': [{
+                'id': img['id'],
+                'series': img.get('series'),
+                'variant': img.get('variant'),
+                'similarity': round(img.get('similarity', 0) * 100),
+                'imageUrl': img.get('imageUrl')
+            } for img in similar_images[:5]],
+            'seriesMatch': bool(suspected_series) and any(img.get('series') == suspected_series
+                                                          for img in similar_images),
+            'variantMatch': len(similar_images) > 0
+        },
+        'flags': flags,
+        'explanation': generate_explanation(label, final_score, flags),
+        'recommendations': generate_recommendations(label, flags, len(similar_images)),
+        'modelVersions': dict(MODEL_VERSIONS),
+        'creditsUsed': 1
+    }
+
+
+def reference_records(data_dir):
+    """id -> series / variant / imageUrl / authenticity for the reference embeddings"""
+    metadata_file = Path(data_dir) / 'metadata.json'
+    if not metadata_file.exists():
+        return {}
+    with open(metadata_file, 'r') as f:
+        metadata = json.load(f)
+    return {item['id']: {
+        'series': item['series'],
+        'variant': item['variant'],
+        'authenticity': item['authenticity'],
+        'imageUrl': item.get('imageUrl') or f"images/{item['authenticity']}/{item['filename']}"
+    } for item in metadata}
+
+
+class StageTimeout(Exception):
+    pass
+
+
+class GatewayBusy(Exception):
+    pass
+
+
+class AnalysisGateway:
+    """Runs the whole analyze-image pipeline with overlapping stages
+
+    Decoding and the reference lookup run on threads; embedding, feature
+    extraction and the classifier run on a process pool. The embedding ->
+    lookup and features -> classifier chains run concurrently, every stage
+    has its own timeout, and a failed stage only removes its analyzer from
+    the combined verdict. With overlap=False the stages run one after
+    another like the current route, for comparison.
+
+    A timed-out pool job cannot be cancelled once it is running, so each
+    request holds one of `workers` admission slots until its pool jobs
+    have really finished, not just until its response is sent. Requests
+    that find no free slot within `admission_timeout` raise GatewayBusy.
+    """
+
+    def __init__(self, model_path='models/labubu_classifier_final.h5', embeddings_dir='models/embeddings',
+                 data_dir='./training-data', workers=2, timeouts=None, overlap=True,
+                 admission_timeout=ADMISSION_TIMEOUT):
+        self.model_path = model_path
+        self.embeddings_dir = Path(embeddings_dir) if embeddings_dir else None
+        self.data_dir = data_dir
+        self.workers = workers
+        self.timeouts = {**STAGE_TIMEOUTS, **(timeouts or {})}
+        self.overlap = overlap
+        self.admission_timeout = admission_timeout
+        self.admission = None
+        self.draining = set()
+        self.pool = None
+        self.index = None
+
+    async def start(self):
+        """Spawn and warm the pool, and open the reference index"""
+        if self.embeddings_dir and (self.embeddings_dir / 'embeddings.npy').exists() and \
+                Path(self.model_path).exists():
+            self.index = vector_search.ExactVectorIndex.load(self.embeddings_dir)
+            self.index.records = reference_records(self.data_dir)
+            print(f"📚 Reference index with {len(self.index.ids):,} embeddings")
+        else:
+            print("⚠️ No reference embeddings or trained model, similarity analysis disabled")
+
+        # Spawned (not forked) workers, so TensorFlow never starts in this process
+        intra_op_threads = max((os.cpu_count() or 1) // self.workers, 1)
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(self.model_path, str(self.embeddings_dir) if self.index else None, intra_op_threads)
+        )
+        start = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*[loop.run_in_executor(self.pool, worker_ready) for _ in range(self.workers)])
+        self.admission = asyncio.Semaphore(self.workers)
+        print(f"✅ {self.workers} analysis workers ready in {time.perf_counter() - start:.1f}s")
+
+    def stop(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+    async def _stage(self, name, awaitable, timings, errors):
+        """Await one stage under its timeout, recording wall time and failures"""
+        start = time.perf_counter()
+        try:
+            return await asyncio.wait_for(awaitable, self.timeouts[name])
+        except asyncio.TimeoutError:
+            errors[name] = f"timed out after {self.timeouts[name]}s"
+        except Exception as e:
+            errors[name] = str(e)
+        finally:
+            timings[name] = (time.perf_counter() - start) * 1000
+        return None
+
+    def _in_pool(self, jobs, fn, *args):
+        """Submit to the pool, keeping the job so its slot is held until it really ends"""
+        job = self.pool.submit(fn, *args)
+        jobs.append(job)
+        return asyncio.wrap_future(job)
+
+    async def _admit(self):
+        try:
+            await asyncio.wait_for(self.admission.acquire(), self.admission_timeout)
+        except TimeoutError:
+            raise GatewayBusy(f"all {self.workers} analysis workers busy for {self.admission_timeout}s") from None
+
+    def _release(self, jobs):
+        """Free the admission slot now, or once pool jobs left behind by a timeout finish"""
+        running = [asyncio.wrap_future(job) for job in jobs if not job.done()]
+        if not running:
+            self.admission.release()
+            return
+
+        async def drain():
+            await asyncio.wait(running)
+            self.admission.release()
+
+        task = asyncio.ensure_future(drain())
+        self.draining.add(task)
+        task.add_done_callback(self.draining.discard)
+
+    async def analyze(self, image, metadata=None):
+        """Return a DetailedAnalysisResult dict plus latencyMs and stageErrors
+
+        Raises GatewayBusy when no pool slot frees up in time and
+        StageTimeout when decoding, or every model stage, timed out.
+        """
+        await self._admit()
+        jobs = []
+        try:
+            return await self._analyze(image, metadata or {}, jobs)
+        finally:
+            self._release(jobs)
+
+    async def _analyze(self, image, metadata, jobs):
+        timings = {}
+        errors = {}
+        start = time.perf_counter()
+
+        try:
+            bgr = await asyncio.wait_for(asyncio.to_thread(decode_request_image, image), self.timeouts['decode'])
+        except TimeoutError:
+            raise StageTimeout(f"decode timed out after {self.timeouts['decode']}s") from None
+        finally:
+            timings['decode'] = (time.perf_counter() - start) * 1000
+
+        async def similar_images():
+            if self.index is None:
+                return []
+            embedding = await self._stage('embedding', self._in_pool(jobs, worker_embed, bgr), timings, errors)
+            if embedding is None:
+                return None
+            matches = await self._stage('lookup', asyncio.to_thread(
+                self.index.search, embedding[None], SIMILARITY_THRESHOLD, 10), timings, errors)
+            return matches[0] if matches is not None else None
+
+        async def features_and_verdict():
+            features = await self._stage('features', self._in_pool(jobs, worker_features, bgr), timings, errors)
+            if features is None:
+                return None, None
+            vector = build_feature_vector(features, metadata)
+            verdict = await self._stage('classifier', self._in_pool(jobs, worker_classify, bgr, vector), timings, errors)
+            return features, verdict
+
+        if self.overlap:
+            similar, (features, verdict) = await asyncio.gather(similar_images(), features_and_verdict())
+        else:
+            similar = await similar_images()
+            features, verdict = await features_and_verdict()
+
+        timed_out = [name for name, message in errors.items() if message.startswith('timed out')]
+        answered = verdict is not None or (self.index is not None and similar is not None)
+        if timed_out and not answered:
+            raise StageTimeout(f"{', '.join(timed_out)} timed out")
+
+        similarity = analyze_similarity(similar) if similar is not None else None
+        rules = analyze_rules(features, metadata)
+        result = combine_results(verdict, similarity, rules, features, similar or [], metadata)
+
+        timings['total'] = (time.perf_counter() - start) * 1000
+        result['latencyMs'] = {name: round(ms, 2) for name, ms in timings.items()}
+        if errors:
+            result['stageErrors'] = errors
+        return result
+
+
+async def handle_connection(gateway, reader, writer):
+    """Minimal HTTP/1.1: POST /analyze-image and GET /health"""
+    try:
+        request_line = (await reader.readline()).decode().split()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                break
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        method, path = (request_line + ['', ''])[:2]
+        status, payload = 404, {'error': 'Not found'}
+        if method == 'GET' and path == '/health':
+            status, payload = 200, {'status': 'ok'}
+        elif method == 'POST' and path == '/analyze-image':
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            try:
+                request = json.loads(body)
+                status, payload = 200, await gateway.analyze(request.get('image'), request.get('metadata'))
+            except GatewayBusy as e:
+                status, payload = 503, {'error': 'Analysis service busy', 'message': str(e)}
+            except StageTimeout as e:
+                status, payload = 504, {'error': 'Analysis timed out', 'message': str(e)}
+            except ValueError as e:
+                status, payload = 400, {'error': 'Invalid image format', 'message': str(e)}
+            except Exception as e:
+                status, payload = 500, {'error': 'Analysis failed', 'message': str(e)}
+
+        data = json.dumps(payload).encode()
+        reason = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error',
+                  503: 'Service Unavailable', 504: 'Gateway Timeout'}[status]
+        retry = "Retry-After: 1\r\n" if status == 503 else ""
+        writer.write(f"HTTP/1.1 {status} {reason}\r\nContent-Type: application/json\r\n{retry}"
+                     f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode() + data)
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+def sample_request(seed=42):
+    """A synthetic product photo encoded the way the app sends it"""
+    img = feature_extractor.synthetic_images(1, 800, seed=seed)[0]
+    _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return {
+        'image': 'data:image/jpeg;base64,' + base64.b64encode(buffer.tobytes()).decode(),
+        'metadata': {'reportedPrice': 25, 'seller': 'popmart_official', 'suspectedSeries': 'Series 1'}
+    }
+
+
+async def benchmark(gateway_args, requests, concurrency):
+    """Per-stage latency of overlapped vs serial stages over the same requests"""
+    request = sample_request()
+    summary = {}
+    for overlap in (False, True):
+        # Requests queue for a slot instead of being turned away, so every one is measured
+        gateway = AnalysisGateway(**gateway_args, overlap=overlap, admission_timeout=None)
+        await gateway.start()
+        try:
+            await gateway.analyze(request['image'], request['metadata'])
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def one():
+                async with semaphore:
+                    return await gateway.analyze(request['image'], request['metadata'])
+
+            start = time.perf_counter()
+            results = await asyncio.gather(*[one() for _ in range(requests)])
+            elapsed = time.perf_counter() - start
+        finally:
+            gateway.stop()
+
+        stages = sorted({stage for r in results for stage in r['latencyMs']})
+        mode = 'overlapped' if overlap else 'serial'
+        summary[mode] = {
+            'requests_per_sec': requests / elapsed,
+            'p50_ms': {s: float(np.percentile([r['latencyMs'][s] for r in results if s in r['latencyMs']], 50))
+                       for s in stages}
+        }
+
+    print(f"\n{'Stage':<12}{'serial p50 ms':>16}{'overlapped p50 ms':>20}")
+    for stage in summary['overlapped']['p50_ms']:
+        print(f"{stage:<12}{summary['serial']['p50_ms'].get(stage, 0):>16.1f}"
+              f"{summary['overlapped']['p50_ms'][stage]:>20.1f}")
+    print(f"\n⚡ Throughput: serial {summary['serial']['requests_per_sec']:.1f} req/s, "
+          f"overlapped {summary['overlapped']['requests_per_sec']:.1f} req/s")
+    return summary
+
+
+async def serve(gateway, host, port):
+    await gateway.start()
+    server = await asyncio.start_server(lambda r, w: handle_connection(gateway, r, w), host, port)
+    print(f"🚀 Gateway on http://{host}:{port} (POST /analyze-image, GET /health)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        gateway.stop()
+
+
+def main():
+    """Serve the full analysis pipeline, or benchmark stage overlap"""
+    parser = argparse.ArgumentParser(description='asyncio gateway for the complete image analysis')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--embeddings-dir', default='models/embeddings')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--workers', type=int, default=2, help='Processes running the model stages')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8502)
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N',
+                        help='Compare serial and overlapped stages over N synthetic requests')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--output', default='models/analysis_gateway_benchmark.json')
+    args = parser.parse_args()
+
+    gateway_args = {
+        'model_path': args.model,
+        'embeddings_dir': args.embeddings_dir,
+        'data_dir': args.data_dir,
+        'workers': args.workers
+    }
+
+    if args.benchmark:
+        summary = asyncio.run(benchmark(gateway_args, args.benchmark, args.concurrency))
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+        print(f"📊 Benchmark saved to '{args.output}'")
+        return
+
+    try:
+        asyncio.run(serve(AnalysisGateway(**gateway_args), args.host, args.port))
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import cv2
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+
+def synthesize_images(output_dir, count, width, height):
+    """Write smooth-gradient JPEGs that compress like product photos"""
+    rng = np.random.default_rng(42)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    ys, xs = np.mgrid[0:height, 0:width].astype(np.float32)
+    paths = []
+    for i in range(count):
+        base = rng.random(3) * 255
+        img = np.stack([
+            base[0] * (xs / width),
+            base[1] * (ys / height),
+            base[2] * np.sin((xs + ys) / (20 + i))
+        ], axis=-1)
+        img += rng.normal(0, 8, img.shape)
+        cv2.circle(img, (width // 2, height // 2), min(width, height) // 4, rng.random(3) * 255, -1)
+        path = output_dir / f'synthetic_{i}.jpg'
+        cv2.imwrite(str(path), np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+        paths.append(path)
+    return paths
+
+
+def decode_all(paths, reduced, repeats):
+    """Decode and preprocess every path, returning inputs and images/sec"""
+    images = None
+    start = time.perf_counter()
+    for _ in range(repeats):
+        images = [trainer.preprocess_image(trainer.read_image(p, reduced=reduced)) for p in paths]
+    elapsed = time.perf_counter() - start
+    return np.array(images), len(paths) * repeats / elapsed
+
+
+def main():
+    """Compare full and DCT-scaled JPEG decoding for the CNN input pipeline"""
+    parser = argparse.ArgumentParser(description='Benchmark reduced-resolution JPEG decoding')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--synthetic', type=int, default=0, help='Benchmark N synthetic JPEGs instead')
+    parser.add_argument('--width', type=int, default=512)
+    parser.add_argument('--height', type=int, default=512)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--output', default='models/image_decoding_benchmark.json')
+    args = parser.parse_args()
+
+    tmp_dir = None
+    if args.synthetic:
+        tmp_dir = tempfile.TemporaryDirectory()
+        paths = synthesize_images(Path(tmp_dir.name), args.synthetic, args.width, args.height)
+    else:
+        paths = sorted((Path(args.data_dir) / 'images').glob('*/*.jpg'))
+
+    if not paths:
+        print("❌ No JPEG images found! Use --synthetic N to generate some.")
+        return
+
+    scales = {}
+    for p in paths:
+        dims = trainer.read_jpeg_size(p)
+        scale = trainer.choose_decode_scale(*dims) if dims else 1
+        scales[scale] = scales.get(scale, 0) + 1
+    print(f"🖼️ {len(paths)} images | decode scales: " +
+          ", ".join(f"1/{s}: {n}" for s, n in sorted(scales.items())))
+
+    full, full_rate = decode_all(paths, reduced=False, repeats=args.repeats)
+    reduced, reduced_rate = decode_all(paths, reduced=True, repeats=args.repeats)
+
+    # Input-level difference between the two pipelines
+    abs_diff = np.abs(full - reduced)
+    mse = np.mean((full - reduced) ** 2, axis=(1, 2, 3))
+    psnr = 10 * np.log10(1.0 / np.maximum(mse, 1e-12))
+
+    results = {
+        'images': len(paths),
+        'decode_scales': {str(k): v for k, v in scales.items()},
+        'full_images_per_sec': full_rate,
+        'reduced_images_per_sec': reduced_rate,
+        'speedup': reduced_rate / full_rate,
+        'mean_abs_pixel_diff': float(abs_diff.mean()),
+        'min_psnr_db': float(psnr.min()),
+        'mean_psnr_db': float(np.mean(psnr)),
+    }
+
+    print(f"\n⏱️ Full decode:    {full_rate:8.1f} img/s")
+    print(f"⏱️ Reduced decode: {reduced_rate:8.1f} img/s ({results['speedup']:.2f}x)")
+    print(f"🎯 Mean |Δpixel|: {results['mean_abs_pixel_diff']:.4f} | PSNR mean {results['mean_psnr_db']:.1f} dB, "
+          f"min {results['min_psnr_db']:.1f} dB")
+
+    # Model-level check: do the predictions change?
+    if Path(args.model).exists():
+        from tensorflow import keras
+        model = keras.models.load_model(args.model, compile=False)
+        features = np.full((len(paths), 7), 0.75, dtype=np.float32)
+        full_scores = np.asarray(model.predict([full, features], verbose=0)[0]).reshape(-1)
+        reduced_scores = np.asarray(model.predict([reduced, features], verbose=0)[0]).reshape(-1)
+        results['prediction_agreement'] = float(np.mean((full_scores > 0.5) == (reduced_scores > 0.5)))
+        results['max_abs_score_diff'] = float(np.max(np.abs(full_scores - reduced_scores)))
+        print(f"🎯 Prediction agreement: {results['prediction_agreement']:.3f} | "
+              f"max score diff {results['max_abs_score_diff']:.4f}")
+    else:
+        print(f"⚠️ No model at '{args.model}', skipping prediction comparison")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import json
+import time
+import base64
+import argparse
+import threading
+import urllib.request
+import numpy as np
+import cv2
+from pathlib import Path
+
+from script_loader import load_script
+
+service_module = load_script('inference-service')
+
+SAMPLE_REQUEST_FEATURES = {
+    'features': {
+        'paintQuality': 90,
+        'sculptDetails': 88,
+        'packagingAuth': 92,
+        'materialTexture': 85
+    },
+    'metadata': {
+        'quality': 'high',
+        'lighting': 'natural',
+        'background': 'clean'
+    }
+}
+
+
+def build_payloads(data_dir, count=16):
+    """Encode training images (or random noise if none exist) as request bodies"""
+    images_dir = Path(data_dir) / 'images'
+    paths = sorted(images_dir.glob('*/*.jpg'))[:count] if images_dir.exists() else []
+
+    encoded = []
+    for path in paths:
+        encoded.append(base64.b64encode(path.read_bytes()).decode())
+
+    rng = np.random.default_rng(42)
+    while len(encoded) < count:
+        img = (rng.random((512, 512, 3)) * 255).astype(np.uint8)
+        _, buffer = cv2.imencode('.jpg', img, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        encoded.append(base64.b64encode(buffer.tobytes()).decode())
+
+    return [json.dumps({'image': f"data:image/jpeg;base64,{data}", **SAMPLE_REQUEST_FEATURES}).encode()
+            for data in encoded]
+
+
+def post(url, payload):
+    request = urllib.request.Request(url, data=payload, headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=60) as response:
+        return json.loads(response.read())
+
+
+def get(url):
+    with urllib.request.urlopen(url, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def run_load(base_url, payloads, concurrency, requests_per_client):
+    """Fire requests from concurrent clients and collect client-side latencies"""
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def client(client_id):
+        local = []
+        for i in range(requests_per_client):
+            payload = payloads[(client_id + i) % len(payloads)]
+            t0 = time.perf_counter()
+            try:
+                post(f"{base_url}/predict", payload)
+                local.append((time.perf_counter() - t0) * 1000)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client, args=(c,)) for c in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'concurrency': concurrency,
+        'requests': concurrency * requests_per_client,
+        'errors': len(errors),
+        'elapsed_sec': elapsed,
+        'throughput_per_sec': (concurrency * requests_per_client - len(errors)) / elapsed,
+        'client_p50_ms': float(np.percentile(latencies, 50)),
+        'client_p99_ms': float(np.percentile(latencies, 99))
+    }
+
+
+def start_local_instance(model_path, max_batch_size, max_latency_ms, model=None, traced=False):
+    """Start an in-process service on an ephemeral port"""
+    service = service_module.MicroBatchingInferenceService(
+        model_path=model_path,
+        max_batch_size=max_batch_size,
+        max_latency_ms=max_latency_ms,
+        model=model,
+        traced=traced
+    )
+    service.start()
+    server = service_module.create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return service, server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    """Load-test the micro-batching inference service"""
+    parser = argparse.ArgumentParser(description='Load generator for the inference service')
+    parser.add_argument('--url', default=None, help='Target a running service instead of a local one')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--batch-sizes', default='1,8,32', help='Max batch sizes to compare locally')
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--traced', action='store_true', help='Use the traced bucketed serving path')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests-per-client', type=int, default=20)
+    parser.add_argument('--output', default='models/inference_service_benchmark.json')
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.data_dir)
+    results = []
+
+    if args.url:
+        print(f"🎯 Load testing {args.url} with {args.concurrency} clients...")
+        result = run_load(args.url, payloads, args.concurrency, args.requests_per_client)
+        result['server_metrics'] = get(f"{args.url}/metrics")
+        results.append(result)
+    else:
+        if not Path(args.model).exists():
+            print(f"❌ No trained model found at '{args.model}'")
+            return
+
+        from tensorflow import keras
+        model = keras.models.load_model(args.model, compile=False)
+
+        for max_batch_size in [int(b) for b in args.batch_sizes.split(',')]:
+            print(f"🎯 Max batch {max_batch_size}: {args.concurrency} clients x "
+                  f"{args.requests_per_client} requests...")
+            service, server, url = start_local_instance(
+                args.model, max_batch_size, args.max_latency_ms, model=model, traced=args.traced
+            )
+            try:
+                result = run_load(url, payloads, args.concurrency, args.requests_per_client)
+                result['max_batch_size'] = max_batch_size
+                result['server_metrics'] = get(f"{url}/metrics")
+                results.append(result)
+            finally:
+                server.shutdown()
+                server.server_close()
+                service.stop()
+
+    print(f"\n{'max batch':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'mean batch':>12}{'errors':>8}")
+    for r in results:
+        print(f"{str(r.get('max_batch_size', '-')):>10}{r['throughput_per_sec']:>10.1f}"
+              f"{r['client_p50_ms']:>10.1f}{r['client_p99_ms']:>10.1f}"
+              f"{r['server_metrics']['mean_batch_size']:>12.1f}{r['errors']:>8}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import json
+import time
+import argparse
+import tempfile
+from pathlib import Path
+from tensorflow import keras
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+
+def run(data_dir, epochs, batch_size, schedule, target_accuracy, seed):
+    """Train a fresh model and return its history and total wall-clock seconds
+
+    Checkpoints, the best-model file and the evaluation report go to a
+    temporary directory so the production models/ files are left alone.
+    """
+    keras.utils.set_random_seed(seed)
+    classifier = trainer.LabubuClassifier(data_dir, plot_mode='none')
+    with tempfile.TemporaryDirectory() as work_dir:
+        start = time.perf_counter()
+        history = classifier.train(
+            epochs=epochs,
+            batch_size=batch_size,
+            checkpoint_dir=Path(work_dir) / 'checkpoints',
+            schedule=schedule,
+            target_accuracy=target_accuracy,
+            best_model_path=str(Path(work_dir) / 'labubu_classifier_best.h5'),
+            report_path=Path(work_dir) / 'evaluation_report_cnn.json'
+        )
+        total_seconds = time.perf_counter() - start
+    return history.history, total_seconds
+
+
+def summarize(name, history, total_seconds, target_accuracy):
+    # elapsed_seconds counts from the start of train(), including stage rebuilds and resizing
+    reached = trainer.time_to_accuracy(history, target_accuracy)
+    return {
+        'name': name,
+        'epochs_run': len(history['loss']),
+        'total_seconds': total_seconds,
+        'best_val_accuracy': max(history['val_authenticity_accuracy']),
+        'target_epoch': reached[0] if reached else None,
+        'time_to_target_seconds': reached[1] if reached else None,
+    }
+
+
+def main():
+    """Compare time-to-target-accuracy for fixed 224 px and progressive training"""
+    parser = argparse.ArgumentParser(description='Benchmark progressive-resolution training')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--schedule', type=trainer.parse_schedule, default=trainer.parse_schedule('10:128,10:160,30:224'))
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--target-accuracy', type=float, default=0.9)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='models/progressive_training_benchmark.json')
+    args = parser.parse_args()
+
+    epochs = sum(stage_epochs for stage_epochs, _ in args.schedule)
+
+    print(f"📏 Fixed {trainer.IMAGE_SIZE} px training for {epochs} epochs")
+    fixed, fixed_seconds = run(args.data_dir, epochs, args.batch_size, None, args.target_accuracy, args.seed)
+
+    print(f"📐 Progressive training: {args.schedule}")
+    progressive, progressive_seconds = run(args.data_dir, epochs, args.batch_size, args.schedule, args.target_accuracy, args.seed)
+
+    results = [
+        summarize('fixed', fixed, fixed_seconds, args.target_accuracy),
+        summarize('progressive', progressive, progressive_seconds, args.target_accuracy)
+    ]
+
+    print(f"\n{'run':<13}{'epochs':>8}{'total s':>10}{'best acc':>10}{'target ep':>11}{'target s':>10}")
+    for r in results:
+        target_epoch = r['target_epoch'] or '-'
+        target_seconds = f"{r['time_to_target_seconds']:.1f}" if r['time_to_target_seconds'] else '-'
+        print(f"{r['name']:<13}{r['epochs_run']:>8}{r['total_seconds']:>10.1f}"
+              f"{r['best_val_accuracy']:>10.3f}{target_epoch:>11}{target_seconds:>10}")
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump({'target_accuracy': args.target_accuracy, 'schedule': args.schedule, 'runs': results}, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tempfile
+import numpy as np
+import cv2
+from contextlib import contextmanager, redirect_stdout
+from datetime import datetime, timezone
+from pathlib import Path
+
+from script_loader import load_script
+
+DEFAULT_SCALES = [1000, 100_000, 1_000_000]
+DEFAULT_STAGES = ('load_dataset', 'build_features', 'train', 'save_model', 'load_model',
+                  'predict_single', 'predict_batch', 'image_loading')
+DEFAULT_THRESHOLD = 0.10
+DEFAULT_MIN_CHANGE = 0.005
+DEFAULT_REPEATS = 3
+
+# (series, variant, authenticity, angle, features) rows from generate-sample-training-data.ts
+SAMPLE_TEMPLATES = [
+    ("Series 1", "Original Pink", "authentic", "front", (95, 92, 98, 94)),
+    ("Series 1", "Blue Variant", "authentic", "front", (93, 90, 96, 92)),
+    ("Series 1", "Original Pink", "authentic", "packaging", (95, 92, 99, 94)),
+    ("Series 1", "Original Pink", "fake", "front", (45, 38, 25, 42)),
+    ("Series 1", "Blue Variant", "fake", "front", (52, 41, 30, 48)),
+    ("Series 2", "Forest Green", "authentic", "front", (96, 94, 97, 95)),
+    ("Series 2", "Autumn Orange", "authentic", "side", (94, 91, 95, 93)),
+    ("Series 2", "Forest Green", "fake", "front", (38, 35, 20, 40)),
+    ("Series 3", "Space Blue", "authentic", "front", (97, 95, 99, 96)),
+    ("Series 3", "Cosmic Purple", "authentic", "detail", (96, 94, 98, 95)),
+    ("Series 3", "Space Blue", "fake", "front", (42, 39, 28, 44)),
+    ("Series 4", "Fairy Pink", "authentic", "front", (95, 93, 97, 94)),
+    ("Series 4", "Fairy Pink", "fake", "front", (48, 44, 32, 46)),
+    ("Series 5", "Ocean Teal", "authentic", "front", (94, 92, 96, 93)),
+    ("Series 6", "Monster Purple", "authentic", "front", (98, 96, 99, 97)),
+    ("Series 6", "Monster Green", "authentic", "packaging", (98, 96, 100, 97)),
+    ("Series 6", "Monster Purple", "fake", "front", (35, 32, 18, 38)),
+    ("Series 1", "Yellow Special", "authentic", "side", (94, 91, 97, 93)),
+]
+ANGLES = ['front', 'back', 'side', 'detail', 'packaging']
+QUALITIES = ['high', 'medium', 'low']
+LIGHTINGS = ['natural', 'artificial', 'mixed']
+BACKGROUNDS = ['clean', 'cluttered', 'neutral']
+STATUSES = ['approved', 'pending', 'rejected']
+
+
+def synthesize_dataset(data_dir, records, images=256, image_size=512, seed=42):
+    """Write metadata.json in the TrainingDataItem schema plus placeholder JPEGs
+
+    Records cycle through the generator's sample rows with jittered scores
+    and varied capture metadata. Only the first `images` records get an
+    image file; the feature-based stages never open images.
+    """
+    rng = np.random.default_rng(seed)
+    data_dir = Path(data_dir)
+    for authenticity in ('authentic', 'fake'):
+        (data_dir / 'images' / authenticity).mkdir(parents=True, exist_ok=True)
+
+    templates = rng.integers(0, len(SAMPLE_TEMPLATES), records)
+    jitter = rng.normal(0, 4, (records, 4))
+    choices = rng.random((records, 5))
+    uploaded_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+    def pick(options, column, i, bias=0.6):
+        # Mostly the generator's defaults, with the rest spread over the other values
+        u = choices[i, column]
+        return options[0] if u < bias else options[1 + int((u - bias) / (1 - bias) * (len(options) - 1))]
+
+    metadata = []
+    for i in range(records):
+        series, variant, authenticity, angle, scores = SAMPLE_TEMPLATES[templates[i]]
+        metadata.append({
+            'id': f'bench_{i}',
+            'filename': f"{i}_{series.lower().replace(' ', '_')}_{variant.lower().replace(' ', '_')}"
+                        f"_{authenticity}_{angle}.jpg",
+            'series': series,
+            'variant': variant,
+            'authenticity': authenticity,
+            'source': 'benchmark_suite',
+            'metadata': {
+                'angle': angle if choices[i, 0] < 0.7 else ANGLES[i % len(ANGLES)],
+                'quality': pick(QUALITIES, 1, i),
+                'lighting': pick(LIGHTINGS, 2, i),
+                'background': pick(BACKGROUNDS, 3, i)
+            },
+            'features': {name: int(np.clip(round(score + jitter[i, k]), 0, 100)) for k, (name, score) in
+                         enumerate(zip(('paintQuality', 'sculptDetails', 'packagingAuth', 'materialTexture'),
+                                       scores))},
+            'status': pick(STATUSES, 4, i, bias=0.8),
+            'uploadedAt': uploaded_at
+        })
+
+    with open(data_dir / 'metadata.json', 'w') as f:
+        json.dump(metadata, f)
+
+    ys, xs = np.mgrid[0:image_size, 0:image_size].astype(np.float32) / image_size
+    for item in metadata[:images]:
+        color = rng.random(3) * 255
+        img = np.stack([color[0] * xs, color[1] * ys, color[2] * (1 - xs)], axis=-1)
+        img += rng.normal(0, 6, img.shape)
+        cv2.circle(img, (image_size // 2, image_size // 2), image_size // 4, rng.random(3) * 255, -1)
+        cv2.imwrite(str(data_dir / 'images' / item['authenticity'] / item['filename']),
+                    np.clip(img, 0, 255).astype(np.uint8), [cv2.IMWRITE_JPEG_QUALITY, 90])
+    return metadata
+
+
+@contextmanager
+def working_directory(path):
+    """The trainers write to relative models/ paths; keep that inside the work dir"""
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def timed(fn, repeats=1):
+    """Best wall time over `repeats` calls and the last result"""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def environment_info():
+    import sklearn
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'sklearn': sklearn.__version__,
+        'opencv': cv2.__version__,
+        'git_commit': commit
+    }
+
+
+def run_scale(records, stages, work_dir, images, single_predictions, repeats, quiet=True):
+    """Synthesize one dataset size and time each requested stage, returning seconds per stage"""
+    simple = load_script('train-simple-classifier')
+    data_dir = Path(work_dir) / 'training-data'
+    results = {}
+
+    start = time.perf_counter()
+    metadata = synthesize_dataset(data_dir, records, images=min(images, records))
+    results['synthesize'] = time.perf_counter() - start
+    results['metadata_mb'] = (data_dir / 'metadata.json').stat().st_size / 1e6
+
+    output = open(os.devnull, 'w') if quiet else sys.stdout
+    with working_directory(work_dir), redirect_stdout(output):
+        classifier = simple.SimpleLabubuClassifier(data_dir='training-data', plot_mode='none')
+
+        if 'load_dataset' in stages:
+            results['load_dataset'], (X, y) = timed(classifier.load_dataset, repeats)
+        else:
+            X, y = classifier.load_dataset()
+
+        if 'build_features' in stages:
+            # The CNN trainer's 7-value side-input vector over every record
+            cnn = load_script('train-labubu-classifier')
+            results['build_features'], _ = timed(
+                lambda: np.array([cnn.build_feature_vector(item) for item in metadata]), repeats)
+
+        # Scaler and forest fit only; loading, evaluation and saving are timed as their own stages
+        if 'train' in stages:
+            results['train'], _ = timed(lambda: classifier.fit(X, y))
+        if 'save_model' in stages:
+            if classifier.model is None:
+                classifier.fit(X, y)
+            results['save_model'], _ = timed(classifier.save_model, repeats)
+        if 'load_model' in stages:
+            if not Path('models/labubu_classifier.pkl').exists():
+                if classifier.model is None:
+                    classifier.fit(X, y)
+                classifier.save_model()
+            results['load_model'], loaded = timed(classifier.load_model, repeats)
+            if not loaded:
+                raise RuntimeError("load_model() found no saved model to time")
+
+        if 'predict_single' in stages and classifier.model is not None:
+            samples = X[:single_predictions]
+            seconds, _ = timed(lambda: [classifier.predict(row) for row in samples], repeats)
+            results['predict_single'] = seconds / len(samples)
+        if 'predict_batch' in stages and classifier.model is not None:
+            batch = X[:10000]
+            seconds, _ = timed(lambda: classifier.model.predict_proba(classifier.scaler.transform(batch)), repeats)
+            results['predict_batch'] = seconds
+            results['predict_batch_rows_per_sec'] = len(batch) / seconds
+
+        if 'image_loading' in stages:
+            cnn = load_script('train-labubu-classifier')
+            paths = [data_dir / 'images' / item['authenticity'] / item['filename']
+                     for item in metadata[:images]]
+            seconds, _ = timed(lambda: [cnn.preprocess_image(cnn.read_image(p)) for p in paths], repeats)
+            results['image_loading'] = seconds
+            results['image_loading_per_sec'] = len(paths) / seconds
+
+    if quiet:
+        output.close()
+    return results
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD, min_change=DEFAULT_MIN_CHANGE):
+    """Stages whose time grew by more than `threshold` and `min_change` seconds (throughput keys are skipped)
+
+    The absolute floor keeps millisecond stages from being flagged on timer noise alone.
+    """
+    regressions, rows = [], []
+    for scale, stages in current['results'].items():
+        for stage, seconds in stages.items():
+            if stage.endswith('_per_sec') or stage in ('metadata_mb', 'synthesize'):
+                continue
+            before = baseline['results'].get(scale, {}).get(stage)
+            if not before:
+                continue
+            change = seconds / before - 1
+            significant = abs(seconds - before) >= min_change
+            rows.append((scale, stage, before, seconds, change, significant))
+            if change > threshold and significant:
+                regressions.append({'scale': scale, 'stage': stage, 'baseline_s': before,
+                                    'current_s': seconds, 'change': change})
+
+    print(f"{'records':>10} {'stage':<16} {'baseline':>10} {'current':>10} {'change':>8}")
+    for scale, stage, before, seconds, change, significant in rows:
+        flag = '  '
+        if significant:
+            flag = '❌' if change > threshold else ('✅' if change < -threshold else '  ')
+        print(f"{scale:>10} {stage:<16} {before:>9.4f}s {seconds:>9.4f}s {change:>+7.1%} {flag}")
+    return regressions
+
+
+def main():
+    """Time the training and inference pipeline at several dataset sizes"""
+    parser = argparse.ArgumentParser(description='End-to-end benchmark suite on synthetic training data')
+    parser.add_argument('--scales', type=lambda v: [int(x) for x in v.split(',')], default=DEFAULT_SCALES,
+                        help='Comma-separated record counts')
+    parser.add_argument('--stages', type=lambda v: v.split(','), default=list(DEFAULT_STAGES),
+                        help=f"Comma-separated subset of: {','.join(DEFAULT_STAGES)}")
+    parser.add_argument('--images', type=int, default=256, help='Placeholder images written per scale')
+    parser.add_argument('--single-predictions', type=int, default=200)
+    parser.add_argument('--repeats', type=int, default=DEFAULT_REPEATS,
+                        help='Report the best of N runs for every stage except train')
+    parser.add_argument('--work-dir', default=None, help='Keep generated data here instead of a temp dir')
+    parser.add_argument('--output', default='models/benchmark_suite.json')
+    parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CURRENT'), default=None,
+                        help='Compare two result files instead of running')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='Relative slowdown reported as a regression')
+    parser.add_argument('--min-change', type=float, default=DEFAULT_MIN_CHANGE,
+                        help='Seconds a stage must also slow down by before it is flagged')
+    parser.add_argument('--verbose', action='store_true', help='Show the trainers\' own output')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0], 'r') as f:
+            baseline = json.load(f)
+        with open(args.compare[1], 'r') as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold, args.min_change)
+        if regressions:
+            print(f"❌ {len(regressions)} stages regressed by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"✅ No stage regressed by more than {args.threshold:.0%}")
+        return
+
+    unknown = set(args.stages) - set(DEFAULT_STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    output = Path(args.output).resolve()
+    report = {'environment': environment_info(), 'stages': args.stages, 'results': {}}
+    print(f"🖥️ {report['environment']['platform']} | {report['environment']['cpu_count']} CPUs | "
+          f"commit {report['environment']['git_commit']}")
+
+    for records in args.scales:
+        print(f"\n📦 {records:,} records")
+        if args.work_dir:
+            work_dir = Path(args.work_dir) / str(records)
+            work_dir.mkdir(parents=True, exist_ok=True)
+            results = run_scale(records, args.stages, work_dir, args.images,
+                                args.single_predictions, args.repeats, quiet=not args.verbose)
+        else:
+            with tempfile.TemporaryDirectory() as work_dir:
+                results = run_scale(records, args.stages, work_dir, args.images,
+                                    args.single_predictions, args.repeats, quiet=not args.verbose)
+        report['results'][str(records)] = results
+        for stage, value in results.items():
+            unit = '' if stage.endswith('_per_sec') or stage == 'metadata_mb' else 's'
+            print(f"   {stage:<28} {value:>12.4f}{unit}")
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Results saved to '{output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-import fs from "fs/promises"
+import fs, { type FileHandle } from "fs/promises"
 import path from "path"
 import sharp from "sharp"
 
@@ -32,6 +32,40 @@ interface TrainingImage {
   }
 }
 
+type TrainingRecord = TrainingImage & { status?: string }
+
+// Breakdowns kept in dataset_stats.json; must match DIMENSIONS in scripts/dataset-stats.py
+const STATS_FILENAME = "dataset_stats.json"
+const STAT_DIMENSIONS: Record<string, (img: TrainingRecord) => string | undefined> = {
+  byAuthenticity: (img) => img.authenticity,
+  bySeries: (img) => img.series,
+  byVariant: (img) => img.variant,
+  byAngle: (img) => img.metadata?.angle,
+  byQuality: (img) => img.metadata?.quality,
+  byLighting: (img) => img.metadata?.lighting,
+  byStatus: (img) => img.status ?? "unreviewed",
+}
+
+type DatasetStats = { total: number; authentic: number; fake: number } & Record<string, any>
+
+function emptyStats(): DatasetStats {
+  const stats: DatasetStats = { total: 0, authentic: 0, fake: 0 }
+  for (const name of Object.keys(STAT_DIMENSIONS)) {
+    stats[name] = {}
+  }
+  return stats
+}
+
+function countRecord(stats: DatasetStats, img: TrainingRecord) {
+  stats.total += 1
+  if (img.authenticity === "authentic") stats.authentic += 1
+  if (img.authenticity === "fake") stats.fake += 1
+  for (const [name, read] of Object.entries(STAT_DIMENSIONS)) {
+    const value = String(read(img) ?? null)
+    stats[name][value] = (stats[name][value] || 0) + 1
+  }
+}
+
 class TrainingDataCollector {
   private dataDir = "./training-data"
   private imagesDir = path.join(this.dataDir, "images")
@@ -73,40 +107,114 @@ class TrainingDataCollector {
   }
 
   async saveMetadata(image: TrainingImage) {
-    let metadata: TrainingImage[] = []
+    // Appends in place and bumps the counters, the same path as DatasetStats.append in scripts/dataset-stats.py
+    const stats = await this.readFreshStats()
+    await this.appendRecord(image)
 
+    if (stats) {
+      countRecord(stats, image)
+      await this.writeStats(stats)
+    } else {
+      await this.recountStats()
+    }
+  }
+
+  private async appendRecord(image: TrainingImage) {
+    const encoded = "  " + JSON.stringify(image)
+    let handle: FileHandle
     try {
-      const data = await fs.readFile(this.metadataFile, "utf-8")
-      metadata = JSON.parse(data)
+      handle = await fs.open(this.metadataFile, "r+")
     } catch (error) {
-      // File doesn't exist yet
+      await fs.writeFile(this.metadataFile, `[\n${encoded}\n]`)
+      return
+    }
+
+    try {
+      const { size } = await handle.stat()
+      if (size === 0) {
+        await handle.write(`[\n${encoded}\n]`, 0)
+        return
+      }
+
+      // Overwrite the closing bracket of the array, so the cost does not grow with the dataset
+      const tailLength = Math.min(size, 4096)
+      const tail = Buffer.alloc(tailLength)
+      await handle.read(tail, 0, tailLength, size - tailLength)
+      const trimmed = tail.toString("latin1").trimEnd()
+      if (!trimmed.endsWith("]")) {
+        throw new Error("metadata.json does not end with a JSON array")
+      }
+      const end = size - tailLength + trimmed.length - 1
+
+      const headLength = Math.min(end, 64)
+      const head = Buffer.alloc(headLength)
+      await handle.read(head, 0, headLength, 0)
+      const empty = /^\s*\[\s*$/.test(head.toString("latin1"))
+
+      const appended = Buffer.from(`${empty ? "" : ","}\n${encoded}\n]`)
+      await handle.write(appended, 0, appended.length, end)
+      await handle.truncate(end + appended.length)
+    } finally {
+      await handle.close()
     }
+  }
 
-    metadata.push(image)
-    await fs.writeFile(this.metadataFile, JSON.stringify(metadata, null, 2))
+  private async fingerprint() {
+    const stat = await fs.stat(this.metadataFile)
+    return { metadataSize: stat.size, metadataMtimeMs: Math.floor(stat.mtimeMs) }
   }
 
-  async getDatasetStats() {
+  private async readFreshStats(): Promise<DatasetStats | null> {
+    // Counters kept in dataset_stats.json, valid while metadata.json is unchanged
     try {
-      const data = await fs.readFile(this.metadataFile, "utf-8")
-      const metadata: TrainingImage[] = JSON.parse(data)
-
-      const stats = {
-        total: metadata.length,
-        authentic: metadata.filter((img) => img.authenticity === "authentic").length,
-        fake: metadata.filter((img) => img.authenticity === "fake").length,
-        bySeries: {} as Record<string, number>,
-        byAngle: {} as Record<string, number>,
+      const [stored, current] = await Promise.all([
+        fs.readFile(path.join(this.dataDir, STATS_FILENAME), "utf-8"),
+        this.fingerprint(),
+      ])
+      const { fingerprint, stats } = JSON.parse(stored)
+      if (fingerprint?.metadataSize === current.metadataSize && fingerprint?.metadataMtimeMs === current.metadataMtimeMs) {
+        return stats
       }
+    } catch (error) {
+      // No persisted stats or no metadata yet
+    }
+    return null
+  }
 
-      metadata.forEach((img) => {
-        stats.bySeries[img.series] = (stats.bySeries[img.series] || 0) + 1
-        stats.byAngle[img.metadata.angle] = (stats.byAngle[img.metadata.angle] || 0) + 1
-      })
+  private async writeStats(stats: DatasetStats) {
+    const statsFile = path.join(this.dataDir, STATS_FILENAME)
+    const sorted = { ...stats }
+    for (const name of Object.keys(STAT_DIMENSIONS)) {
+      sorted[name] = Object.fromEntries(Object.entries(stats[name] || {}).sort(([a], [b]) => (a < b ? -1 : a > b ? 1 : 0)))
+    }
+    const payload = {
+      fingerprint: await this.fingerprint(),
+      stats: sorted,
+      updatedAt: new Date().toISOString().replace(/\.\d{3}Z$/, "Z"),
+    }
+    await fs.writeFile(`${statsFile}.tmp`, JSON.stringify(payload, null, 2))
+    await fs.rename(`${statsFile}.tmp`, statsFile)
+  }
+
+  private async recountStats(): Promise<DatasetStats> {
+    const data = await fs.readFile(this.metadataFile, "utf-8")
+    const metadata: TrainingImage[] = JSON.parse(data)
+    const stats = emptyStats()
+    metadata.forEach((img) => countRecord(stats, img))
+    await this.writeStats(stats)
+    return stats
+  }
 
-      return stats
+  async getDatasetStats() {
+    const stored = await this.readFreshStats()
+    if (stored) {
+      return stored
+    }
+
+    try {
+      return await this.recountStats()
     } catch (error) {
-      return { total: 0, authentic: 0, fake: 0, bySeries: {}, byAngle: {} }
+      return emptyStats()
     }
   }
 }
@@ -0,0 +1,398 @@
+import json
+import time
+import shutil
+import argparse
+import numpy as np
+from pathlib import Path
+
+from script_loader import load_script
+
+dataset_stats = load_script('dataset-stats')
+
+SNAPSHOT_DIRNAME = 'snapshot'
+DEFAULT_CHUNK_ROWS = 65536
+
+# Column name (dotted path into a metadata.json record) -> storage type
+COLUMNS = {
+    'id': 'dict',
+    'filename': 'dict',
+    'series': 'dict',
+    'variant': 'dict',
+    'authenticity': 'dict',
+    'source': 'dict',
+    'status': 'dict',
+    'uploadedAt': 'dict',
+    'metadata.angle': 'dict',
+    'metadata.quality': 'dict',
+    'metadata.lighting': 'dict',
+    'metadata.background': 'dict',
+    'features.paintQuality': 'float64',
+    'features.sculptDetails': 'float64',
+    'features.packagingAuth': 'float64',
+    'features.materialTexture': 'float64'
+}
+
+
+def read_path(item, column):
+    for key in column.split('.'):
+        if not isinstance(item, dict):
+            return None
+        item = item.get(key)
+    return item
+
+
+def parse_filter(expression):
+    """'status=approved', 'series=Series 1,Series 2', 'features.paintQuality>=80' -> (column, condition)
+
+    Equality on a numeric column always gives a list of floats, so it
+    compares against numbers on both the snapshot and the JSON path.
+    """
+    for operator in ('>=', '<='):
+        if operator in expression:
+            column, value = expression.split(operator, 1)
+            bound = float(value)
+            return column.strip(), (bound, None) if operator == '>=' else (None, bound)
+    column, value = expression.split('=', 1)
+    column = column.strip()
+    values = [v.strip() for v in value.split(',')]
+    if COLUMNS.get(column, 'dict') != 'dict':
+        try:
+            return column, [float(v) for v in values]
+        except ValueError:
+            raise ValueError(f"Filter '{expression}': '{column}' is numeric, got '{value}'") from None
+    return column, values if len(values) > 1 else values[0]
+
+
+def parse_filters(expressions):
+    filters = {}
+    for expression in expressions or []:
+        column, condition = parse_filter(expression)
+        if isinstance(condition, tuple) and isinstance(filters.get(column), tuple):
+            # Merge '>=' and '<=' on the same column into one range
+            low, high = filters[column]
+            condition = (condition[0] if condition[0] is not None else low,
+                         condition[1] if condition[1] is not None else high)
+        filters[column] = condition
+    return filters
+
+
+def record_matches(item, filters):
+    """Row-at-a-time filter semantics, used when no fresh snapshot exists"""
+    for column, condition in filters.items():
+        value = read_path(item, column)
+        if isinstance(condition, tuple):
+            low, high = condition
+            if value is None or (low is not None and value < low) or (high is not None and value > high):
+                return False
+        elif isinstance(condition, list):
+            if value not in condition:
+                return False
+        elif value != condition:
+            return False
+    return True
+
+
+def export_snapshot(data_dir, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """Write metadata.json as one .npy file per column plus a manifest of chunk stats
+
+    String columns are dictionary-encoded to int32 codes; feature scores are
+    float64, the precision of the JSON numbers, with NaN for missing values. Each chunk of `chunk_rows` rows
+    records min/max for numeric columns and the distinct codes for string
+    columns, which is what the reader uses to skip chunks.
+    """
+    data_dir = Path(data_dir)
+    metadata_file = data_dir / 'metadata.json'
+    with open(metadata_file, 'r') as f:
+        metadata = json.load(f)
+    fingerprint = dataset_stats.file_fingerprint(metadata_file)
+
+    snapshot_dir = data_dir / SNAPSHOT_DIRNAME
+    tmp_dir = data_dir / (SNAPSHOT_DIRNAME + '.tmp')
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    n_rows = len(metadata)
+    columns = {}
+    chunk_stats = [{'start': start, 'stop': min(start + chunk_rows, n_rows), 'stats': {}}
+                   for start in range(0, n_rows, chunk_rows)]
+
+    for column, kind in COLUMNS.items():
+        values = [read_path(item, column) for item in metadata]
+        if kind == 'dict':
+            dictionary = {}
+            codes = np.fromiter((dictionary.setdefault(v, len(dictionary)) for v in values),
+                                dtype=np.int32, count=n_rows)
+            columns[column] = {'type': 'dict', 'dictionary': list(dictionary)}
+            data = codes
+        else:
+            data = np.array([np.nan if v is None else v for v in values], dtype=kind)
+            columns[column] = {'type': kind}
+        np.save(tmp_dir / f'{column}.npy', data)
+
+        for chunk in chunk_stats:
+            block = data[chunk['start']:chunk['stop']]
+            if kind == 'dict':
+                # Distinct codes are only worth storing for low-cardinality columns
+                distinct = np.unique(block)
+                chunk['stats'][column] = {
+                    'min': int(block.min()), 'max': int(block.max()),
+                    'distinct': distinct.tolist() if len(distinct) <= 256 else None
+                }
+            else:
+                finite = block[~np.isnan(block)]
+                chunk['stats'][column] = {
+                    'min': float(finite.min()) if len(finite) else None,
+                    'max': float(finite.max()) if len(finite) else None
+                }
+
+    manifest = {
+        'rows': n_rows,
+        'chunk_rows': chunk_rows,
+        'fingerprint': fingerprint,
+        'columns': columns,
+        'chunks': chunk_stats
+    }
+    with open(tmp_dir / 'manifest.json', 'w') as f:
+        json.dump(manifest, f)
+
+    shutil.rmtree(snapshot_dir, ignore_errors=True)
+    tmp_dir.rename(snapshot_dir)
+    return snapshot_dir
+
+
+class SnapshotReader:
+    """Load selected columns and row chunks of a snapshot written by export_snapshot
+
+    Filters map a column to a value, a list of values, or a (low, high)
+    range with None for an open end; numeric columns take numbers only. Chunks whose stats rule the filter
+    out are never read; the remaining ones are filtered row by row on the
+    codes, before any string is decoded.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self.snapshot_dir = self.data_dir / SNAPSHOT_DIRNAME
+        with open(self.snapshot_dir / 'manifest.json', 'r') as f:
+            self.manifest = json.load(f)
+        self.columns = self.manifest['columns']
+        self._arrays = {}
+        self._lookups = {}
+        self.chunks_read = 0
+
+    @classmethod
+    def open_fresh(cls, data_dir):
+        """A reader if the snapshot matches the current metadata.json, otherwise None"""
+        data_dir = Path(data_dir)
+        if not (data_dir / SNAPSHOT_DIRNAME / 'manifest.json').exists():
+            return None
+        reader = cls(data_dir)
+        if reader.manifest['fingerprint'] != dataset_stats.file_fingerprint(data_dir / 'metadata.json'):
+            return None
+        return reader
+
+    def _array(self, column):
+        if column not in self._arrays:
+            self._arrays[column] = np.load(self.snapshot_dir / f'{column}.npy', mmap_mode='r')
+        return self._arrays[column]
+
+    def _codes_for(self, column, condition):
+        """Dictionary codes selected by an equality or IN condition"""
+        if column not in self._lookups:
+            self._lookups[column] = {v: i for i, v in enumerate(self.columns[column]['dictionary'])}
+        lookup = self._lookups[column]
+        wanted = condition if isinstance(condition, list) else [condition]
+        return np.array([lookup[v] for v in wanted if v in lookup], dtype=np.int32)
+
+    def _prepare(self, filters):
+        prepared = []
+        for column, condition in filters.items():
+            if column not in self.columns:
+                raise KeyError(f"Unknown snapshot column '{column}'")
+            if self.columns[column]['type'] == 'dict':
+                if isinstance(condition, tuple):
+                    raise ValueError(f"Range filter on string column '{column}'")
+                prepared.append((column, 'codes', self._codes_for(column, condition)))
+            elif isinstance(condition, tuple):
+                prepared.append((column, 'range', condition))
+            else:
+                wanted = condition if isinstance(condition, list) else [condition]
+                if not all(isinstance(v, (int, float)) for v in wanted):
+                    raise ValueError(f"Equality filter on numeric column '{column}' needs numbers, got {wanted!r}")
+                prepared.append((column, 'values', np.array(wanted, dtype=self.columns[column]['type'])))
+        return prepared
+
+    @staticmethod
+    def _chunk_may_match(chunk, prepared):
+        for column, kind, condition in prepared:
+            stats = chunk['stats'][column]
+            if kind == 'codes':
+                if len(condition) == 0:
+                    return False
+                if stats['distinct'] is not None:
+                    if not np.isin(condition, stats['distinct']).any():
+                        return False
+                elif condition.max() < stats['min'] or condition.min() > stats['max']:
+                    return False
+            elif kind == 'values':
+                if stats['min'] is None or not ((condition >= stats['min']) & (condition <= stats['max'])).any():
+                    return False
+            else:
+                low, high = condition
+                if stats['min'] is None:
+                    return False
+                if (low is not None and stats['max'] < low) or (high is not None and stats['min'] > high):
+                    return False
+        return True
+
+    def read(self, columns=None, filters=None):
+        """Return {column: array} for matching rows; string columns come back decoded"""
+        columns = list(columns or self.columns)
+        prepared = self._prepare(filters or {})
+        selected = {column: [] for column in columns}
+        self.chunks_read = 0
+
+        for chunk in self.manifest['chunks']:
+            if not self._chunk_may_match(chunk, prepared):
+                continue
+            self.chunks_read += 1
+            rows = slice(chunk['start'], chunk['stop'])
+            mask = np.ones(chunk['stop'] - chunk['start'], dtype=bool)
+            for column, kind, condition in prepared:
+                block = self._array(column)[rows]
+                if kind in ('codes', 'values'):
+                    mask &= np.isin(block, condition)
+                else:
+                    low, high = condition
+                    if low is not None:
+                        mask &= block >= low
+                    if high is not None:
+                        mask &= block <= high
+            if not mask.any():
+                continue
+            for column in columns:
+                selected[column].append(np.asarray(self._array(column)[rows])[mask])
+
+        result = {}
+        for column in columns:
+            kind = self.columns[column]['type']
+            data = np.concatenate(selected[column]) if selected[column] else \
+                np.zeros(0, dtype=np.int32 if kind == 'dict' else kind)
+            if kind == 'dict':
+                dictionary = np.array(self.columns[column]['dictionary'], dtype=object)
+                data = dictionary[data] if len(dictionary) else data.astype(object)
+            result[column] = data
+        return result
+
+    def read_records(self, columns=None, filters=None):
+        """Matching rows rebuilt as metadata.json-shaped dicts"""
+        data = self.read(columns, filters)
+        groups = {}
+        for name, values in data.items():
+            values = values.tolist()
+            if self.columns[name]['type'] != 'dict':
+                values = [None if v != v else v for v in values]
+            parent, _, key = name.rpartition('.')
+            groups.setdefault(parent, ([], []))
+            groups[parent][0].append(key)
+            groups[parent][1].append(values)
+
+        flat_keys, flat_values = groups.pop('', ([], []))
+        nested = [(parent, keys, list(zip(*values))) for parent, (keys, values) in groups.items()]
+        n_rows = len(next(iter(data.values()))) if data else 0
+        rows = list(zip(*flat_values)) if flat_values else [()] * n_rows
+
+        records = []
+        for i, row in enumerate(rows):
+            item = dict(zip(flat_keys, row))
+            for parent, keys, parent_rows in nested:
+                item[parent] = dict(zip(keys, parent_rows[i]))
+            records.append(item)
+        return records
+
+
+def load_records(data_dir, filters=None, columns=None):
+    """Records for training: from a fresh snapshot when there is one, else metadata.json
+
+    Both paths apply the same filter semantics, so callers do not need to
+    know whether a snapshot was exported.
+    """
+    filters = filters or {}
+    reader = SnapshotReader.open_fresh(data_dir)
+    if reader is not None:
+        records = reader.read_records(columns, filters)
+        print(f"🧊 Read {len(records)} records from snapshot "
+              f"({reader.chunks_read}/{len(reader.manifest['chunks'])} chunks)")
+        return records
+
+    with open(Path(data_dir) / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+    if filters:
+        metadata = [item for item in metadata if record_matches(item, filters)]
+    return metadata
+
+
+def benchmark(data_dir, filters, repeats=3):
+    """Time a filtered load through metadata.json against the snapshot reader"""
+    metadata_file = Path(data_dir) / 'metadata.json'
+
+    def timed(fn):
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = fn()
+            best = min(best, time.perf_counter() - start)
+        return best, result
+
+    def from_json():
+        with open(metadata_file, 'r') as f:
+            return [item for item in json.load(f) if record_matches(item, filters)]
+
+    reader = SnapshotReader(data_dir)
+    json_seconds, expected = timed(from_json)
+    snapshot_seconds, records = timed(lambda: reader.read_records(filters=filters))
+    columns_seconds, _ = timed(lambda: reader.read(['authenticity', 'features.paintQuality'], filters))
+
+    print(f"📄 metadata.json + filter:  {json_seconds * 1000:8.1f} ms ({len(expected)} rows)")
+    print(f"🧊 snapshot, all columns:   {snapshot_seconds * 1000:8.1f} ms ({len(records)} rows, "
+          f"{reader.chunks_read}/{len(reader.manifest['chunks'])} chunks)")
+    print(f"🧊 snapshot, two columns:   {columns_seconds * 1000:8.1f} ms")
+    return {'json_ms': json_seconds * 1000, 'snapshot_ms': snapshot_seconds * 1000,
+            'snapshot_two_columns_ms': columns_seconds * 1000, 'rows': len(records)}
+
+
+def main():
+    """Export metadata.json to a columnar snapshot, or query one"""
+    parser = argparse.ArgumentParser(description='Columnar snapshots of training metadata')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--chunk-rows', type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument('--filter', action='append', default=[],
+                        help="e.g. status=approved, 'series=Series 1,Series 2', features.paintQuality>=80")
+    parser.add_argument('--query', action='store_true', help='Read matching rows instead of exporting')
+    parser.add_argument('--benchmark', action='store_true', help='Compare filtered loads against metadata.json')
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    if not (data_dir / 'metadata.json').exists():
+        print("❌ No metadata.json found!")
+        return
+    filters = parse_filters(args.filter)
+
+    if args.query:
+        records = load_records(data_dir, filters)
+        print(json.dumps(records[:5], indent=2))
+        print(f"📊 {len(records)} matching records")
+        return
+
+    if args.benchmark and SnapshotReader.open_fresh(data_dir) is not None:
+        benchmark(data_dir, filters)
+        return
+
+    start = time.perf_counter()
+    snapshot_dir = export_snapshot(data_dir, args.chunk_rows)
+    print(f"✅ Exported snapshot to '{snapshot_dir}' in {time.perf_counter() - start:.2f}s")
+    if args.benchmark:
+        benchmark(data_dir, filters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import json
+import time
+import argparse
+from collections import Counter
+from pathlib import Path
+
+STATS_FILENAME = 'dataset_stats.json'
+
+# Breakdown name -> how to read the value from a metadata.json record
+# (STAT_DIMENSIONS in collect-training-data.ts must stay in sync)
+DIMENSIONS = {
+    'byAuthenticity': lambda item: item.get('authenticity'),
+    'bySeries': lambda item: item.get('series'),
+    'byVariant': lambda item: item.get('variant'),
+    'byAngle': lambda item: item.get('metadata', {}).get('angle'),
+    'byQuality': lambda item: item.get('metadata', {}).get('quality'),
+    'byLighting': lambda item: item.get('metadata', {}).get('lighting'),
+    'byStatus': lambda item: item.get('status', 'unreviewed')
+}
+
+
+def stat_key(value):
+    """Counter key as it reads back from JSON, like String(value ?? null) on the TS side"""
+    return 'null' if value is None else str(value)
+
+
+def file_fingerprint(path):
+    """Size and millisecond mtime, cheap enough to check on every read"""
+    stat = os.stat(path)
+    return {'metadataSize': stat.st_size, 'metadataMtimeMs': stat.st_mtime_ns // 1_000_000}
+
+
+class DatasetStats:
+    """Running counters for metadata.json, persisted to dataset_stats.json beside it
+
+    Records added through append() are written to the end of the metadata
+    array in place and counted in O(1), instead of re-reading the whole
+    file. collect-training-data.ts appends and counts the same way. The
+    stored fingerprint (size and mtime of metadata.json) detects edits
+    made by other writers, in which case the counters are rebuilt.
+    """
+
+    def __init__(self, data_dir='./training-data'):
+        self.data_dir = Path(data_dir)
+        self.metadata_file = self.data_dir / 'metadata.json'
+        self.stats_file = self.data_dir / STATS_FILENAME
+        self.total = 0
+        self.counters = {name: Counter() for name in DIMENSIONS}
+        self.fingerprint = None
+
+    def record(self, item, delta=1):
+        """Count (or with delta=-1, uncount) one record"""
+        self.total += delta
+        for name, read in DIMENSIONS.items():
+            value = stat_key(read(item))
+            self.counters[name][value] += delta
+            if self.counters[name][value] == 0:
+                del self.counters[name][value]
+
+    def summary(self):
+        """Same keys as TrainingDataCollector.getDatasetStats, plus the other breakdowns"""
+        return {
+            'total': self.total,
+            'authentic': self.counters['byAuthenticity'].get('authentic', 0),
+            'fake': self.counters['byAuthenticity'].get('fake', 0),
+            **{name: dict(sorted(counter.items()))
+               for name, counter in self.counters.items()}
+        }
+
+    def recompute(self):
+        """Count every record in metadata.json from scratch"""
+        self.total = 0
+        self.counters = {name: Counter() for name in DIMENSIONS}
+        if self.metadata_file.exists():
+            with open(self.metadata_file, 'r') as f:
+                for item in json.load(f):
+                    self.record(item)
+            self.fingerprint = file_fingerprint(self.metadata_file)
+        else:
+            self.fingerprint = None
+        return self
+
+    def load(self):
+        """Read persisted counters, rebuilding them if metadata.json changed underneath"""
+        stored = None
+        if self.stats_file.exists():
+            try:
+                with open(self.stats_file, 'r') as f:
+                    stored = json.load(f)
+            except (OSError, ValueError):
+                stored = None
+
+        current = file_fingerprint(self.metadata_file) if self.metadata_file.exists() else None
+        if stored is None or stored.get('fingerprint') != current:
+            if stored is not None:
+                print("🔄 metadata.json changed since the stats were saved, recounting...")
+            self.recompute().save()
+            return self
+
+        self.total = stored['stats']['total']
+        self.counters = {name: Counter(stored['stats'].get(name, {})) for name in DIMENSIONS}
+        self.fingerprint = current
+        return self
+
+    def save(self):
+        tmp_path = self.stats_file.with_suffix('.tmp')
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        with open(tmp_path, 'w') as f:
+            json.dump({'fingerprint': self.fingerprint, 'stats': self.summary(),
+                       'updatedAt': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())}, f, indent=2)
+        tmp_path.replace(self.stats_file)
+
+    def append(self, items):
+        """Append records to metadata.json in place and count them
+
+        The closing bracket of the array is overwritten with the new
+        records, so the cost depends on the records added, not the size
+        of the dataset.
+        """
+        if not items:
+            return self
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        encoded = ',\n'.join('  ' + json.dumps(item) for item in items)
+
+        if not self.metadata_file.exists() or self.metadata_file.stat().st_size == 0:
+            with open(self.metadata_file, 'w') as f:
+                f.write('[\n' + encoded + '\n]')
+        else:
+            with open(self.metadata_file, 'r+b') as f:
+                end = self._closing_bracket(f)
+                f.seek(0)
+                empty = self._is_empty_array(f, end)
+                f.seek(end)
+                f.write((('' if empty else ',') + '\n' + encoded + '\n]').encode())
+                f.truncate()
+
+        for item in items:
+            self.record(item)
+        self.fingerprint = file_fingerprint(self.metadata_file)
+        self.save()
+        return self
+
+    @staticmethod
+    def _closing_bracket(f, window=4096):
+        """Offset of the final ']' in the file, scanning backwards from the end"""
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        while position > 0:
+            start = max(0, position - window)
+            f.seek(start)
+            chunk = f.read(position - start)
+            stripped = chunk.rstrip()
+            if stripped:
+                if not stripped.endswith(b']'):
+                    raise ValueError("metadata.json does not end with a JSON array")
+                return start + len(stripped) - 1
+            position = start
+        raise ValueError("metadata.json is empty")
+
+    @staticmethod
+    def _is_empty_array(f, end):
+        """True when nothing but whitespace sits between '[' and the closing ']'"""
+        head = f.read(min(end, 64)).lstrip()
+        return head.startswith(b'[') and not head[1:].strip()
+
+    def verify(self):
+        """Recount from scratch and report any breakdown that drifted"""
+        persisted = self.summary()
+        fresh = DatasetStats(self.data_dir).recompute()
+        expected = fresh.summary()
+        mismatches = {key: {'persisted': persisted.get(key), 'recomputed': value}
+                      for key, value in expected.items() if persisted.get(key) != value}
+        return mismatches, fresh
+
+
+def main():
+    """Show, verify or rebuild the running dataset statistics"""
+    parser = argparse.ArgumentParser(description='Incrementally maintained training-data statistics')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--verify', action='store_true', help='Recompute from metadata.json and compare')
+    parser.add_argument('--rebuild', action='store_true', help='Recompute from metadata.json and save')
+    args = parser.parse_args()
+
+    stats = DatasetStats(args.data_dir)
+    if not stats.metadata_file.exists():
+        print("❌ No metadata.json found!")
+        return
+
+    if args.rebuild:
+        start = time.perf_counter()
+        stats.recompute().save()
+        print(f"✅ Rebuilt stats for {stats.total} records in {(time.perf_counter() - start) * 1000:.1f} ms")
+    else:
+        start = time.perf_counter()
+        stats.load()
+        print(f"⚡ Loaded stats in {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    if args.verify:
+        mismatches, fresh = stats.verify()
+        if mismatches:
+            print(f"⚠️ {len(mismatches)} breakdowns drifted from metadata.json, saving recomputed counts")
+            for key, values in mismatches.items():
+                print(f"   {key}: {values['persisted']} -> {values['recomputed']}")
+            fresh.save()
+            stats = fresh
+        else:
+            print("✅ Persisted stats match a full recount")
+
+    print(f"📊 Dataset Statistics: {json.dumps(stats.summary(), indent=2)}")
+
+
+if __name__ == "__main__":
+    main()
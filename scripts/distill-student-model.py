@@ -0,0 +1,274 @@
+import os
+import json
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from tensorflow.keras import layers
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+quantization = load_script('export-quantized-model')
+
+
+def soften(probabilities, temperature):
+    """Raise the temperature of sigmoid outputs to expose the teacher's dark knowledge"""
+    p = np.clip(probabilities, 1e-6, 1 - 1e-6)
+    logits = np.log(p / (1 - p))
+    return 1 / (1 + np.exp(-logits / temperature))
+
+
+class StudentDistiller:
+    def __init__(self, teacher_path='models/labubu_classifier_final.h5',
+                 student_path='models/labubu_student.h5', data_dir='./training-data',
+                 student_size=128, width_multiplier=0.35, temperature=2.0, alpha=0.5,
+                 dedup='none', filters=None, split='random'):
+        self.teacher_path = Path(teacher_path)
+        self.student_path = Path(student_path)
+        self.data_dir = data_dir
+        # Must match the teacher's training flags so the student is validated on rows the teacher never saw
+        self.dedup = dedup
+        self.filters = filters or {}
+        self.split = split
+        self.student_size = student_size
+        self.width_multiplier = width_multiplier
+        self.temperature = temperature
+        # Weight of the hard label versus the teacher's soft target
+        self.alpha = alpha
+        self.teacher = None
+        self.student = None
+        self.distillation_model = None
+
+    def create_student(self):
+        """Narrow MobileNetV2 student with the teacher's inputs and outputs
+
+        The student keeps the 224 px `image` input and downsizes internally,
+        so it is a drop-in replacement for the teacher at serving time. It
+        is trained through `distillation_model`, which adds a second head
+        on the same logit divided by the temperature; the saved student
+        serves at T=1, so its scores stay calibrated like the teacher's.
+        """
+        print(f"🏗️ Creating student (MobileNetV2 x{self.width_multiplier} at {self.student_size} px)...")
+
+        image_input = keras.Input(shape=(trainer.IMAGE_SIZE, trainer.IMAGE_SIZE, 3), name='image')
+        x = layers.Resizing(self.student_size, self.student_size)(image_input)
+        # Inputs are scaled to 0-1; MobileNetV2 expects -1 to 1
+        x = layers.Rescaling(2.0, offset=-1.0)(x)
+
+        backbone = keras.applications.MobileNetV2(
+            input_shape=(self.student_size, self.student_size, 3),
+            alpha=self.width_multiplier,
+            weights='imagenet',
+            include_top=False
+        )
+        x = backbone(x)
+        x = layers.GlobalAveragePooling2D()(x)
+        x = layers.Dropout(0.2)(x)
+        image_features = layers.Dense(64, activation='relu', name='image_features')(x)
+
+        feature_input = keras.Input(shape=(7,), name='features')
+        feature_dense = layers.Dense(16, activation='relu')(feature_input)
+
+        combined = layers.concatenate([image_features, feature_dense])
+        combined = layers.Dense(32, activation='relu')(combined)
+
+        authenticity_logit = layers.Dense(1, name='authenticity_logit')(combined)
+        authenticity_output = layers.Activation('sigmoid', name='authenticity')(authenticity_logit)
+        confidence_output = layers.Dense(1, activation='sigmoid', name='confidence')(combined)
+
+        self.student = keras.Model(
+            inputs=[image_input, feature_input],
+            outputs=[authenticity_output, confidence_output]
+        )
+
+        # Soft head: sigmoid(logit / T) against the teacher's softened targets, scaled by T^2
+        # so its gradients stay comparable to the hard-label term
+        soft_output = layers.Activation('sigmoid', name='soft_authenticity')(
+            layers.Rescaling(1.0 / self.temperature)(authenticity_logit)
+        )
+        self.distillation_model = keras.Model(
+            inputs=[image_input, feature_input],
+            outputs=[authenticity_output, soft_output, confidence_output]
+        )
+        self.distillation_model.compile(
+            optimizer=keras.optimizers.Adam(learning_rate=0.001),
+            loss={
+                'authenticity': 'binary_crossentropy',
+                'soft_authenticity': 'binary_crossentropy',
+                'confidence': 'mse'
+            },
+            loss_weights={
+                'authenticity': self.alpha,
+                'soft_authenticity': (1 - self.alpha) * self.temperature ** 2,
+                'confidence': 0.3
+            },
+            metrics={
+                'authenticity': ['accuracy'],
+                'confidence': ['mae']
+            }
+        )
+
+        print(f"✅ Student created ({self.student.count_params():,} params)")
+        return self.student
+
+    def distill(self, epochs=30, batch_size=32):
+        """Train the student on hard labels plus the teacher's temperature-softened predictions"""
+        print("🎓 Starting distillation...")
+
+        self.teacher = keras.models.load_model(self.teacher_path, compile=False)
+        print(f"👩‍🏫 Teacher: {self.teacher.count_params():,} params")
+
+        classifier = trainer.LabubuClassifier(self.data_dir, dedup=self.dedup, filters=self.filters, split=self.split)
+        images, labels, features = classifier.load_dataset()
+        if len(images) == 0:
+            print("❌ No training data found!")
+            return None
+
+        # The teacher's own split, so validation and the benchmark only use rows it never trained on
+        idx_train, idx_val = classifier.split_indices(labels)
+        X_img_train, X_img_val = images[idx_train], images[idx_val]
+        X_feat_train, X_feat_val = features[idx_train], features[idx_val]
+        y_train, y_val = labels[idx_train], labels[idx_val]
+
+        print("🔮 Computing teacher targets...")
+
+        def teacher_targets(X_img, X_feat, y):
+            # Validation gets the same soft targets as training, so val_loss matches the training objective
+            teacher_auth, teacher_conf = self.teacher.predict([X_img, X_feat], batch_size=batch_size, verbose=0)
+            return {'authenticity': y, 'soft_authenticity': soften(teacher_auth.reshape(-1), self.temperature),
+                    'confidence': teacher_conf.reshape(-1)}
+
+        train_targets = teacher_targets(X_img_train, X_feat_train, y_train)
+        val_targets = teacher_targets(X_img_val, X_feat_val, y_val)
+
+        if self.student is None:
+            self.create_student()
+
+        callbacks = [
+            keras.callbacks.EarlyStopping(
+                monitor='val_authenticity_accuracy', mode='max', patience=10, restore_best_weights=True
+            ),
+            keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=5)
+        ]
+
+        history = self.distillation_model.fit(
+            [X_img_train, X_feat_train],
+            train_targets,
+            validation_data=([X_img_val, X_feat_val], val_targets),
+            epochs=epochs,
+            batch_size=batch_size,
+            callbacks=callbacks,
+            verbose=1
+        )
+
+        os.makedirs(self.student_path.parent, exist_ok=True)
+        self.student.save(self.student_path)
+        print(f"💾 Student saved to '{self.student_path}'")
+
+        return history, (X_img_val, X_feat_val, y_val)
+
+
+def benchmark(models, images, features, labels, batch_size=32, runs=50):
+    """Latency, throughput and accuracy for each named model on the same inputs"""
+    print("⏱️ Benchmarking teacher vs student...")
+    batch_size = min(batch_size, len(images))
+    results = {}
+    scores = {}
+
+    for name, model in models.items():
+        def predict_fn(img, feat):
+            outputs = model([img, feat], training=False)
+            return np.asarray(outputs[0]).reshape(-1), np.asarray(outputs[1]).reshape(-1)
+
+        predict_fn(images[:1], features[:1])
+        predict_fn(images[:batch_size], features[:batch_size])
+
+        single = quantization.time_batches(predict_fn, images, features, 1, runs)
+        batched = quantization.time_batches(predict_fn, images, features, batch_size, max(runs // 5, 1))
+        scores[name], _ = predict_fn(images, features)
+
+        results[name] = {
+            'params': int(model.count_params()),
+            'latency_p50_ms': float(np.percentile(single, 50)),
+            'latency_p99_ms': float(np.percentile(single, 99)),
+            'throughput_per_sec': float(batch_size / (np.median(batched) / 1000)),
+            'accuracy': float(np.mean((scores[name] > 0.5).astype(int) == labels))
+        }
+
+    results['student']['teacher_agreement'] = float(np.mean((scores['teacher'] > 0.5) == (scores['student'] > 0.5)))
+
+    print(f"\n{'Model':<10}{'params':>12}{'p50 ms':>10}{'p99 ms':>10}{'img/s':>10}{'accuracy':>10}")
+    for name, r in results.items():
+        print(f"{name:<10}{r['params']:>12,}{r['latency_p50_ms']:>10.2f}{r['latency_p99_ms']:>10.2f}"
+              f"{r['throughput_per_sec']:>10.1f}{r['accuracy']:>10.3f}")
+    print(f"\n🎯 Student/teacher agreement: {results['student']['teacher_agreement']:.3f}")
+    return results
+
+
+def main():
+    """Distill the EfficientNet classifier into a small CPU student"""
+    parser = argparse.ArgumentParser(description='Distill the Labubu CNN into a small student model')
+    parser.add_argument('--teacher', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--student', default='models/labubu_student.h5')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--student-size', type=int, default=128, help='Student input resolution')
+    parser.add_argument('--width-multiplier', type=float, default=0.35, help='MobileNetV2 alpha')
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--alpha', type=float, default=0.5,
+                        help='Weight of the hard-label loss; the soft-target loss gets (1 - alpha) * T^2')
+    parser.add_argument('--epochs', type=int, default=30)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=4, help='Fixed CPU thread count for the benchmark')
+    parser.add_argument('--runs', type=int, default=50)
+    trainer.add_split_arguments(parser)
+    args = parser.parse_args()
+
+    # Pin the thread pools so benchmark numbers are comparable between runs
+    tf.config.threading.set_intra_op_parallelism_threads(args.threads)
+    tf.config.threading.set_inter_op_parallelism_threads(1)
+
+    distiller = StudentDistiller(
+        teacher_path=args.teacher,
+        student_path=args.student,
+        data_dir=args.data_dir,
+        student_size=args.student_size,
+        width_multiplier=args.width_multiplier,
+        temperature=args.temperature,
+        alpha=args.alpha,
+        dedup=args.dedup,
+        filters=trainer.snapshot.parse_filters(args.filter),
+        split=args.split
+    )
+
+    if not distiller.teacher_path.exists():
+        print(f"❌ No teacher model found at '{distiller.teacher_path}'")
+        print("Please run scripts/train-labubu-classifier.py first.")
+        return
+
+    result = distiller.distill(epochs=args.epochs, batch_size=args.batch_size)
+    if result is None:
+        return
+    _, (X_img_val, X_feat_val, y_val) = result
+
+    results = benchmark(
+        {'teacher': distiller.teacher, 'student': distiller.student},
+        X_img_val, X_feat_val, y_val, batch_size=args.batch_size, runs=args.runs
+    )
+    results['config'] = {
+        'threads': args.threads,
+        'student_size': args.student_size,
+        'width_multiplier': args.width_multiplier,
+        'temperature': args.temperature,
+        'alpha': args.alpha
+    }
+
+    report_path = distiller.student_path.with_suffix('.benchmark.json')
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{report_path}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+quantized = load_script('quantized-predictor')
+
+
+class QuantizedModelExporter:
+    def __init__(self, model_path='models/labubu_classifier_final.h5',
+                 output_path='models/labubu_classifier_int8.tflite',
+                 data_dir='./training-data', calibration_samples=200, int8_io=False,
+                 dedup='none', filters=None, split='random'):
+        self.model_path = Path(model_path)
+        self.output_path = Path(output_path)
+        self.data_dir = data_dir
+        # Must match the trainer's flags so validation rows are ones the model never saw
+        self.dedup = dedup
+        self.filters = filters or {}
+        self.split = split
+        self.calibration_samples = calibration_samples
+        self.int8_io = int8_io
+        self.model = None
+
+    def load_data(self):
+        """Load the dataset and split it with the trainer's own split"""
+        classifier = trainer.LabubuClassifier(self.data_dir, dedup=self.dedup, filters=self.filters, split=self.split)
+        images, labels, features = classifier.load_dataset()
+
+        if len(images) == 0:
+            return None
+
+        idx_train, idx_val = classifier.split_indices(labels)
+        return (images[idx_train], images[idx_val], features[idx_train], features[idx_val],
+                labels[idx_train], labels[idx_val])
+
+    def representative_dataset(self, images, features):
+        """Yield single-sample calibration batches drawn from the training split
+
+        Samples are keyed by input name because the converter does not keep
+        the Keras input order.
+        """
+        rng = np.random.default_rng(42)
+        count = min(self.calibration_samples, len(images))
+        indices = rng.choice(len(images), size=count, replace=False)
+
+        def generator():
+            for i in indices:
+                yield {
+                    'image': images[i:i + 1].astype(np.float32),
+                    'features': features[i:i + 1].astype(np.float32)
+                }
+
+        return generator
+
+    def export(self, calibration_images, calibration_features):
+        """Convert the float Keras model to a post-training-quantized INT8 TFLite model"""
+        print("📦 Loading float model...")
+        self.model = keras.models.load_model(self.model_path, compile=False)
+
+        print(f"⚖️ Calibrating on {min(self.calibration_samples, len(calibration_images))} samples...")
+        converter = tf.lite.TFLiteConverter.from_keras_model(self.model)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = self.representative_dataset(
+            calibration_images, calibration_features
+        )
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+
+        if self.int8_io:
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+
+        tflite_model = converter.convert()
+
+        os.makedirs(self.output_path.parent, exist_ok=True)
+        self.output_path.write_bytes(tflite_model)
+
+        float_size = self.model_path.stat().st_size / 1e6
+        int8_size = len(tflite_model) / 1e6
+        print(f"💾 INT8 model saved to '{self.output_path}' ({int8_size:.1f} MB vs {float_size:.1f} MB float)")
+        return self.output_path
+
+
+def time_batches(predict_fn, images, features, batch_size, runs):
+    """Time predict_fn over repeated batches and return per-call latencies in ms"""
+    latencies = []
+    for run in range(runs):
+        start = (run * batch_size) % max(len(images) - batch_size + 1, 1)
+        batch_img = images[start:start + batch_size]
+        batch_feat = features[start:start + batch_size]
+
+        t0 = time.perf_counter()
+        predict_fn(batch_img, batch_feat)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return np.array(latencies)
+
+
+def benchmark(model, predictor, images, features, labels, batch_size=32, runs=50):
+    """Compare latency, throughput and accuracy of the float and INT8 models"""
+    print("⏱️ Benchmarking float Keras vs INT8 TFLite...")
+
+    def keras_predict(img, feat):
+        outputs = model([img, feat], training=False)
+        return np.asarray(outputs[0]).reshape(-1), np.asarray(outputs[1]).reshape(-1)
+
+    def int8_predict(img, feat):
+        return predictor.predict(img, feat)
+
+    batch_size = min(batch_size, len(images))
+    results = {}
+    for name, predict_fn in [('float_keras', keras_predict), ('int8_tflite', int8_predict)]:
+        # Warm up before timing
+        predict_fn(images[:1], features[:1])
+        predict_fn(images[:batch_size], features[:batch_size])
+
+        single = time_batches(predict_fn, images, features, 1, runs)
+        batched = time_batches(predict_fn, images, features, batch_size, max(runs // 5, 1))
+
+        authenticity, _ = predict_fn(images, features)
+        accuracy = float(np.mean((authenticity > 0.5).astype(int) == labels))
+
+        results[name] = {
+            'latency_p50_ms': float(np.percentile(single, 50)),
+            'latency_p99_ms': float(np.percentile(single, 99)),
+            'throughput_per_sec': float(batch_size / (np.median(batched) / 1000)),
+            'accuracy': accuracy,
+            'scores': authenticity
+        }
+
+    agreement = np.mean(
+        (results['float_keras']['scores'] > 0.5) == (results['int8_tflite']['scores'] > 0.5)
+    )
+    max_abs_diff = np.max(np.abs(results['float_keras']['scores'] - results['int8_tflite']['scores']))
+    for name in results:
+        del results[name]['scores']
+
+    results['comparison'] = {
+        'samples': int(len(images)),
+        'batch_size': int(batch_size),
+        'label_agreement': float(agreement),
+        'max_abs_score_diff': float(max_abs_diff),
+        'speedup_p50': results['float_keras']['latency_p50_ms'] / results['int8_tflite']['latency_p50_ms']
+    }
+
+    print(f"\n{'Model':<14}{'p50 ms':>10}{'p99 ms':>10}{'img/s':>10}{'accuracy':>10}")
+    for name in ['float_keras', 'int8_tflite']:
+        r = results[name]
+        print(f"{name:<14}{r['latency_p50_ms']:>10.2f}{r['latency_p99_ms']:>10.2f}"
+              f"{r['throughput_per_sec']:>10.1f}{r['accuracy']:>10.3f}")
+    print(f"\n🎯 Label agreement: {agreement:.3f} | Max score diff: {max_abs_diff:.3f}")
+
+    return results
+
+
+def main():
+    """Export the trained classifier to INT8 and benchmark it"""
+    parser = argparse.ArgumentParser(description='Export the Labubu classifier to INT8 TFLite')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--output', default='models/labubu_classifier_int8.tflite')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--calibration-samples', type=int, default=200)
+    parser.add_argument('--int8-io', action='store_true', help='Quantize model inputs and outputs too')
+    parser.add_argument('--num-threads', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--skip-benchmark', action='store_true')
+    trainer.add_split_arguments(parser)
+    args = parser.parse_args()
+
+    exporter = QuantizedModelExporter(
+        model_path=args.model,
+        output_path=args.output,
+        data_dir=args.data_dir,
+        calibration_samples=args.calibration_samples,
+        int8_io=args.int8_io,
+        dedup=args.dedup,
+        filters=trainer.snapshot.parse_filters(args.filter),
+        split=args.split
+    )
+
+    if not exporter.model_path.exists():
+        print(f"❌ No trained model found at '{exporter.model_path}'")
+        print("Please run scripts/train-labubu-classifier.py first.")
+        return
+
+    data = exporter.load_data()
+    if data is None:
+        print("❌ No training data found!")
+        return
+    X_img_train, X_img_val, X_feat_train, X_feat_val, y_train, y_val = data
+
+    exporter.export(X_img_train, X_feat_train)
+
+    if args.skip_benchmark:
+        return
+
+    predictor = quantized.QuantizedLabubuPredictor(exporter.output_path, num_threads=args.num_threads)
+    results = benchmark(
+        exporter.model, predictor, X_img_val, X_feat_val, y_val,
+        batch_size=args.batch_size, runs=args.runs
+    )
+
+    report_path = exporter.output_path.with_suffix('.benchmark.json')
+    with open(report_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{report_path}'")
+
+
+if __name__ == "__main__":
+    main()
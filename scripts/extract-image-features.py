@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from script_loader import load_script
+
+decoding = load_script('image-decoding')
+
+FEATURE_NAMES = ('paintQuality', 'sculptDetails', 'packagingAuth', 'materialTexture')
+ANALYSIS_SIZE = 256
+HUE_BINS = 36
+
+# (center, scale) of the logistic that maps each raw statistic onto 0-1.
+# Centers sit at typical values for clean product photos at ANALYSIS_SIZE.
+SCORE_CALIBRATION = {
+    'saturation': (0.35, 0.12),
+    'color_concentration': (0.55, 0.12),
+    'chroma_noise': (6.0, 2.0),
+    'edge_density': (0.08, 0.03),
+    'sharpness': (250.0, 120.0),
+    'strong_edges': (0.03, 0.015),
+    'contrast': (45.0, 15.0),
+    'texture': (6.0, 2.5),
+    'texture_regularity': (0.5, 0.15),
+}
+
+
+def logistic(values, name):
+    center, scale = SCORE_CALIBRATION[name]
+    return 1.0 / (1.0 + np.exp(-(np.asarray(values, np.float64) - center) / scale))
+
+
+def box_mean(x, k=7):
+    """Per-image k x k box filter over a (N, H, W) stack via 2-D cumulative sums"""
+    pad = k // 2
+    x = np.pad(x, ((0, 0), (pad + 1, pad), (pad + 1, pad)), mode='edge')
+    c = x.cumsum(axis=1).cumsum(axis=2)
+    s = c[:, k:, k:] - c[:, :-k, k:] - c[:, k:, :-k] + c[:, :-k, :-k]
+    return s / (k * k)
+
+
+def batch_statistics(images):
+    """Raw color, edge, texture and sharpness statistics for a (N, H, W, 3) uint8 BGR batch"""
+    n, height, width = images.shape[:3]
+    # Pointwise conversions run on the whole batch as one tall image
+    hsv = cv2.cvtColor(images.reshape(n * height, width, 3), cv2.COLOR_BGR2HSV).reshape(n, height, width, 3)
+    gray = cv2.cvtColor(images.reshape(n * height, width, 3), cv2.COLOR_BGR2GRAY).reshape(n, height, width)
+    gray = gray.astype(np.float32)
+    saturation = hsv[..., 1].astype(np.float32) / 255
+    chroma = saturation * hsv[..., 2]
+
+    # Color: saturation and how concentrated the hue histogram is on a few paint colors
+    hue_bin = hsv[..., 0].astype(np.int64) * HUE_BINS // 180
+    colored = saturation > 0.15
+    offsets = np.arange(n)[:, None, None] * HUE_BINS
+    hist = np.bincount((hue_bin + offsets)[colored], minlength=n * HUE_BINS).reshape(n, HUE_BINS)
+    hist = hist / np.maximum(hist.sum(axis=1, keepdims=True), 1)
+    color_concentration = np.sort(hist, axis=1)[:, -4:].sum(axis=1)
+
+    # Chroma noise: local deviation of color from its 7x7 neighborhood mean
+    chroma_noise = np.abs(chroma - box_mean(chroma)).mean(axis=(1, 2))
+
+    # Edges: central-difference gradients on the grayscale stack
+    gx = np.zeros_like(gray)
+    gy = np.zeros_like(gray)
+    gx[:, :, 1:-1] = (gray[:, :, 2:] - gray[:, :, :-2]) / 2
+    gy[:, 1:-1, :] = (gray[:, 2:, :] - gray[:, :-2, :]) / 2
+    magnitude = np.hypot(gx, gy)
+    edge_density = (magnitude > 20).mean(axis=(1, 2))
+    strong_edges = (magnitude > 60).mean(axis=(1, 2))
+
+    # Print sharpness: variance of the 4-neighbor Laplacian
+    laplacian = (gray[:, 1:-1, 2:] + gray[:, 1:-1, :-2] + gray[:, 2:, 1:-1] + gray[:, :-2, 1:-1]
+                 - 4 * gray[:, 1:-1, 1:-1])
+    sharpness = laplacian.var(axis=(1, 2))
+
+    # Texture: local standard deviation, and how uniform it is across the surface
+    local_var = np.maximum(box_mean(gray ** 2) - box_mean(gray) ** 2, 0)
+    local_std = np.sqrt(local_var)
+    texture = np.median(local_std, axis=(1, 2))
+    spread = local_std.std(axis=(1, 2)) / np.maximum(local_std.mean(axis=(1, 2)), 1e-6)
+    texture_regularity = 1.0 / (1.0 + spread)
+
+    return {
+        'saturation': saturation.mean(axis=(1, 2)),
+        'color_concentration': color_concentration,
+        'chroma_noise': chroma_noise,
+        'edge_density': edge_density,
+        'sharpness': sharpness,
+        'strong_edges': strong_edges,
+        'contrast': gray.std(axis=(1, 2)),
+        'texture': texture,
+        'texture_regularity': texture_regularity,
+    }
+
+
+def scores_from_statistics(stats):
+    """Combine raw statistics into the four 0-100 feature scores"""
+    paint = (0.35 * logistic(stats['saturation'], 'saturation')
+             + 0.35 * logistic(stats['color_concentration'], 'color_concentration')
+             + 0.30 * (1 - logistic(stats['chroma_noise'], 'chroma_noise')))
+    sculpt = (0.5 * logistic(stats['edge_density'], 'edge_density')
+              + 0.5 * logistic(stats['sharpness'], 'sharpness'))
+    packaging = (0.4 * logistic(stats['sharpness'], 'sharpness')
+                 + 0.3 * logistic(stats['strong_edges'], 'strong_edges')
+                 + 0.3 * logistic(stats['contrast'], 'contrast'))
+    texture = (0.5 * logistic(stats['texture'], 'texture')
+               + 0.5 * logistic(stats['texture_regularity'], 'texture_regularity'))
+    return np.round(np.stack([paint, sculpt, packaging, texture], axis=1) * 100, 1)
+
+
+def load_for_analysis(path, size=ANALYSIS_SIZE):
+    """Decode once (at the JPEG scale the header allows) and resize to size x size BGR"""
+    if not os.path.exists(path):
+        return None
+    img = decoding.read_image(path, reduced=True, size=size)
+    if img is None:
+        return None
+    return cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA)
+
+
+class ImageFeatureExtractor:
+    """paintQuality / sculptDetails / packagingAuth / materialTexture from pixels
+
+    Images are decoded and resized to a fixed size and stacked into chunks
+    that run on a thread pool; OpenCV decoding and the NumPy reductions
+    release the GIL. Each statistic is computed for `images_per_pass`
+    stacked images at a time: at 256 px one image already keeps the vector
+    units busy, and larger stacks push the float temporaries out of cache
+    (see --benchmark), so the default is a single image per pass.
+    """
+
+    def __init__(self, size=ANALYSIS_SIZE, workers=os.cpu_count(), chunk_size=32, images_per_pass=1):
+        self.size = size
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.images_per_pass = images_per_pass
+
+    def extract_batch(self, images):
+        """Scores for a (N, H, W, 3) uint8 BGR batch already at analysis size"""
+        images = np.asarray(images, np.uint8)
+        step = self.images_per_pass
+        return np.concatenate([scores_from_statistics(batch_statistics(images[i:i + step]))
+                               for i in range(0, len(images), step)])
+
+    def _extract_chunk(self, paths):
+        images = [load_for_analysis(path, self.size) for path in paths]
+        valid = [i for i, img in enumerate(images) if img is not None]
+        scores = np.full((len(paths), len(FEATURE_NAMES)), np.nan)
+        if valid:
+            scores[valid] = self.extract_batch(np.stack([images[i] for i in valid]))
+        return scores
+
+    def extract(self, paths):
+        """Scores for image files, NaN rows for files that could not be read"""
+        chunks = [paths[i:i + self.chunk_size] for i in range(0, len(paths), self.chunk_size)]
+        if not chunks:
+            return np.zeros((0, len(FEATURE_NAMES)))
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                results = list(pool.map(self._extract_chunk, chunks))
+        else:
+            results = [self._extract_chunk(chunk) for chunk in chunks]
+        return np.concatenate(results)
+
+    def extract_dict(self, paths):
+        """[{paintQuality, sculptDetails, packagingAuth, materialTexture} or None] per path"""
+        return [None if np.isnan(row).any() else dict(zip(FEATURE_NAMES, map(float, row)))
+                for row in self.extract(paths)]
+
+
+def synthetic_images(n, size, seed=42):
+    """Smooth colored shapes with noise, so every statistic has something to measure"""
+    rng = np.random.default_rng(seed)
+    images = np.empty((n, size, size, 3), np.uint8)
+    for i in range(n):
+        img = np.full((size, size, 3), rng.integers(150, 255, 3), np.uint8)
+        for _ in range(6):
+            center = tuple(int(v) for v in rng.integers(0, size, 2))
+            cv2.circle(img, center, int(rng.integers(10, size // 3)), tuple(int(v) for v in rng.integers(0, 255, 3)), -1)
+        noise = rng.normal(0, rng.uniform(1, 12), img.shape)
+        images[i] = np.clip(img + noise, 0, 255).astype(np.uint8)
+    return images
+
+
+def benchmark(extractor, n, passes=(1, 4, 16, 64)):
+    """Images per second for in-memory stacks of various sizes and for decode + extract"""
+    images = synthetic_images(n, extractor.size)
+    result = {'images': n, 'size': extractor.size, 'workers': extractor.workers, 'in_memory': {}}
+
+    for images_per_pass in passes:
+        stacked = ImageFeatureExtractor(extractor.size, images_per_pass=images_per_pass)
+        stacked.extract_batch(images[:images_per_pass])
+        start = time.perf_counter()
+        stacked.extract_batch(images)
+        rate = n / (time.perf_counter() - start)
+        result['in_memory'][images_per_pass] = rate
+        print(f"⚡ {images_per_pass:>3} images per pass: {rate:.0f} img/s")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for i, img in enumerate(images):
+            path = Path(tmp_dir) / f'{i}.jpg'
+            cv2.imwrite(str(path), cv2.resize(img, (800, 800)), [cv2.IMWRITE_JPEG_QUALITY, 90])
+            paths.append(path)
+        start = time.perf_counter()
+        extractor.extract(paths)
+        result['decode_and_extract_images_per_sec'] = n / (time.perf_counter() - start)
+
+    print(f"📷 800px JPEG decode + extract on {extractor.workers} workers: "
+          f"{result['decode_and_extract_images_per_sec']:.0f} img/s")
+    return result
+
+
+def main():
+    """Extract the four feature scores for training data or individual images"""
+    parser = argparse.ArgumentParser(description='Compute paintQuality, sculptDetails, packagingAuth '
+                                                 'and materialTexture from pixels')
+    parser.add_argument('images', nargs='*', help='Print scores for these image files as JSON')
+    parser.add_argument('--data-dir', default='./training-data', help='Score every image in metadata.json')
+    parser.add_argument('--output', default=None, help='Default: <data-dir>/extracted_features.json')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=32, help='Images handed to each worker at a time')
+    parser.add_argument('--images-per-pass', type=int, default=1, help='Images stacked per vectorized pass')
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N',
+                        help='Report throughput on N synthetic images instead')
+    args = parser.parse_args()
+
+    extractor = ImageFeatureExtractor(
+        workers=args.workers, chunk_size=args.chunk_size, images_per_pass=args.images_per_pass
+    )
+
+    if args.benchmark:
+        benchmark(extractor, args.benchmark)
+        return
+
+    if args.images:
+        json.dump(dict(zip(args.images, extractor.extract_dict(args.images))), sys.stdout, indent=2)
+        print()
+        return
+
+    data_dir = Path(args.data_dir)
+    if not (data_dir / 'metadata.json').exists():
+        print("❌ No metadata.json found!")
+        return
+    with open(data_dir / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+    paths = [data_dir / 'images' / item['authenticity'] / item['filename'] for item in metadata]
+
+    print(f"🎨 Extracting features for {len(paths)} images on {args.workers} workers...")
+    start = time.perf_counter()
+    features = extractor.extract_dict(paths)
+    elapsed = time.perf_counter() - start
+
+    extracted = {item['id']: scores for item, scores in zip(metadata, features) if scores is not None}
+    output = Path(args.output) if args.output else data_dir / 'extracted_features.json'
+    with open(output, 'w') as f:
+        json.dump(extracted, f, indent=2)
+
+    print(f"✅ Scored {len(extracted)}/{len(paths)} images in {elapsed:.2f}s "
+          f"({len(extracted) / max(elapsed, 1e-9):.1f} img/s)")
+    print(f"💾 Features saved to '{output}'")
+
+
+if __name__ == "__main__":
+    main()
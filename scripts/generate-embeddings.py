@@ -0,0 +1,232 @@
+import os
+import json
+import time
+import argparse
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from tensorflow import keras
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+EMBEDDING_DIM = 512
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.webp'}
+
+
+def l2_normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class EmbeddingGenerator:
+    """512-d image embeddings from the classifier's global-pooled backbone features
+
+    Pooled features are projected with a fixed random orthogonal matrix
+    stored next to the embeddings, so query images embedded later land in
+    the same space.
+    """
+
+    def __init__(self, model_path='models/labubu_classifier_final.h5', projection_path=None,
+                 dim=EMBEDDING_DIM, decode_workers=os.cpu_count()):
+        self.model_path = Path(model_path)
+        self.projection_path = Path(projection_path) if projection_path else None
+        self.dim = dim
+        self.decode_workers = decode_workers
+        self.encoder = None
+        self.projection = None
+
+    def build_encoder(self):
+        """Cut the trained model at the pooled features feeding its image_features layer"""
+        if self.model_path.exists():
+            print(f"📦 Loading backbone from '{self.model_path}'...")
+            model = keras.models.load_model(self.model_path, compile=False)
+            # Input of image_features is the (dropout-wrapped) global average pool
+            pooled = model.get_layer('image_features').input
+            self.encoder = keras.Model(model.inputs[0], pooled)
+        else:
+            print(f"⚠️ No trained model at '{self.model_path}', using the ImageNet EfficientNetB0 backbone")
+            backbone = keras.applications.EfficientNetB0(
+                weights='imagenet', include_top=False, pooling='avg',
+                input_shape=(trainer.IMAGE_SIZE, trainer.IMAGE_SIZE, 3)
+            )
+            self.encoder = backbone
+
+        feature_dim = self.encoder.output_shape[-1]
+        if self.projection_path and self.projection_path.exists():
+            self.projection = np.load(self.projection_path)
+            if self.projection.shape != (feature_dim, self.dim):
+                raise ValueError(
+                    f"Projection {self.projection.shape} does not match backbone features ({feature_dim}, {self.dim})"
+                )
+        else:
+            rng = np.random.default_rng(42)
+            q, _ = np.linalg.qr(rng.standard_normal((feature_dim, self.dim)))
+            self.projection = q.astype(np.float32)
+            if self.projection_path:
+                self.projection_path.parent.mkdir(parents=True, exist_ok=True)
+                np.save(self.projection_path, self.projection)
+        return self.encoder
+
+    def embed(self, images):
+        """Embed preprocessed images into L2-normalized float32 vectors"""
+        if self.encoder is None:
+            self.build_encoder()
+        pooled = np.asarray(self.encoder(np.asarray(images, np.float32), training=False))
+        return l2_normalize(pooled @ self.projection).astype(np.float32)
+
+    def _load(self, path):
+        img = trainer.read_image(path, reduced=True)
+        if img is None:
+            return None
+        return trainer.preprocess_image(img)
+
+    def generate(self, items, output_dir, batch_size=64):
+        """Embed (id, path) pairs into output_dir/embeddings.npy plus ids.txt
+
+        Decoding of the next batch runs on a thread pool while the current
+        batch is on the model.
+        """
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        if self.projection_path is None:
+            self.projection_path = output_dir / 'projection.npy'
+        if self.encoder is None:
+            self.build_encoder()
+
+        matrix = np.lib.format.open_memmap(
+            output_dir / 'embeddings.npy', mode='w+', dtype=np.float32, shape=(len(items), self.dim)
+        )
+        ids = []
+        decode_seconds = 0.0
+        model_seconds = 0.0
+        start = time.perf_counter()
+
+        batches = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+        with ThreadPoolExecutor(max_workers=self.decode_workers) as pool, \
+                ThreadPoolExecutor(max_workers=1) as prefetcher:
+            def decode_batch(batch):
+                return list(pool.map(self._load, [path for _, path in batch]))
+
+            pending = prefetcher.submit(decode_batch, batches[0]) if batches else None
+            for i, batch in enumerate(batches):
+                t0 = time.perf_counter()
+                decoded = pending.result()
+                decode_seconds += time.perf_counter() - t0
+                if i + 1 < len(batches):
+                    pending = prefetcher.submit(decode_batch, batches[i + 1])
+
+                valid = [(item_id, img) for (item_id, _), img in zip(batch, decoded) if img is not None]
+                if not valid:
+                    continue
+
+                t0 = time.perf_counter()
+                vectors = self.embed(np.stack([img for _, img in valid]))
+                model_seconds += time.perf_counter() - t0
+
+                matrix[len(ids):len(ids) + len(valid)] = vectors
+                ids.extend(item_id for item_id, _ in valid)
+                print(f"  {len(ids)}/{len(items)} embedded", end='\r')
+
+        elapsed = time.perf_counter() - start
+        matrix.flush()
+        del matrix
+
+        # Drop rows reserved for images that failed to decode
+        if len(ids) < len(items):
+            full = np.load(output_dir / 'embeddings.npy', mmap_mode='r')
+            np.save(output_dir / 'embeddings.tmp.npy', np.ascontiguousarray(full[:len(ids)]))
+            del full
+            os.replace(output_dir / 'embeddings.tmp.npy', output_dir / 'embeddings.npy')
+
+        with open(output_dir / 'ids.txt', 'w') as f:
+            f.write('\n'.join(ids) + ('\n' if ids else ''))
+
+        stats = {
+            'images': len(ids),
+            'failed': len(items) - len(ids),
+            'dim': self.dim,
+            'batch_size': batch_size,
+            'decode_workers': self.decode_workers,
+            'elapsed_seconds': elapsed,
+            'images_per_sec': len(ids) / elapsed if elapsed else 0.0,
+            'decode_wait_seconds': decode_seconds,
+            'model_seconds': model_seconds
+        }
+        with open(output_dir / 'stats.json', 'w') as f:
+            json.dump(stats, f, indent=2)
+
+        print(f"\n✅ Embedded {len(ids)} images at {stats['images_per_sec']:.1f} img/s "
+              f"(model {model_seconds:.1f}s, waiting on decode {decode_seconds:.1f}s)")
+        print(f"💾 Embeddings saved to '{output_dir / 'embeddings.npy'}' with ids in 'ids.txt'")
+        return stats
+
+
+def load_embeddings(output_dir, mmap=True):
+    """Open embeddings.npy (memory-mapped by default) and its id list"""
+    output_dir = Path(output_dir)
+    matrix = np.load(output_dir / 'embeddings.npy', mmap_mode='r' if mmap else None)
+    with open(output_dir / 'ids.txt', 'r') as f:
+        ids = [line.rstrip('\n') for line in f if line.strip()]
+    return matrix, ids
+
+
+def items_from_directory(images_dir):
+    """(id, path) pairs for every image under a directory, id = relative path"""
+    images_dir = Path(images_dir)
+    items = []
+    for root, _, files in os.walk(images_dir):
+        for name in sorted(files):
+            path = Path(root) / name
+            if path.suffix.lower() in IMAGE_EXTENSIONS:
+                items.append((str(path.relative_to(images_dir)), path))
+    return sorted(items)
+
+
+def items_from_metadata(data_dir):
+    """(record id, path) pairs for metadata records whose image exists"""
+    data_dir = Path(data_dir)
+    with open(data_dir / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+    images_dir = data_dir / 'images'
+    present, missing, _ = trainer.ImageIndex(images_dir).resolve(metadata)
+    if missing:
+        print(f"⚠️ {len(missing)} metadata records have no image")
+    return [(item['id'], images_dir / item['authenticity'] / item['filename']) for item in present]
+
+
+def main():
+    """Generate reference embeddings for a directory or a metadata file"""
+    parser = argparse.ArgumentParser(description='Batch-generate 512-d image embeddings')
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--images-dir', help='Embed every image under this directory')
+    source.add_argument('--data-dir', default='./training-data', help='Embed the images listed in metadata.json')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--output-dir', default='models/embeddings')
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--decode-workers', type=int, default=os.cpu_count())
+    trainer.add_threading_arguments(parser)
+    args = parser.parse_args()
+
+    trainer.configure_threading(
+        args.intra_op_threads, args.inter_op_threads,
+        profile='inference', config_file=args.threading_config
+    )
+
+    items = items_from_directory(args.images_dir) if args.images_dir else items_from_metadata(args.data_dir)
+    if not items:
+        print("❌ No images found!")
+        return
+    print(f"🖼️ Embedding {len(items)} images...")
+
+    generator = EmbeddingGenerator(
+        model_path=args.model,
+        projection_path=Path(args.output_dir) / 'projection.npy',
+        decode_workers=args.decode_workers
+    )
+    generator.generate(items, args.output_dir, batch_size=args.batch_size)
+
+
+if __name__ == "__main__":
+    main()
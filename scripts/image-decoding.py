@@ -0,0 +1,93 @@
+import os
+import argparse
+import cv2
+
+# OpenCV flags that ask libjpeg for DCT-domain scaled decoding
+REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+REDUCED_GRAYSCALE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+# JPEG start-of-frame markers that carry the image dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def read_jpeg_size(path):
+    """Return (width, height) from a JPEG header without decoding, or None"""
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            byte = f.read(1)
+            while byte and byte != b'\xff':
+                byte = f.read(1)
+            while byte == b'\xff':
+                byte = f.read(1)
+            if not byte:
+                return None
+
+            marker = byte[0]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+                continue
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = int.from_bytes(length_bytes, 'big')
+            if marker in JPEG_SOF_MARKERS:
+                header = f.read(5)
+                if len(header) < 5:
+                    return None
+                height = int.from_bytes(header[1:3], 'big')
+                width = int.from_bytes(header[3:5], 'big')
+                return width, height
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def choose_decode_scale(width, height, size):
+    """Pick the largest libjpeg reduction that keeps both sides at least `size` px"""
+    for scale in (8, 4, 2):
+        if -(-width // scale) >= size and -(-height // scale) >= size:
+            return scale
+    return 1
+
+
+def read_image(path, reduced=False, size=224, grayscale=False):
+    """Decode an image in one pass, optionally at 1/2, 1/4 or 1/8 scale for JPEGs
+
+    The scale comes from the JPEG header, so a reduced decode is never too
+    small and never has to be repeated at full size.
+    """
+    path = str(path)
+    if reduced:
+        dims = read_jpeg_size(path)
+        if dims is not None:
+            scale = choose_decode_scale(*dims, size=size)
+            if scale > 1:
+                flags = REDUCED_GRAYSCALE_FLAGS if grayscale else REDUCED_DECODE_FLAGS
+                return cv2.imread(path, flags[scale])
+    return cv2.imread(path, cv2.IMREAD_GRAYSCALE if grayscale else cv2.IMREAD_COLOR)
+
+
+def main():
+    """Print the header size and reduced decode scale of each image"""
+    parser = argparse.ArgumentParser(description='Show how each JPEG would be decoded for a target size')
+    parser.add_argument('paths', nargs='+')
+    parser.add_argument('--size', type=int, default=224, help='Smallest side the decode must keep')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        dims = read_jpeg_size(path)
+        if dims is None:
+            print(f"⚠️ {path}: not a JPEG, decoded at full size")
+            continue
+        print(f"🖼️ {path}: {dims[0]}x{dims[1]}, 1/{choose_decode_scale(*dims, size=args.size)} scale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+import json
+import time
+import base64
+import argparse
+import threading
+import queue
+import numpy as np
+import cv2
+from collections import Counter, deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+
+def decode_image(data):
+    """Decode a base64 (optionally data-URL) encoded image into model input"""
+    if ',' in data and data.startswith('data:'):
+        data = data.split(',', 1)[1]
+    buffer = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    img = cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("Could not decode image")
+    return trainer.preprocess_image(img)
+
+
+class InferenceMetrics:
+    """Thread-safe counters for queue depth, batch sizes and request latency"""
+
+    def __init__(self, window=10000):
+        self.lock = threading.Lock()
+        self.batch_sizes = Counter()
+        self.latencies_ms = deque(maxlen=window)
+        self.requests = 0
+        self.batches = 0
+
+    def record_batch(self, size, latencies_ms):
+        with self.lock:
+            self.batch_sizes[size] += 1
+            self.batches += 1
+            self.requests += size
+            self.latencies_ms.extend(latencies_ms)
+
+    def snapshot(self, queue_depth):
+        with self.lock:
+            latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+            return {
+                'queue_depth': queue_depth,
+                'requests': self.requests,
+                'batches': self.batches,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'batch_size_histogram': {str(k): v for k, v in sorted(self.batch_sizes.items())},
+                'latency_p50_ms': float(np.percentile(latencies, 50)),
+                'latency_p99_ms': float(np.percentile(latencies, 99))
+            }
+
+
+class MicroBatchingInferenceService:
+    """Queue single requests and score them in batches with one forward pass"""
+
+    def __init__(self, model_path='models/labubu_classifier_final.h5',
+                 max_batch_size=32, max_latency_ms=5.0, model=None, traced=False, tta_views=1,
+                 cache_size=0, cache_ttl=24 * 3600, cache_file=None):
+        self.model_path = Path(model_path)
+        self.max_batch_size = max_batch_size
+        self.max_latency_ms = max_latency_ms
+        self.model = model
+        # Serve through fixed-signature bucketed functions instead of eager calls
+        self.traced = traced
+        self.runner = None
+        # Re-score borderline ("suspicious") items over K augmented views
+        self.tta_views = tta_views
+        self.tta = None
+        # Verdicts for repeated images, keyed by decoded pixels and model version
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.cache_file = cache_file
+        self.cache = None
+        self.queue = queue.Queue()
+        self.metrics = InferenceMetrics()
+        self.worker = None
+        self.running = False
+
+    def start(self):
+        """Load the model, warm it up and start the batching worker"""
+        if self.model is None:
+            from tensorflow import keras
+            print(f"📦 Loading model from '{self.model_path}'...")
+            self.model = keras.models.load_model(self.model_path, compile=False)
+
+        if self.traced:
+            traced_inference = load_script('traced-inference')
+            buckets = [b for b in traced_inference.DEFAULT_BUCKETS if b < self.max_batch_size]
+            self.runner = traced_inference.TracedLabubuModel(self.model, buckets=buckets + [self.max_batch_size])
+        
+        if self.tta_views > 1:
+            tta_inference = load_script('tta-inference')
+            self.tta = tta_inference.TTAPredictor(self._model_forward, k=self.tta_views)
+        
+        if self.cache_size > 0:
+            verdict_cache = load_script('verdict-cache')
+            self.cache = verdict_cache.VerdictCache(
+                max_entries=self.cache_size,
+                ttl_seconds=self.cache_ttl,
+                persist_path=self.cache_file,
+                version=verdict_cache.model_version(self.model_path, f'-tta{self.tta_views}')
+            )
+        
+        # Warm up so the first real request does not pay for graph building
+        self._forward(
+            np.zeros((1, trainer.IMAGE_SIZE, trainer.IMAGE_SIZE, 3), dtype=np.float32),
+            np.zeros((1, 7), dtype=np.float32)
+        )
+
+        self.running = True
+        self.worker = threading.Thread(target=self._run, name='inference-batcher', daemon=True)
+        self.worker.start()
+        print(f"✅ Batching worker started (max batch {self.max_batch_size}, "
+              f"budget {self.max_latency_ms} ms)")
+
+    def stop(self):
+        """Stop the worker after the queued requests are drained"""
+        self.running = False
+        self.queue.put(None)
+        if self.worker is not None:
+            self.worker.join()
+        if self.cache is not None:
+            self.cache.save()
+
+    def submit(self, image, features):
+        """Queue one preprocessed image and feature vector, returning a Future"""
+        future = Future()
+        self.queue.put((
+            np.asarray(image, dtype=np.float32),
+            np.asarray(features, dtype=np.float32),
+            future,
+            time.perf_counter()
+        ))
+        return future
+
+    def predict(self, image, features, timeout=None):
+        """Blocking helper that submits one request and waits for its result"""
+        if self.cache is None:
+            return self.submit(image, features).result(timeout=timeout)
+
+        key = self.cache.key(image, features)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return {**cached, 'cached': True}
+        result = self.submit(image, features).result(timeout=timeout)
+        self.cache.put(key, result)
+        return {**result, 'cached': False}
+
+    def _forward(self, images, features):
+        """Score a batch, adding test-time augmentation for borderline items when enabled"""
+        if self.tta is not None:
+            authenticity, confidence, _ = self.tta.predict_borderline(images, features)
+            return authenticity, confidence
+        return self._model_forward(images, features)
+
+    def _model_forward(self, images, features):
+        """Run one forward pass; calling the model directly avoids retracing per batch size"""
+        if self.runner is not None:
+            return self.runner.predict(images, features)
+        authenticity, confidence = self.model([images, features], training=False)
+        return np.asarray(authenticity), np.asarray(confidence)
+
+    def _collect_batch(self):
+        """Block for the first request, then gather more until the budget or size limit"""
+        first = self.queue.get()
+        if first is None:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.max_latency_ms / 1000
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self.running = False
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while self.running or not self.queue.empty():
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            images = np.stack([item[0] for item in batch])
+            features = np.stack([item[1] for item in batch])
+            try:
+                authenticity, confidence = self._forward(images, features)
+            except Exception as e:
+                for item in batch:
+                    item[2].set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            latencies = []
+            for i, (_, _, future, queued_at) in enumerate(batch):
+                score = float(np.ravel(authenticity[i])[0])
+                future.set_result({
+                    'prediction': 'authentic' if score > 0.5 else 'fake',
+                    'authenticity': score,
+                    'confidence': float(np.ravel(confidence[i])[0]),
+                    'batch_size': len(batch)
+                })
+                latencies.append((done - queued_at) * 1000)
+            self.metrics.record_batch(len(batch), latencies)
+
+    def get_metrics(self):
+        metrics = self.metrics.snapshot(self.queue.qsize())
+        if self.cache is not None:
+            metrics['cache'] = self.cache.snapshot()
+        return metrics
+
+
+def make_handler(service):
+    """Build an HTTP handler bound to a running service"""
+
+    class InferenceHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send_json(200, service.get_metrics())
+            elif self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            else:
+                self._send_json(404, {'error': 'Not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'Not found'})
+                return
+
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                body = json.loads(self.rfile.read(length))
+                image = decode_image(body['image'])
+                features = trainer.build_feature_vector(body)
+            except (KeyError, ValueError, TypeError) as e:
+                self._send_json(400, {'error': 'Invalid request', 'message': str(e)})
+                return
+
+            try:
+                self._send_json(200, service.predict(image, features, timeout=30))
+            except Exception as e:
+                self._send_json(500, {'error': 'Inference failed', 'message': str(e)})
+
+        def log_message(self, format, *args):
+            pass
+
+    return InferenceHandler
+
+
+def create_server(service, host='127.0.0.1', port=8501):
+    return ThreadingHTTPServer((host, port), make_handler(service))
+
+
+def main():
+    """Run the micro-batching inference service"""
+    parser = argparse.ArgumentParser(description='Micro-batching Labubu CNN inference service')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8501)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-latency-ms', type=float, default=5.0)
+    parser.add_argument('--traced', action='store_true',
+                        help='Serve through warmed-up fixed-signature functions padded to batch buckets')
+    parser.add_argument('--tta-views', type=int, default=1,
+                        help='Augmented views used to re-score borderline items (1 disables TTA)')
+    parser.add_argument('--cache-size', type=int, default=0,
+                        help='Cache verdicts for up to N distinct images (0 disables the cache)')
+    parser.add_argument('--cache-ttl', type=float, default=24 * 3600, help='Seconds a cached verdict stays valid')
+    parser.add_argument('--cache-file', default=None, help='Persist the verdict cache here across restarts')
+    trainer.add_threading_arguments(parser)
+    args = parser.parse_args()
+
+    trainer.configure_threading(
+        args.intra_op_threads, args.inter_op_threads,
+        profile='inference', config_file=args.threading_config
+    )
+
+    service = MicroBatchingInferenceService(
+        model_path=args.model,
+        max_batch_size=args.max_batch_size,
+        max_latency_ms=args.max_latency_ms,
+        traced=args.traced,
+        tta_views=args.tta_views,
+        cache_size=args.cache_size,
+        cache_ttl=args.cache_ttl,
+        cache_file=args.cache_file
+    )
+
+    if not service.model_path.exists():
+        print(f"❌ No trained model found at '{service.model_path}'")
+        return
+
+    service.start()
+    server = create_server(service, args.host, args.port)
+    print(f"🚀 Serving on http://{args.host}:{args.port} (POST /predict, GET /metrics)")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+    finally:
+        server.server_close()
+        service.stop()
+
+
+if __name__ == "__main__":
+    main()
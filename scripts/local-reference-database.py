@@ -0,0 +1,431 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import argparse
+import tempfile
+import threading
+import numpy as np
+from datetime import datetime, timezone
+from pathlib import Path
+
+from script_loader import load_script
+
+vector_search = load_script('vector-search')
+
+EMBEDDING_DIM = 512
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reference_images (
+    id TEXT PRIMARY KEY,
+    series TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    angle TEXT,
+    image_url TEXT,
+    authenticity TEXT NOT NULL DEFAULT 'authentic',
+    paint_quality REAL,
+    sculpt_details REAL,
+    packaging_auth REAL,
+    material_texture REAL,
+    verified INTEGER NOT NULL DEFAULT 0,
+    verified_by TEXT,
+    created_at TEXT NOT NULL,
+    embedding_row INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_reference_images_lookup ON reference_images (verified, series, variant);
+CREATE TABLE IF NOT EXISTS series_info (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    release_date TEXT,
+    total_variants INTEGER,
+    common_features TEXT,
+    known_counterfeits TEXT
+);
+CREATE TABLE IF NOT EXISTS db_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+IMAGE_COLUMNS = ('id', 'series', 'variant', 'angle', 'image_url', 'authenticity', 'paint_quality',
+                 'sculpt_details', 'packaging_auth', 'material_texture', 'verified', 'verified_by',
+                 'created_at', 'embedding_row')
+
+
+def now_iso():
+    return datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class LocalReferenceDatabase:
+    """Offline stand-in for lib/reference-database.ts over SQLite in WAL mode
+
+    Method names and returned dicts follow the TypeScript ReferenceDatabase
+    (camelCase keys). Embeddings live in a sidecar float32 matrix next to the
+    database file; each row records its position there, and
+    find_similar_images runs the exact blocked search from vector-search.py
+    over a memory map of it.
+    """
+
+    def __init__(self, db_path='models/reference.db', embedding_dim=EMBEDDING_DIM):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.embeddings_path = self.db_path.with_suffix('.embeddings.f32')
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.executescript(SCHEMA)
+
+        stored_dim = self.conn.execute("SELECT value FROM db_meta WHERE key = 'embedding_dim'").fetchone()
+        if stored_dim is None:
+            with self.conn:
+                self.conn.execute("INSERT INTO db_meta VALUES ('embedding_dim', ?)", (str(embedding_dim),))
+            self.embedding_dim = embedding_dim
+        else:
+            self.embedding_dim = int(stored_dim['value'])
+        self._index = None
+
+    def close(self):
+        self.conn.close()
+
+    # Reference images
+
+    def _row_values(self, image, image_id, embedding_row):
+        features = image.get('features', {})
+        return (
+            image_id,
+            image['series'],
+            image['variant'],
+            image.get('angle'),
+            image.get('imageUrl'),
+            image.get('authenticity', 'authentic'),
+            features.get('paintQuality'),
+            features.get('sculptDetails'),
+            features.get('packagingAuth'),
+            features.get('materialTexture'),
+            1 if image.get('verified') else 0,
+            image.get('verifiedBy'),
+            image.get('createdAt') or now_iso(),
+            embedding_row
+        )
+
+    def _write_embeddings(self, embeddings, existing_rows):
+        """Store embeddings in the sidecar matrix and return the matrix row of each
+
+        Entries of `existing_rows` that are not None are overwritten in
+        place; the rest are appended after the current last row.
+        """
+        embeddings = vector_search.l2_normalize(embeddings)
+        if embeddings.shape[1] != self.embedding_dim:
+            raise ValueError(f"Expected {self.embedding_dim}-d embeddings, got {embeddings.shape[1]}")
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        row_bytes = 4 * self.embedding_dim
+        next_row = self.embeddings_path.stat().st_size // row_bytes if self.embeddings_path.exists() else 0
+
+        rows = []
+        with open(self.embeddings_path, 'r+b' if self.embeddings_path.exists() else 'wb') as f:
+            for embedding, row in zip(embeddings, existing_rows):
+                if row is None:
+                    row, next_row = next_row, next_row + 1
+                f.seek(row * row_bytes)
+                f.write(embedding.tobytes())
+                rows.append(row)
+        return rows
+
+    def _existing_embedding_rows(self, ids, chunk=500):
+        """Sidecar row (or None) for each id already in the table"""
+        found = {}
+        for start in range(0, len(ids), chunk):
+            part = ids[start:start + chunk]
+            found.update((row['id'], row['embedding_row']) for row in self.conn.execute(
+                f"SELECT id, embedding_row FROM reference_images WHERE id IN ({', '.join('?' * len(part))})", part))
+        return found
+
+    def add_reference_image(self, image):
+        """Insert one image (with optional 'embedding') and return its id"""
+        return self.batch_add_reference_images([image])[0]
+
+    def batch_add_reference_images(self, images, batch_size=10000):
+        """Insert or update images in executemany transactions of `batch_size` rows, returning their ids
+
+        Loading the same ids again updates those rows, and a new embedding
+        overwrites the old one's matrix row, so re-running an import leaves
+        the table and the matrix the same size. Embeddings are written
+        before the rows that point at them are committed, so a crash can
+        leave unused matrix rows but never a row pointing past the end of
+        the matrix.
+        """
+        ids = []
+        updates = ', '.join(f"{column} = excluded.{column}" for column in IMAGE_COLUMNS[1:-1])
+        with self.lock:
+            for start in range(0, len(images), batch_size):
+                batch = images[start:start + batch_size]
+                batch_ids = [image.get('id') or uuid.uuid4().hex for image in batch]
+                with_embedding = [i for i, image in enumerate(batch) if image.get('embedding') is not None]
+                rows = [None] * len(batch)
+                if with_embedding:
+                    existing = self._existing_embedding_rows([batch_ids[i] for i in with_embedding])
+                    written = self._write_embeddings(
+                        np.asarray([batch[i]['embedding'] for i in with_embedding], dtype=np.float32),
+                        [existing.get(batch_ids[i]) for i in with_embedding])
+                    for i, row in zip(with_embedding, written):
+                        rows[i] = row
+
+                values = [self._row_values(image, image_id, row)
+                          for image, image_id, row in zip(batch, batch_ids, rows)]
+                with self.conn:
+                    self.conn.executemany(
+                        f"INSERT INTO reference_images ({', '.join(IMAGE_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * len(IMAGE_COLUMNS))}) "
+                        f"ON CONFLICT(id) DO UPDATE SET {updates}, "
+                        f"embedding_row = COALESCE(excluded.embedding_row, reference_images.embedding_row)", values
+                    )
+                ids.extend(batch_ids)
+            self._index = None
+        return ids
+
+    def _to_image(self, row):
+        return {
+            'id': row['id'],
+            'series': row['series'],
+            'variant': row['variant'],
+            'angle': row['angle'],
+            'imageUrl': row['image_url'],
+            'authenticity': row['authenticity'],
+            'features': {
+                'paintQuality': row['paint_quality'],
+                'sculptDetails': row['sculpt_details'],
+                'packagingAuth': row['packaging_auth'],
+                'materialTexture': row['material_texture']
+            },
+            'verified': bool(row['verified']),
+            'verifiedBy': row['verified_by'],
+            'createdAt': row['created_at']
+        }
+
+    def get_reference_images(self, series=None, variant=None):
+        """Verified images, optionally filtered by series and variant"""
+        query = "SELECT * FROM reference_images WHERE verified = 1"
+        params = []
+        if series:
+            query += " AND series = ?"
+            params.append(series)
+        if variant:
+            query += " AND variant = ?"
+            params.append(variant)
+        return [self._to_image(row) for row in self.conn.execute(query, params)]
+
+    # Similarity search
+
+    def _load_index(self):
+        """Memory-map the sidecar matrix and line up ids with its rows"""
+        rows = self.conn.execute(
+            "SELECT id, embedding_row FROM reference_images WHERE embedding_row IS NOT NULL ORDER BY embedding_row"
+        ).fetchall()
+        if not rows:
+            return None
+        total_rows = self.embeddings_path.stat().st_size // (4 * self.embedding_dim)
+        matrix = np.memmap(self.embeddings_path, dtype=np.float32, mode='r',
+                           shape=(total_rows, self.embedding_dim))
+        positions = np.array([row['embedding_row'] for row in rows], dtype=np.int64)
+        if len(positions) != total_rows or not np.array_equal(positions, np.arange(total_rows)):
+            # Unreferenced rows left by an interrupted load: search a compacted copy
+            matrix = np.ascontiguousarray(matrix[positions])
+        return vector_search.ExactVectorIndex(matrix, [row['id'] for row in rows])
+
+    def find_similar_images(self, embedding, threshold=0.8, match_count=10):
+        """Same semantics as the find_similar_images RPC: top matches above threshold"""
+        with self.lock:
+            if self._index is None:
+                self._index = self._load_index()
+            index = self._index
+        if index is None:
+            return []
+
+        matches = index.search(np.asarray(embedding, dtype=np.float32)[None], threshold, match_count)[0]
+        if not matches:
+            return []
+        placeholders = ', '.join('?' * len(matches))
+        rows = {row['id']: row for row in self.conn.execute(
+            f"SELECT * FROM reference_images WHERE id IN ({placeholders})", [m['id'] for m in matches])}
+        return [{**self._to_image(rows[m['id']]), 'similarity': m['similarity']} for m in matches]
+
+    # Series info and markers
+
+    def add_series_info(self, series):
+        series_id = series.get('id') or uuid.uuid4().hex
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO series_info VALUES (?, ?, ?, ?, ?, ?)",
+                (series_id, series['name'], series.get('releaseDate'), series.get('totalVariants'),
+                 json.dumps(series.get('commonFeatures', {})), json.dumps(series.get('knownCounterfeits', {})))
+            )
+        return series_id
+
+    def get_series_info(self, series_name):
+        row = self.conn.execute("SELECT * FROM series_info WHERE name = ?", (series_name,)).fetchone()
+        if row is None:
+            return None
+        return {
+            'id': row['id'],
+            'name': row['name'],
+            'releaseDate': row['release_date'],
+            'totalVariants': row['total_variants'],
+            'commonFeatures': json.loads(row['common_features']),
+            'knownCounterfeits': json.loads(row['known_counterfeits'])
+        }
+
+    def get_authenticity_markers(self, series):
+        info = self.get_series_info(series)
+        if info is None:
+            return {'authentic': [], 'counterfeit': []}
+        common = info['commonFeatures']
+        return {
+            'authentic': [
+                f"Correct {common.get('earShape')} ear shape",
+                f"Proper {common.get('eyeStyle')} eye style",
+                f"Authentic {common.get('bodyTexture')} texture",
+                *[f"Includes {accessory}" for accessory in common.get('accessories', [])]
+            ],
+            'counterfeit': info['knownCounterfeits'].get('commonIssues', [])
+        }
+
+    # Stats
+
+    def get_training_stats(self):
+        """Counts computed with GROUP BY, the shape get_training_stats returns"""
+        def grouped(column):
+            return {row[0]: row[1] for row in self.conn.execute(
+                f"SELECT {column}, COUNT(*) FROM reference_images GROUP BY {column}")}
+
+        total = self.conn.execute("SELECT COUNT(*) FROM reference_images").fetchone()[0]
+        return {
+            'totalImages': total,
+            'byAuthenticity': grouped('authenticity'),
+            'bySeries': grouped('series'),
+            'byAngle': grouped('angle')
+        }
+
+
+def images_from_metadata(data_dir, embeddings_dir=None):
+    """Reference image dicts for metadata.json records, with embeddings when available"""
+    data_dir = Path(data_dir)
+    with open(data_dir / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+
+    embeddings = {}
+    if embeddings_dir and (Path(embeddings_dir) / 'embeddings.npy').exists():
+        index = vector_search.ExactVectorIndex.load(embeddings_dir, mmap=False)
+        embeddings = {item_id: index.embeddings[i] for i, item_id in enumerate(index.ids)}
+
+    return [{
+        'id': item['id'],
+        'series': item['series'],
+        'variant': item['variant'],
+        'angle': item['metadata'].get('angle'),
+        'imageUrl': f"images/{item['authenticity']}/{item['filename']}",
+        'authenticity': item['authenticity'],
+        'features': item['features'],
+        'verified': item.get('status') == 'approved',
+        'verifiedBy': item.get('source'),
+        'createdAt': item.get('uploadedAt'),
+        'embedding': embeddings.get(item['id'])
+    } for item in metadata]
+
+
+def synthetic_images(n, start=0, embedding_dim=0, seed=42):
+    rng = np.random.default_rng(seed + start)
+    series = [f"Series {i}" for i in range(1, 7)]
+    angles = ['front', 'back', 'side', 'detail', 'packaging']
+    scores = rng.integers(30, 100, (n, 4))
+    embeddings = rng.standard_normal((n, embedding_dim), dtype=np.float32) if embedding_dim else None
+    return [{
+        'id': f'ref_{start + i}',
+        'series': series[i % len(series)],
+        'variant': f'Variant {i % 40}',
+        'angle': angles[i % len(angles)],
+        'imageUrl': f'images/authentic/ref_{start + i}.jpg',
+        'authenticity': 'authentic' if i % 3 else 'fake',
+        'features': dict(zip(('paintQuality', 'sculptDetails', 'packagingAuth', 'materialTexture'),
+                             map(int, scores[i]))),
+        'verified': True,
+        'verifiedBy': 'benchmark',
+        'embedding': embeddings[i] if embeddings is not None else None
+    } for i in range(n)]
+
+
+def benchmark(rows, batch_size, embedding_dim, chunk=100_000):
+    """Rows/s for bulk executemany loading, against 100-row batches like the TS client"""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, size, n in (('batches_of_100', 100, min(rows, 100_000)), ('bulk', batch_size, rows)):
+            db = LocalReferenceDatabase(Path(tmp_dir) / f'{name}.db', embedding_dim=embedding_dim or EMBEDDING_DIM)
+            generate_seconds = 0.0
+            start = time.perf_counter()
+            for offset in range(0, n, chunk):
+                t0 = time.perf_counter()
+                images = synthetic_images(min(chunk, n - offset), offset, embedding_dim)
+                generate_seconds += time.perf_counter() - t0
+                db.batch_add_reference_images(images, batch_size=size)
+            elapsed = time.perf_counter() - start - generate_seconds
+            results[name] = {'rows': n, 'batch_size': size, 'seconds': elapsed, 'rows_per_sec': n / elapsed}
+            print(f"📥 {name:<15} {n:>10,} rows in {elapsed:6.1f}s ({n / elapsed:,.0f} rows/s)")
+
+            if name == 'bulk':
+                start = time.perf_counter()
+                stats = db.get_training_stats()
+                results['training_stats_ms'] = (time.perf_counter() - start) * 1000
+                print(f"📊 get_training_stats over {stats['totalImages']:,} rows: {results['training_stats_ms']:.0f} ms")
+                if embedding_dim:
+                    query = synthetic_images(1, rows + 1, embedding_dim)[0]['embedding']
+                    db.find_similar_images(query, threshold=-1.0)
+                    start = time.perf_counter()
+                    db.find_similar_images(query, threshold=-1.0)
+                    results['find_similar_ms'] = (time.perf_counter() - start) * 1000
+                    print(f"🔍 find_similar_images: {results['find_similar_ms']:.0f} ms")
+            db.close()
+
+    results['speedup'] = results['bulk']['rows_per_sec'] / results['batches_of_100']['rows_per_sec']
+    print(f"⚡ Bulk loading is {results['speedup']:.1f}x faster than 100-row transactions")
+    return results
+
+
+def main():
+    """Import training metadata into a local reference database, or benchmark bulk loading"""
+    parser = argparse.ArgumentParser(description='SQLite stand-in for the Supabase reference database')
+    parser.add_argument('--db', default='models/reference.db')
+    parser.add_argument('--import-data-dir', default=None, help='Load metadata.json records as reference images')
+    parser.add_argument('--embeddings-dir', default='models/embeddings')
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N', help='Bulk-load N synthetic rows')
+    parser.add_argument('--batch-size', type=int, default=10000)
+    parser.add_argument('--embedding-dim', type=int, default=0,
+                        help='Also write synthetic embeddings of this size in the benchmark')
+    parser.add_argument('--output', default='models/reference_db_benchmark.json')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        results = benchmark(args.benchmark, args.batch_size, args.embedding_dim)
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📊 Benchmark saved to '{args.output}'")
+        return
+
+    if not args.import_data_dir:
+        parser.print_help()
+        return
+
+    images = images_from_metadata(args.import_data_dir, args.embeddings_dir)
+    db = LocalReferenceDatabase(args.db)
+    start = time.perf_counter()
+    db.batch_add_reference_images(images, batch_size=args.batch_size)
+    print(f"✅ Imported {len(images)} reference images into '{args.db}' in {time.perf_counter() - start:.2f}s")
+    print(f"📊 {json.dumps(db.get_training_stats())}")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,453 @@
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+from pathlib import Path
+
+from script_loader import load_script
+
+DEFAULT_WORKER_COUNTS = [1, 2, 4, 8]
+CHECKPOINT_DIR = 'models/checkpoints/multi_worker'
+
+
+def free_ports(count):
+    """Ask the OS for `count` currently unused localhost ports"""
+    sockets = []
+    try:
+        for _ in range(count):
+            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            s.bind(('localhost', 0))
+            sockets.append(s)
+        return [s.getsockname()[1] for s in sockets]
+    finally:
+        for s in sockets:
+            s.close()
+
+
+def launch(workers, worker_args, results_dir, threads_per_worker=None, log_dir=None):
+    """Start `workers` local processes joined into one MultiWorkerMirroredStrategy cluster
+
+    Every process gets the same TF_CONFIG cluster (one localhost port each)
+    and its own task index. Worker 0 is the chief. Returns the per-worker
+    result dicts, or raises if any worker fails.
+    """
+    threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+    cluster = {'worker': [f'localhost:{port}' for port in free_ports(workers)]}
+    results_dir = Path(results_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    log_dir = Path(log_dir or results_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    processes, logs = [], []
+    for index in range(workers):
+        env = dict(os.environ)
+        env['TF_CONFIG'] = json.dumps({'cluster': cluster, 'task': {'type': 'worker', 'index': index}})
+        env['TF_CPP_MIN_LOG_LEVEL'] = env.get('TF_CPP_MIN_LOG_LEVEL', '2')
+        log = open(log_dir / f'worker_{index}.log', 'w')
+        logs.append(log)
+        processes.append(subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), '--worker',
+             '--results-dir', str(results_dir), '--threads-per-worker', str(threads_per_worker), *worker_args],
+            env=env,
+            stdout=log if index else None,
+            stderr=subprocess.STDOUT if index else None
+        ))
+
+    try:
+        # Poll every worker: a dead peer leaves the others blocked in collectives,
+        # so waiting on them in order could hang before the failure is noticed
+        while True:
+            codes = [p.poll() for p in processes]
+            if any(codes) or all(code is not None for code in codes):
+                break
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        for p in processes:
+            p.terminate()
+        raise
+    finally:
+        if any(p.poll() is None for p in processes):
+            for p in processes:
+                if p.poll() is None:
+                    p.kill()
+            for p in processes:
+                p.wait()
+        for log in logs:
+            log.close()
+
+    codes = [p.returncode for p in processes]
+    if any(codes):
+        raise RuntimeError(f"Worker exit codes {codes}, see logs in '{log_dir}'")
+
+    results = []
+    for index in range(workers):
+        with open(results_dir / f'worker_{index}.json', 'r') as f:
+            results.append(json.load(f))
+    return results
+
+
+class MultiWorkerTrainer:
+    """Data-parallel training of the Labubu CNN inside one worker process
+
+    Every worker reads the same records and computes the same split, then
+    decodes only its own fixed, strided shard of the training and
+    validation rows, reshuffled within the shard each epoch. Gradients are
+    all-reduced by the strategy (ring all-reduce over localhost). A custom
+    step is used because Keras 3's fit() does not accept the distributed
+    inputs of MultiWorkerMirroredStrategy. Validation metrics are summed
+    across workers, so every worker sees the same history. Only the chief
+    writes checkpoints and the final model, and every worker restores from
+    the same checkpoint when resuming.
+    """
+
+    def __init__(self, data_dir='./training-data', batch_size=16, image_size=None, filters=None,
+                 checkpoint_dir=CHECKPOINT_DIR, checkpoint_interval=1, learning_rate=0.001, seed=42):
+        import tensorflow as tf
+        self.tf = tf
+        self.trainer = load_script('train-labubu-classifier')
+        self.data_dir = data_dir
+        self.batch_size = batch_size
+        self.image_size = image_size or self.trainer.IMAGE_SIZE
+        self.filters = filters
+        self.checkpoint_dir = Path(checkpoint_dir)
+        self.checkpoint_interval = checkpoint_interval
+        self.learning_rate = learning_rate
+        self.seed = seed
+
+        tf_config = json.loads(os.environ.get('TF_CONFIG', '{}'))
+        self.index = tf_config.get('task', {}).get('index', 0)
+        self.workers = len(tf_config.get('cluster', {}).get('worker', [])) or 1
+        self.is_chief = self.index == 0
+
+        self.strategy = tf.distribute.MultiWorkerMirroredStrategy(
+            communication_options=tf.distribute.experimental.CommunicationOptions(
+                implementation=tf.distribute.experimental.CommunicationImplementation.RING
+            )
+        )
+        self.global_batch_size = batch_size * self.strategy.num_replicas_in_sync
+        self.model = None
+        self.optimizer = None
+
+    def load_data(self, dedup='none', split='random'):
+        """Split the records like the trainer does, then decode only this worker's shard"""
+        classifier = self.trainer.LabubuClassifier(self.data_dir, dedup=dedup, filters=self.filters, split=split)
+        records = classifier.load_records()
+        classifier.records = records
+        labels = np.array([1 if item['authenticity'] == 'authentic' else 0 for item in records])
+        idx_train, idx_val = classifier.split_indices(labels)
+
+        train_rows = idx_train[self.index::self.workers]
+        val_rows = idx_val[self.index::self.workers]
+        # Equal step counts on every worker, or the all-reduce would hang
+        self.steps_per_epoch = len(idx_train) // self.workers // self.batch_size
+
+        images, features = self._decode(records, train_rows)
+        confidence = np.abs(labels - 0.5) * 2
+        self.train_data = (images, features, labels[train_rows].astype(np.float32),
+                           confidence[train_rows].astype(np.float32))
+        images, features = self._decode(records, val_rows)
+        self.val_data = (images, features, labels[val_rows].astype(np.float32))
+        print(f"🧩 Worker {self.index}: {len(train_rows)} train / {len(val_rows)} val rows decoded")
+        return len(idx_train), len(idx_val)
+
+    def _decode(self, records, rows):
+        """Model inputs for `rows` of `records`, decoded straight to the training resolution"""
+        images_dir = Path(self.data_dir) / 'images'
+        images = np.empty((len(rows), self.image_size, self.image_size, 3), dtype=np.float32)
+        features = np.empty((len(rows), 7), dtype=np.float32)
+        for j, i in enumerate(rows):
+            item = records[i]
+            img = self.trainer.read_image(images_dir / item['authenticity'] / item['filename'])
+            images[j] = self.trainer.preprocess_image(img, self.image_size)
+            features[j] = self.trainer.build_feature_vector(item)
+        return images, features
+
+    def build(self):
+        tf = self.tf
+        keras = self.trainer.keras
+        with self.strategy.scope():
+            classifier = self.trainer.LabubuClassifier(self.data_dir)
+            self.model = classifier.create_model(self.image_size) or classifier.model
+            self.optimizer = keras.optimizers.Adam(learning_rate=self.learning_rate)
+            self.optimizer.build(self.model.trainable_variables)
+
+        bce = keras.losses.BinaryCrossentropy(reduction=None)
+        mse = keras.losses.MeanSquaredError(reduction=None)
+        global_batch_size = self.global_batch_size
+
+        def replica_step(images, features, labels, confidence):
+            with tf.GradientTape() as tape:
+                authenticity, predicted_confidence = self.model([images, features], training=True)
+                authenticity_loss = bce(labels[:, None], authenticity)
+                per_example = authenticity_loss + 0.3 * mse(confidence[:, None], predicted_confidence)
+                loss = tf.nn.compute_average_loss(per_example, global_batch_size=global_batch_size)
+            gradients = tape.gradient(loss, self.model.trainable_variables)
+            self.optimizer.apply_gradients(zip(gradients, self.model.trainable_variables))
+            correct = tf.reduce_sum(tf.cast(tf.equal(tf.cast(authenticity[:, 0] > 0.5, tf.float32), labels), tf.float32))
+            return tf.stack([loss * global_batch_size, correct, tf.reduce_sum(authenticity_loss)])
+
+        @tf.function
+        def train_step(images, features, labels, confidence):
+            totals = self.strategy.run(replica_step, args=(images, features, labels, confidence))
+            return self.strategy.reduce(tf.distribute.ReduceOp.SUM, totals, axis=None)
+
+        @tf.function
+        def all_reduce(values):
+            return self.strategy.reduce(tf.distribute.ReduceOp.SUM, self.strategy.run(lambda v: v, args=(values,)),
+                                        axis=None)
+
+        self.train_step = train_step
+        self.all_reduce = all_reduce
+
+    def _epoch_shard(self, epoch):
+        """This worker's rows for an epoch, reshuffled within its own shard"""
+        order = np.random.default_rng([self.seed, epoch, self.index]).permutation(len(self.train_data[0]))
+        return order[:self.steps_per_epoch * self.batch_size], self.steps_per_epoch
+
+    def evaluate(self):
+        """Validation loss and accuracy summed over each worker's shard, then all-reduced"""
+        images, features, labels = self.val_data
+        loss_sum, correct = 0.0, 0.0
+        for start in range(0, len(images), self.batch_size):
+            stop = start + self.batch_size
+            authenticity, _ = self.model([images[start:stop], features[start:stop]], training=False)
+            authenticity = np.asarray(authenticity)[:, 0]
+            batch_labels = labels[start:stop]
+            clipped = np.clip(authenticity, 1e-7, 1 - 1e-7)
+            loss_sum += float(-np.sum(batch_labels * np.log(clipped) + (1 - batch_labels) * np.log(1 - clipped)))
+            correct += float(np.sum((authenticity > 0.5) == batch_labels))
+        totals = np.asarray(self.all_reduce(self.tf.constant([loss_sum, correct, float(len(images))])))
+        count = max(totals[2], 1.0)
+        return totals[0] / count, totals[1] / count
+
+    def _state_file(self):
+        return self.checkpoint_dir / 'training_state.json'
+
+    def restore(self):
+        """Load the chief's last checkpoint on every worker, returning the next epoch and history
+
+        Weights and the optimizer's variables (Adam moments and iteration
+        count) are both restored, so a resumed run continues the same
+        optimization rather than restarting Adam from zero.
+        """
+        if not self._state_file().exists():
+            return 0, {}
+        with open(self._state_file(), 'r') as f:
+            state = json.load(f)
+        self.model.load_weights(self.checkpoint_dir / 'model.weights.h5')
+        with np.load(self.checkpoint_dir / 'optimizer.npz') as data:
+            saved = [data[f'arr_{i}'] for i in range(len(data.files))]
+        if len(saved) != len(self.optimizer.variables):
+            raise ValueError(f"Saved optimizer has {len(saved)} variables but the model expects "
+                             f"{len(self.optimizer.variables)}")
+        for variable, value in zip(self.optimizer.variables, saved):
+            variable.assign(value)
+        print(f"🔁 Worker {self.index} resuming after epoch {state['epoch'] + 1}")
+        return state['epoch'] + 1, state['history']
+
+    def save_checkpoint(self, epoch, history):
+        """Chief writes weights, optimizer state and history; the all-reduce after it doubles as a barrier"""
+        if self.is_chief:
+            tmp_dir = self.checkpoint_dir.with_name(self.checkpoint_dir.name + '.tmp')
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            tmp_dir.mkdir(parents=True)
+            self.model.save_weights(tmp_dir / 'model.weights.h5')
+            np.savez(tmp_dir / 'optimizer.npz', *[np.asarray(v) for v in self.optimizer.variables])
+            with open(tmp_dir / 'training_state.json', 'w') as f:
+                json.dump({'epoch': epoch, 'workers': self.workers, 'history': history}, f)
+            shutil.rmtree(self.checkpoint_dir, ignore_errors=True)
+            tmp_dir.rename(self.checkpoint_dir)
+        self.all_reduce(self.tf.constant([0.0]))
+
+    def train(self, epochs, resume=False):
+        """Run the remaining epochs; self.start_epoch is the first one this launch trains"""
+        start_epoch, history = self.restore() if resume else (0, {})
+        self.start_epoch = start_epoch
+        for epoch in range(start_epoch, epochs):
+            rows, steps = self._epoch_shard(epoch)
+            images, features, labels, confidence = self.train_data
+            totals = np.zeros(3)
+            input_seconds = 0.0
+            epoch_start = time.perf_counter()
+            for step in range(steps):
+                t0 = time.perf_counter()
+                batch = rows[step * self.batch_size:(step + 1) * self.batch_size]
+                inputs = (images[batch], features[batch], labels[batch], confidence[batch])
+                input_seconds += time.perf_counter() - t0
+                totals += np.asarray(self.train_step(*inputs))
+            train_seconds = time.perf_counter() - epoch_start
+
+            val_loss, val_accuracy = self.evaluate()
+            samples = steps * self.global_batch_size
+            metrics = {
+                'loss': totals[0] / max(samples, 1),
+                # BCE only, comparable with val_authenticity_loss
+                'authenticity_loss': totals[2] / max(samples, 1),
+                'authenticity_accuracy': totals[1] / max(samples, 1),
+                'val_authenticity_loss': val_loss,
+                'val_authenticity_accuracy': val_accuracy,
+                'epoch_seconds': train_seconds,
+                'input_seconds': input_seconds,
+                'samples_per_sec': samples / train_seconds if train_seconds else 0.0
+            }
+            for key, value in metrics.items():
+                history.setdefault(key, []).append(float(value))
+            if self.is_chief:
+                print(f"📈 Epoch {epoch + 1}/{epochs}: loss {metrics['authenticity_loss']:.4f}, "
+                      f"val loss {val_loss:.4f}, acc {metrics['authenticity_accuracy']:.3f}, "
+                      f"val acc {val_accuracy:.3f}, "
+                      f"{metrics['samples_per_sec']:.1f} samples/s over {self.workers} workers")
+
+            if (epoch + 1) % self.checkpoint_interval == 0 or epoch + 1 == epochs:
+                self.save_checkpoint(epoch, history)
+        return history
+
+
+def run_worker(args):
+    """Entry point of one launched worker process"""
+    trainer = load_script('train-labubu-classifier')
+    trainer.configure_threading(args.threads_per_worker, 1, config_file=None)
+
+    worker = MultiWorkerTrainer(
+        data_dir=args.data_dir,
+        batch_size=args.batch_size,
+        image_size=args.image_size,
+        filters=load_script('dataset-snapshot').parse_filters(args.filter),
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_interval=args.checkpoint_interval,
+        learning_rate=args.learning_rate
+    )
+    n_train, n_val = worker.load_data(args.dedup, args.split)
+    if n_train < worker.global_batch_size:
+        raise ValueError(f"{n_train} training samples cannot fill a global batch of {worker.global_batch_size}")
+    worker.build()
+    history = worker.train(args.epochs, resume=args.resume)
+
+    if worker.is_chief and args.save_model:
+        worker.model.save(args.save_model)
+        print(f"💾 Model saved to '{args.save_model}'")
+
+    with open(Path(args.results_dir) / f'worker_{worker.index}.json', 'w') as f:
+        json.dump({'index': worker.index, 'workers': worker.workers, 'train_samples': n_train,
+                   'val_samples': n_val, 'global_batch_size': worker.global_batch_size,
+                   'start_epoch': worker.start_epoch, 'history': history}, f)
+
+
+def summarize(results, warmup_epochs=1):
+    """Throughput from the epochs this launch ran, skipping its own first ones that trace the step function
+
+    After --resume the history also holds earlier launches' epochs, which
+    are left out.
+    """
+    history = results[0]['history']
+    first = results[0].get('start_epoch', 0)
+    ran = history['samples_per_sec'][first:]
+    timed = ran[warmup_epochs:] or ran
+    input_share = np.sum(history['input_seconds'][first:]) / max(np.sum(history['epoch_seconds'][first:]), 1e-9)
+    return {
+        'workers': results[0]['workers'],
+        'global_batch_size': results[0]['global_batch_size'],
+        'samples_per_sec': float(np.mean(timed)),
+        'input_share': float(input_share),
+        'final_val_accuracy': history['val_authenticity_accuracy'][-1]
+    }
+
+
+def benchmark(worker_counts, worker_args, output, threads_per_worker=None):
+    """Train for a few epochs at each worker count and report scaling efficiency
+
+    Efficiency is throughput(N) / (N * throughput(1)). Each worker keeps
+    the same per-worker batch size, so the global batch grows with N.
+    """
+    rows = []
+    for workers in worker_counts:
+        print(f"\n🚀 {workers} worker(s)")
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            args = [*worker_args, '--checkpoint-dir', str(Path(tmp_dir) / 'checkpoints')]
+            results = launch(workers, args, tmp_dir, threads_per_worker)
+        rows.append(summarize(results))
+
+    base = rows[0]['samples_per_sec'] / rows[0]['workers']
+    for row in rows:
+        row['speedup'] = row['samples_per_sec'] / rows[0]['samples_per_sec']
+        row['scaling_efficiency'] = row['samples_per_sec'] / (row['workers'] * base)
+
+    print(f"\n{'workers':>8} {'samples/s':>10} {'speedup':>8} {'efficiency':>10} {'input share':>12}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['samples_per_sec']:>10.1f} {row['speedup']:>7.2f}x "
+              f"{row['scaling_efficiency']:>9.0%} {row['input_share']:>11.0%}")
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump({'cpu_count': os.cpu_count(), 'results': rows}, f, indent=2)
+    print(f"📊 Scaling results saved to '{output}'")
+    return rows
+
+
+def main():
+    """Launch data-parallel CNN training on local workers, or benchmark its scaling"""
+    parser = argparse.ArgumentParser(description='Multi-worker data-parallel Labubu CNN training')
+    parser.add_argument('--workers', type=int, default=2, help='Local worker processes to launch')
+    parser.add_argument('--benchmark', type=lambda v: [int(x) for x in v.split(',')], nargs='?',
+                        const=DEFAULT_WORKER_COUNTS, default=None, help='Worker counts to compare, e.g. 1,2,4,8')
+    parser.add_argument('--threads-per-worker', type=int, default=None,
+                        help='Intra-op threads per worker (default: CPU count / workers)')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--epochs', type=int, default=50)
+    parser.add_argument('--batch-size', type=int, default=16, help='Per-worker batch size')
+    parser.add_argument('--image-size', type=int, default=None, help='Train at a lower resolution than 224')
+    parser.add_argument('--learning-rate', type=float, default=0.001)
+    parser.add_argument('--dedup', default='none')
+    parser.add_argument('--filter', action='append', default=[])
+    parser.add_argument('--split', default='random', help="'manifest' uses the persisted split from split-manifest.py")
+    parser.add_argument('--checkpoint-dir', default=CHECKPOINT_DIR)
+    parser.add_argument('--checkpoint-interval', type=int, default=1)
+    parser.add_argument('--resume', action='store_true', help='Continue from the chief\'s last checkpoint')
+    parser.add_argument('--save-model', default='models/labubu_classifier_multi_worker.h5')
+    parser.add_argument('--output', default='models/multi_worker_scaling.json')
+    # Set by launch() for the spawned processes
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--results-dir', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    worker_args = ['--data-dir', args.data_dir, '--epochs', str(args.epochs), '--batch-size', str(args.batch_size),
+                   '--learning-rate', str(args.learning_rate), '--dedup', args.dedup, '--split', args.split,
+                   '--checkpoint-interval', str(args.checkpoint_interval)]
+    for expression in args.filter:
+        worker_args += ['--filter', expression]
+    if args.image_size:
+        worker_args += ['--image-size', str(args.image_size)]
+    if args.split == 'manifest':
+        # Assign new samples once here so the workers never race to write the manifest
+        snapshot = load_script('dataset-snapshot')
+        records = snapshot.load_records(args.data_dir, snapshot.parse_filters(args.filter))
+        load_script('split-manifest').prepare(args.data_dir, records, dedup=args.dedup)
+
+    if args.benchmark:
+        benchmark(args.benchmark, [*worker_args, '--save-model', ''], args.output, args.threads_per_worker)
+        return
+
+    worker_args += ['--checkpoint-dir', args.checkpoint_dir, '--save-model', args.save_model]
+    if args.resume:
+        worker_args.append('--resume')
+    print(f"🚀 Launching {args.workers} workers on localhost")
+    with tempfile.TemporaryDirectory() as results_dir:
+        results = launch(args.workers, worker_args, results_dir, args.threads_per_worker,
+                         log_dir=Path(args.checkpoint_dir).parent)
+    summary = summarize(results)
+    print(f"✅ Training completed: {summary['samples_per_sec']:.1f} samples/s, "
+          f"val accuracy {summary['final_val_accuracy']:.3f}")
+
+
+if __name__ == "__main__":
+    main()
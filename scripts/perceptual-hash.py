@@ -0,0 +1,285 @@
+import os
+import json
+import time
+import argparse
+import itertools
+import numpy as np
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from sklearn.model_selection import train_test_split, StratifiedGroupKFold
+
+from script_loader import load_script
+
+decoding = load_script('image-decoding')
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+DUPLICATES_FILE = 'duplicates.json'
+DEDUP_MODES = ('none', 'drop', 'group')
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def dct_matrix(n):
+    """Orthonormal DCT-II basis, so dct2(x) = D @ x @ D.T"""
+    k = np.arange(n)[:, None]
+    i = np.arange(n)[None, :]
+    d = np.cos(np.pi * (2 * i + 1) * k / (2 * n)) * np.sqrt(2 / n)
+    d[0] /= np.sqrt(2)
+    return d.astype(np.float32)
+
+
+def phash_batch(thumbnails):
+    """64-bit DCT perceptual hashes for a (N, 32, 32) stack of grayscale thumbnails
+
+    Each bit says whether one of the 8x8 lowest-frequency DCT coefficients
+    is above the median of the block (the DC term is left out of the median).
+    """
+    d = dct_matrix(DCT_SIZE)
+    coeffs = np.einsum('ij,njk,lk->nil', d, np.asarray(thumbnails, np.float32), d)
+    low = coeffs[:, :HASH_SIZE, :HASH_SIZE].reshape(len(coeffs), -1)
+    median = np.median(low[:, 1:], axis=1, keepdims=True)
+    bits = np.packbits(low > median, axis=1)
+    return bits.view('>u8').reshape(-1).astype(np.uint64)
+
+
+def popcount(values):
+    values = np.ascontiguousarray(values, dtype=np.uint64)
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(values).astype(np.int64)
+    return _POPCOUNT[values.view(np.uint8)].reshape(-1, 8).sum(axis=1).astype(np.int64)
+
+
+def load_thumbnail(path):
+    """Grayscale 32x32 thumbnail; JPEGs are decoded at the smallest scale that keeps 32 px"""
+    if not os.path.exists(path):
+        return None
+    img = decoding.read_image(path, reduced=True, size=DCT_SIZE, grayscale=True)
+    if img is None:
+        return None
+    return cv2.resize(img, (DCT_SIZE, DCT_SIZE), interpolation=cv2.INTER_AREA)
+
+
+def hash_images(paths, batch_size=1024, workers=os.cpu_count()):
+    """Hash image files; returns (hashes, valid mask)"""
+    hashes = np.zeros(len(paths), dtype=np.uint64)
+    valid = np.zeros(len(paths), dtype=bool)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(paths), batch_size):
+            thumbnails = list(pool.map(load_thumbnail, paths[start:start + batch_size]))
+            ok = np.array([t is not None for t in thumbnails], dtype=bool)
+            if ok.any():
+                rows = start + np.flatnonzero(ok)
+                hashes[rows] = phash_batch(np.stack([t for t in thumbnails if t is not None]))
+                valid[rows] = True
+    return hashes, valid
+
+
+class MultiIndexHasher:
+    """Near-duplicate search over 64-bit hashes by multi-index hashing
+
+    The hash is split into `n_chunks` 16-bit substrings. Two hashes within
+    Hamming distance r must agree to within r // n_chunks bits on at least
+    one substring, so candidates come from per-substring bucket tables instead
+    of comparing all pairs, and are then verified on the full hash.
+    """
+
+    def __init__(self, hashes, n_chunks=4):
+        self.hashes = np.asarray(hashes, dtype=np.uint64)
+        self.n_chunks = n_chunks
+        self.chunk_bits = 64 // n_chunks
+        mask = np.uint64((1 << self.chunk_bits) - 1)
+        self.chunks = [(self.hashes >> np.uint64(c * self.chunk_bits)) & mask for c in range(n_chunks)]
+        # Direct-address bucket tables: rows order[starts[v]:starts[v] + counts[v]] have substring v
+        self.orders = [np.argsort(chunk, kind='stable') for chunk in self.chunks]
+        self.counts = [np.bincount(chunk.astype(np.int64), minlength=1 << self.chunk_bits) for chunk in self.chunks]
+        self.starts = [np.cumsum(counts) - counts for counts in self.counts]
+
+    def _flip_masks(self, radius):
+        masks = [0]
+        for r in range(1, radius + 1):
+            for bits in itertools.combinations(range(self.chunk_bits), r):
+                masks.append(sum(1 << b for b in bits))
+        return np.array(masks, dtype=np.uint64)
+
+    def near_duplicate_pairs(self, max_distance):
+        """(i, j) pairs with i < j within `max_distance` bits of each other"""
+        pairs = []
+        for chunk, order, bucket_starts, bucket_counts in zip(self.chunks, self.orders, self.starts, self.counts):
+            for flip in self._flip_masks(max_distance // self.n_chunks):
+                keys = (chunk ^ flip).astype(np.int64)
+                lo = bucket_starts[keys]
+                counts = bucket_counts[keys]
+                if not counts.any():
+                    continue
+                left = np.repeat(np.arange(len(keys)), counts)
+                # Position of each match inside its run of equal substrings
+                offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+                right = order[np.repeat(lo, counts) + offsets]
+                keep = left < right
+                left, right = left[keep], right[keep]
+                # Verify candidates on the full hash before they pile up
+                close = popcount(self.hashes[left] ^ self.hashes[right]) <= max_distance
+                pairs.append(left[close] * len(self.hashes) + right[close])
+        if not pairs:
+            return np.zeros((0, 2), dtype=np.int64)
+        keys = np.unique(np.concatenate(pairs))
+        return np.stack([keys // len(self.hashes), keys % len(self.hashes)], axis=1)
+
+    def clusters(self, max_distance):
+        """Cluster label per hash; connected components of the near-duplicate graph"""
+        parent = np.arange(len(self.hashes))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        for i, j in self.near_duplicate_pairs(max_distance):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+        roots = np.array([find(i) for i in range(len(parent))])
+        return np.unique(roots, return_inverse=True)[1]
+
+
+def find_duplicates(data_dir, max_distance=6, workers=os.cpu_count()):
+    """Hash every image in metadata.json and write clusters to data_dir/duplicates.json"""
+    data_dir = Path(data_dir)
+    with open(data_dir / 'metadata.json', 'r') as f:
+        metadata = json.load(f)
+    paths = [data_dir / 'images' / item['authenticity'] / item['filename'] for item in metadata]
+
+    start = time.perf_counter()
+    hashes, valid = hash_images(paths, workers=workers)
+    hash_seconds = time.perf_counter() - start
+    ids = [item['id'] for item, ok in zip(metadata, valid) if ok]
+    hashes = hashes[valid]
+
+    start = time.perf_counter()
+    labels = MultiIndexHasher(hashes).clusters(max_distance)
+    search_seconds = time.perf_counter() - start
+
+    groups = {}
+    for item_id, label in zip(ids, labels):
+        groups.setdefault(int(label), []).append(item_id)
+    clusters = [members for members in groups.values() if len(members) > 1]
+
+    result = {
+        'max_distance': max_distance,
+        'hashes': {item_id: f'{int(h):016x}' for item_id, h in zip(ids, hashes)},
+        'clusters': clusters
+    }
+    with open(data_dir / DUPLICATES_FILE, 'w') as f:
+        json.dump(result, f)
+
+    duplicates = sum(len(c) - 1 for c in clusters)
+    print(f"🔎 Hashed {len(ids)} images in {hash_seconds:.1f}s "
+          f"({len(ids) / max(hash_seconds, 1e-9):.0f} img/s), searched in {search_seconds:.2f}s")
+    print(f"🧬 {len(clusters)} duplicate clusters, {duplicates} redundant images "
+          f"({len(metadata) - len(ids)} unreadable)")
+    print(f"💾 Clusters saved to '{data_dir / DUPLICATES_FILE}'")
+    return result
+
+
+def load_duplicate_groups(data_dir, records):
+    """Group id per record: members of a duplicate cluster share one, the rest are unique
+
+    Returns None when no duplicates.json has been generated yet.
+    """
+    path = Path(data_dir) / DUPLICATES_FILE
+    if not path.exists():
+        return None
+    with open(path, 'r') as f:
+        clusters = json.load(f)['clusters']
+
+    cluster_of = {item_id: c for c, members in enumerate(clusters) for item_id in members}
+    groups = np.empty(len(records), dtype=np.int64)
+    next_group = len(clusters)
+    for i, item in enumerate(records):
+        if item['id'] in cluster_of:
+            groups[i] = cluster_of[item['id']]
+        else:
+            groups[i] = next_group
+            next_group += 1
+    return groups
+
+
+def split_indices(labels, groups=None, mode='none', test_size=0.2, random_state=42):
+    """Stratified train/test indices with optional duplicate handling
+
+    mode='drop' keeps only the first sample of each duplicate cluster,
+    mode='group' keeps all samples but never puts one cluster on both sides.
+    Without groups this is the plain stratified train_test_split.
+    """
+    indices = np.arange(len(labels))
+    if groups is None or mode == 'none':
+        return train_test_split(indices, test_size=test_size, random_state=random_state, stratify=labels)
+
+    if mode == 'drop':
+        _, first = np.unique(groups, return_index=True)
+        indices = np.sort(first)
+        print(f"🧹 Dropped {len(labels) - len(indices)} near-duplicate samples")
+        return train_test_split(indices, test_size=test_size, random_state=random_state,
+                                stratify=np.asarray(labels)[indices])
+
+    if mode == 'group':
+        splitter = StratifiedGroupKFold(n_splits=max(int(round(1 / test_size)), 2),
+                                        shuffle=True, random_state=random_state)
+        train_idx, test_idx = next(splitter.split(indices, labels, groups))
+        return train_idx, test_idx
+
+    raise ValueError(f"Unknown dedup mode '{mode}', expected one of {DEDUP_MODES}")
+
+
+def benchmark(n, max_distance, seed=42):
+    """Time multi-index search against all-pairs comparison on synthetic hashes"""
+    rng = np.random.default_rng(seed)
+    hashes = rng.integers(0, 2 ** 64, n, dtype=np.uint64)
+    # Plant near-duplicates: every 10th hash gets a copy with a few flipped bits
+    planted = hashes[::10].copy()
+    for _ in range(max_distance // 2):
+        planted ^= np.uint64(1) << rng.integers(0, 64, len(planted)).astype(np.uint64)
+    hashes = np.concatenate([hashes, planted])
+
+    start = time.perf_counter()
+    pairs = MultiIndexHasher(hashes).near_duplicate_pairs(max_distance)
+    mih_seconds = time.perf_counter() - start
+
+    sample = min(len(hashes), 20_000)
+    start = time.perf_counter()
+    for i in range(sample):
+        popcount(hashes[i + 1:sample] ^ hashes[i])
+    brute_seconds = (time.perf_counter() - start) * (len(hashes) / sample) ** 2
+
+    print(f"\n🧪 {len(hashes):,} hashes, distance <= {max_distance}")
+    print(f"  multi-index: {mih_seconds:.2f}s, {len(pairs):,} pairs ({len(planted):,} planted)")
+    print(f"  all-pairs (extrapolated): {brute_seconds:.1f}s")
+    return {'hashes': len(hashes), 'pairs': len(pairs), 'planted': len(planted),
+            'multi_index_seconds': mih_seconds, 'all_pairs_seconds_estimate': brute_seconds}
+
+
+def main():
+    """Find near-duplicate training images and write duplicate clusters"""
+    parser = argparse.ArgumentParser(description='Perceptual-hash near-duplicate detection')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--max-distance', type=int, default=6, help='Max Hamming distance between duplicates')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--benchmark', type=int, default=None, metavar='N',
+                        help='Benchmark the search on N synthetic hashes instead')
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark(args.benchmark, args.max_distance)
+        return
+
+    if not (Path(args.data_dir) / 'metadata.json').exists():
+        print("❌ No metadata.json found!")
+        return
+    find_duplicates(args.data_dir, args.max_distance, args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+from pathlib import Path
+
+
+def load_interpreter_class():
+    """Prefer the standalone tflite runtime, fall back to the full TensorFlow package"""
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        import tensorflow as tf
+        Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class QuantizedLabubuPredictor:
+    """Run the INT8 TFLite export of the two-input classifier without Keras"""
+
+    def __init__(self, model_path='models/labubu_classifier_int8.tflite', num_threads=None):
+        self.model_path = Path(model_path)
+        if not self.model_path.exists():
+            raise FileNotFoundError(f"Quantized model not found: {self.model_path}")
+
+        Interpreter = load_interpreter_class()
+        self.interpreter = Interpreter(model_path=str(self.model_path), num_threads=num_threads)
+        self.runner = self.interpreter.get_signature_runner()
+        self.input_details = self.runner.get_input_details()
+        self.output_details = self.runner.get_output_details()
+        self.input_names = self._match_names(self.input_details, ['image', 'features'])
+        self.output_names = self._match_names(self.output_details, ['authenticity', 'confidence'])
+
+    @staticmethod
+    def _match_names(details, expected):
+        """Map the Keras tensor names onto the names stored in the TFLite signature"""
+        names = sorted(details)
+        mapping = {}
+        for i, key in enumerate(expected):
+            matches = [name for name in names if key in name]
+            mapping[key] = matches[0] if matches else names[i]
+        return mapping
+
+    @staticmethod
+    def _quantize(values, detail):
+        """Convert float inputs to the tensor's dtype using its quantization params"""
+        dtype = detail['dtype']
+        if dtype == np.float32:
+            return values.astype(np.float32)
+
+        scale, zero_point = detail['quantization']
+        info = np.iinfo(dtype)
+        quantized = np.round(values / scale + zero_point)
+        return np.clip(quantized, info.min, info.max).astype(dtype)
+
+    @staticmethod
+    def _dequantize(values, detail):
+        """Convert raw outputs back to float scores"""
+        if detail['dtype'] == np.float32:
+            return values
+
+        scale, zero_point = detail['quantization']
+        return (values.astype(np.float32) - zero_point) * scale
+
+    def predict(self, images, features):
+        """Return (authenticity, confidence) arrays for a batch of images and features"""
+        images = np.asarray(images, dtype=np.float32)
+        features = np.asarray(features, dtype=np.float32)
+        if images.ndim == 3:
+            images = images[None]
+            features = features[None]
+
+        image_name = self.input_names['image']
+        feature_name = self.input_names['features']
+        outputs = self.runner(**{
+            image_name: self._quantize(images, self.input_details[image_name]),
+            feature_name: self._quantize(features, self.input_details[feature_name]),
+        })
+
+        auth_name = self.output_names['authenticity']
+        conf_name = self.output_names['confidence']
+        authenticity = self._dequantize(outputs[auth_name], self.output_details[auth_name])
+        confidence = self._dequantize(outputs[conf_name], self.output_details[conf_name])
+        return authenticity.reshape(-1), confidence.reshape(-1)
+
+    def predict_one(self, image, features):
+        """Score a single item and return the same shape of result as the simple classifier"""
+        authenticity, confidence = self.predict(image, features)
+        score = float(authenticity[0])
+
+        return {
+            'prediction': 'authentic' if score > 0.5 else 'fake',
+            'authenticity': score,
+            'confidence': float(confidence[0])
+        }
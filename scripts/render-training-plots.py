@@ -0,0 +1,147 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+import tempfile
+from pathlib import Path
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import numpy as np
+
+PLOT_MODES = ('background', 'inline', 'none')
+
+
+def render_results(data, output):
+    """Feature importance bars and confusion matrix for the simple classifier"""
+    feature_importance = data['feature_importance']
+    confusion_matrix = np.array(data['confusion_matrix'])
+
+    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
+
+    # Feature importance plot
+    features, importances = zip(*feature_importance)
+    ax1.barh(range(len(features)), importances)
+    ax1.set_yticks(range(len(features)))
+    ax1.set_yticklabels(features)
+    ax1.set_xlabel('Importance')
+    ax1.set_title('Feature Importance')
+    ax1.grid(axis='x', alpha=0.3)
+
+    # Confusion matrix plot
+    im = ax2.imshow(confusion_matrix, interpolation='nearest', cmap=plt.cm.Blues)
+    ax2.figure.colorbar(im, ax=ax2)
+    ax2.set(xticks=np.arange(confusion_matrix.shape[1]),
+            yticks=np.arange(confusion_matrix.shape[0]),
+            xticklabels=['Counterfeit', 'Authentic'],
+            yticklabels=['Counterfeit', 'Authentic'],
+            title='Confusion Matrix',
+            ylabel='True label',
+            xlabel='Predicted label')
+
+    # Add text annotations to confusion matrix
+    thresh = confusion_matrix.max() / 2.
+    for i in range(confusion_matrix.shape[0]):
+        for j in range(confusion_matrix.shape[1]):
+            ax2.text(j, i, format(confusion_matrix[i, j], 'd'),
+                     ha="center", va="center",
+                     color="white" if confusion_matrix[i, j] > thresh else "black")
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+def render_history(data, output):
+    """Accuracy, loss and confidence curves for the CNN"""
+    history = data['history']
+    fig, axes = plt.subplots(2, 2, figsize=(12, 10))
+
+    panels = [
+        ((0, 0), 'authenticity_accuracy', 'Authenticity Accuracy'),
+        ((0, 1), 'authenticity_loss', 'Authenticity Loss'),
+        ((1, 0), 'confidence_mae', 'Confidence MAE'),
+        ((1, 1), 'loss', 'Total Loss')
+    ]
+    for position, metric, title in panels:
+        axes[position].plot(history.get(metric, []), label='Train')
+        axes[position].plot(history.get(f'val_{metric}', []), label='Val')
+        axes[position].set_title(title)
+        axes[position].legend()
+
+    plt.tight_layout()
+    plt.savefig(output, dpi=300, bbox_inches='tight')
+    plt.close(fig)
+
+
+RENDERERS = {
+    'results': render_results,
+    'history': render_history
+}
+
+
+def to_json(value):
+    """Plain Python types for numpy scalars and arrays inside plot data"""
+    if isinstance(value, dict):
+        return {k: to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def submit(kind, data, output, mode='background'):
+    """Render a plot according to `mode`, returning without waiting in background mode
+
+    The data is written to a temporary JSON payload and this script is
+    started as a detached process (its own session, no inherited stdin),
+    so training can exit while the PNG is still being drawn. Its output
+    and any traceback go to a .log file next to the PNG.
+    """
+    if mode == 'none':
+        return None
+    if mode == 'inline':
+        RENDERERS[kind](data, output)
+        return None
+
+    fd, payload_path = tempfile.mkstemp(prefix=f'labubu_{kind}_', suffix='.json')
+    with os.fdopen(fd, 'w') as f:
+        json.dump({'kind': kind, 'output': str(Path(output).resolve()), 'data': to_json(data)}, f)
+
+    log_path = Path(output).with_suffix('.log')
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(log_path, 'w') as log:
+        return subprocess.Popen(
+            [sys.executable, str(Path(__file__).resolve()), payload_path],
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+            start_new_session=True,
+            close_fds=True
+        )
+
+
+def main():
+    """Render one plot payload written by submit()"""
+    parser = argparse.ArgumentParser(description='Render training plots from a JSON payload')
+    parser.add_argument('payload')
+    parser.add_argument('--keep-payload', action='store_true')
+    args = parser.parse_args()
+
+    with open(args.payload, 'r') as f:
+        payload = json.load(f)
+    try:
+        RENDERERS[payload['kind']](payload['data'], payload['output'])
+        print(f"📊 Saved '{payload['output']}'")
+    finally:
+        if not args.keep_payload:
+            os.remove(args.payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+import json
+import hashlib
+import argparse
+import numpy as np
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from script_loader import load_script
+
+duplicates = load_script('perceptual-hash')
+
+MANIFEST_FILE = 'splits.json'
+SPLITS = ('train', 'validation', 'test')
+DEFAULT_FRACTIONS = (0.7, 0.15, 0.15)
+DEFAULT_SALT = 'labubu-splits-v1'
+SPLIT_MODES = ('random', 'manifest')
+
+
+def stable_hash(sample_id, salt=DEFAULT_SALT):
+    """Uniform value in [0, 1) that depends only on the salt and the sample id"""
+    digest = hashlib.blake2b(f'{salt}:{sample_id}'.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, 'big') / 2 ** 64
+
+
+def stratum(item):
+    """Label and series, the two things every split must stay balanced on"""
+    return f"{item['authenticity']}|{item['series']}"
+
+
+class SplitManifest:
+    """Persisted sample id -> train / validation / test assignment
+
+    Ids are never reassigned once written, so adding data leaves the
+    existing split (and anything cached per split) untouched. New ids are
+    stratified by label and series against the counts already in the
+    manifest, in stable-hash order so the result is reproducible: see
+    assign().
+    """
+
+    def __init__(self, data_dir='./training-data', fractions=DEFAULT_FRACTIONS, salt=DEFAULT_SALT):
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / MANIFEST_FILE
+        self.fractions = dict(zip(SPLITS, fractions))
+        self.salt = salt
+        self.assignments = {}
+
+    def load(self):
+        if self.path.exists():
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.fractions = data['fractions']
+            self.salt = data['salt']
+            self.assignments = data['assignments']
+        return self
+
+    def save(self):
+        tmp_path = self.path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'fractions': self.fractions, 'salt': self.salt, 'assignments': self.assignments}, f)
+        tmp_path.replace(self.path)
+
+    def bucket(self, value):
+        """Split whose slice of [0, 1) contains `value`, slices laid out in SPLITS order"""
+        edge = 0.0
+        for split in SPLITS:
+            edge += self.fractions[split]
+            if value < edge:
+                return split
+        return SPLITS[-1]
+
+    def distance(self, value, split):
+        """How far `value` lies outside the hash slice of `split`"""
+        low = sum(self.fractions[s] for s in SPLITS[:SPLITS.index(split)])
+        high = low + self.fractions[split]
+        return max(low - value, value - high, 0.0)
+
+    def assign(self, records, groups=None):
+        """Give every unassigned record a split, returning how many were added
+
+        Duplicate clusters move as one unit keyed on their smallest id, or
+        follow a member that already has a split. Within each label|series
+        stratum, new units are taken in stable-hash order and each goes to
+        the split furthest below its target count, counting the samples
+        already assigned. A stratum too small to give every split one sample
+        falls back to the hash bucket. If that leaves a label missing from a
+        split, new units are moved over, those whose hash is closest to the
+        split's slice first.
+        """
+        keys = groups if groups is not None else [item['id'] for item in records]
+        units = defaultdict(list)
+        for i, key in enumerate(keys):
+            units[key].append(i)
+
+        stratum_counts = defaultdict(Counter)
+        new_units = defaultdict(list)
+        movable = []
+        added = 0
+        for members in units.values():
+            ids = [records[i]['id'] for i in members]
+            fixed = next((self.assignments[item_id] for item_id in ids if item_id in self.assignments), None)
+            new = [i for i in members if records[i]['id'] not in self.assignments]
+            added += len(new)
+            if new and fixed is None:
+                first = min(members, key=lambda i: records[i]['id'])
+                unit = {'value': stable_hash(records[first]['id'], self.salt), 'split': None, 'members': new,
+                        'labels': Counter(records[i]['authenticity'] for i in new)}
+                new_units[stratum(records[first])].append(unit)
+                movable.append(unit)
+                continue
+            for i in new:
+                self.assignments[records[i]['id']] = fixed
+            for i in members:
+                stratum_counts[stratum(records[i])][self.assignments[records[i]['id']]] += 1
+
+        for key, stratum_units in new_units.items():
+            counts = stratum_counts[key]
+            total = sum(counts.values()) + sum(len(unit['members']) for unit in stratum_units)
+            targets = {split: self.fractions[split] * total for split in SPLITS}
+            small = min(targets.values()) < 1
+            for unit in sorted(stratum_units, key=lambda u: u['value']):
+                if small:
+                    unit['split'] = self.bucket(unit['value'])
+                else:
+                    unit['split'] = max(SPLITS, key=lambda split: targets[split] - counts[split])
+                counts[unit['split']] += len(unit['members'])
+                for i in unit['members']:
+                    self.assignments[records[i]['id']] = unit['split']
+
+        label_counts = defaultdict(Counter)
+        for item in records:
+            label_counts[self.assignments[item['id']]][item['authenticity']] += 1
+
+        totals = Counter(item['authenticity'] for item in records)
+        for label in sorted(totals):
+            if totals[label] < len(SPLITS):
+                continue
+            for split in SPLITS:
+                if label_counts[split][label]:
+                    continue
+                # Only take from a split that still keeps one of this label afterwards
+                candidates = [unit for unit in movable if unit['split'] != split and unit['labels'][label]
+                              and label_counts[unit['split']][label] > unit['labels'][label]]
+                if not candidates:
+                    continue
+                unit = min(candidates, key=lambda u: (self.distance(u['value'], split), u['value']))
+                label_counts[unit['split']] -= unit['labels']
+                label_counts[split] += unit['labels']
+                unit['split'] = split
+                for i in unit['members']:
+                    self.assignments[records[i]['id']] = split
+        return added
+
+    def check(self, records):
+        """Raise if train, validation or test has no samples from `records`"""
+        counts = Counter(self.assignments.get(item['id']) for item in records)
+        empty = [split for split in SPLITS if not counts[split]]
+        if empty:
+            raise ValueError(f"Split manifest '{self.path}' leaves {', '.join(empty)} empty for "
+                             f"{len(records)} samples; add more data or adjust the fractions")
+
+    def select(self, records, splits):
+        """Records belonging to any of `splits`, in their original order"""
+        wanted = set(splits)
+        return [item for item in records if self.assignments.get(item['id']) in wanted]
+
+    def indices(self, records, split):
+        return np.array([i for i, item in enumerate(records) if self.assignments.get(item['id']) == split],
+                        dtype=np.int64)
+
+    def summary(self, records):
+        """Per-stratum counts for each split"""
+        table = defaultdict(Counter)
+        for item in records:
+            split = self.assignments.get(item['id'])
+            if split is not None:
+                table[stratum(item)][split] += 1
+        return {key: {s: table[key][s] for s in SPLITS} for key in sorted(table)}
+
+
+def prepare(data_dir, records, splits=('train', 'validation'), dedup='none'):
+    """Assign any new ids, persist the manifest and return it with the rows of `splits`
+
+    Trainers call this before decoding images so test rows are never read.
+    """
+    groups = duplicates.load_duplicate_groups(data_dir, records) if dedup == 'group' else None
+    manifest = SplitManifest(data_dir).load()
+    added = manifest.assign(records, groups)
+    manifest.check(records)
+    if added:
+        manifest.save()
+        print(f"🧾 Assigned {added} new samples in '{manifest.path}'")
+    rows = manifest.select(records, splits)
+    print(f"🧾 Using {len(rows)} of {len(records)} samples ({', '.join(splits)})")
+    return manifest, rows
+
+
+def split_indices(manifest, records, groups=None, mode='none'):
+    """Train and validation indices into `records` from the manifest
+
+    mode='drop' keeps only the first sample of each duplicate cluster;
+    'group' needs nothing extra because clusters were assigned together.
+    """
+    idx_train = manifest.indices(records, 'train')
+    idx_val = manifest.indices(records, 'validation')
+    if mode == 'drop' and groups is not None:
+        _, first = np.unique(groups, return_index=True)
+        keep = np.zeros(len(records), dtype=bool)
+        keep[first] = True
+        dropped = len(idx_train) + len(idx_val)
+        idx_train, idx_val = idx_train[keep[idx_train]], idx_val[keep[idx_val]]
+        print(f"🧹 Dropped {dropped - len(idx_train) - len(idx_val)} near-duplicate samples")
+    if not len(idx_train) or not len(idx_val):
+        raise ValueError(f"Split manifest gives {len(idx_train)} train and {len(idx_val)} validation samples; "
+                         f"both must be non-empty")
+    return idx_train, idx_val
+
+
+def main():
+    """Create or extend the split manifest and print its balance"""
+    parser = argparse.ArgumentParser(description='Deterministic train/validation/test split manifest')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--fractions', type=lambda v: tuple(float(x) for x in v.split(',')), default=DEFAULT_FRACTIONS,
+                        help='train,validation,test fractions for a new manifest')
+    parser.add_argument('--dedup', choices=duplicates.DEDUP_MODES, default='none',
+                        help="'group' keeps each near-duplicate cluster inside one split")
+    args = parser.parse_args()
+
+    metadata_file = Path(args.data_dir) / 'metadata.json'
+    if not metadata_file.exists():
+        print("❌ No metadata.json found!")
+        return
+    with open(metadata_file, 'r') as f:
+        records = json.load(f)
+
+    manifest = SplitManifest(args.data_dir, fractions=args.fractions).load()
+    groups = duplicates.load_duplicate_groups(args.data_dir, records) if args.dedup == 'group' else None
+    added = manifest.assign(records, groups)
+    manifest.check(records)
+    manifest.save()
+    print(f"✅ {added} new samples assigned, {len(manifest.assignments)} in '{manifest.path}'")
+
+    print(f"\n{'stratum':<28} {'train':>7} {'val':>7} {'test':>7}")
+    for key, row in manifest.summary(records).items():
+        print(f"{key:<28} {row['train']:>7} {row['validation']:>7} {row['test']:>7}")
+    totals = Counter(manifest.assignments.get(item['id']) for item in records)
+    print(f"{'total':<28} {totals['train']:>7} {totals['validation']:>7} {totals['test']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+DEFAULT_BUCKETS = (1, 2, 4, 8, 16, 32)
+
+
+class TracedLabubuModel:
+    """Fixed-signature inference for the two-input classifier
+
+    One concrete function is traced per bucketed batch size at load time
+    and warmed up, and requests are zero-padded to the nearest bucket, so
+    steady-state calls never trigger retracing.
+    """
+
+    def __init__(self, model, buckets=DEFAULT_BUCKETS, image_size=trainer.IMAGE_SIZE, warmup_runs=2):
+        self.model = model
+        self.buckets = tuple(sorted(set(buckets)))
+        self.image_size = image_size
+        self.warmup_runs = warmup_runs
+
+        @tf.function
+        def serve(images, features):
+            authenticity, confidence = self.model([images, features], training=False)
+            return authenticity, confidence
+
+        self._serve = serve
+        self.functions = {}
+        for bucket in self.buckets:
+            self.functions[bucket] = serve.get_concrete_function(
+                tf.TensorSpec((bucket, image_size, image_size, 3), tf.float32, name='image'),
+                tf.TensorSpec((bucket, 7), tf.float32, name='features')
+            )
+        self.warm_up()
+
+    @classmethod
+    def load(cls, model_path='models/labubu_classifier_final.h5', **kwargs):
+        print(f"📦 Loading model from '{model_path}'...")
+        return cls(keras.models.load_model(model_path, compile=False), **kwargs)
+
+    def warm_up(self):
+        """Run every bucket a few times so execution plans are built before serving"""
+        start = time.perf_counter()
+        for bucket, fn in self.functions.items():
+            images = tf.zeros((bucket, self.image_size, self.image_size, 3))
+            features = tf.zeros((bucket, 7))
+            for _ in range(self.warmup_runs):
+                fn(images, features)
+        print(f"🔥 Warmed up {len(self.functions)} buckets {self.buckets} "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    def bucket_for(self, size):
+        """Smallest bucket that fits `size`, or the largest bucket"""
+        for bucket in self.buckets:
+            if bucket >= size:
+                return bucket
+        return self.buckets[-1]
+
+    def predict(self, images, features):
+        """Return (authenticity, confidence) arrays for any number of requests"""
+        images = np.asarray(images, dtype=np.float32)
+        features = np.asarray(features, dtype=np.float32)
+        if images.ndim == 3:
+            images = images[None]
+            features = features[None]
+
+        authenticity = []
+        confidence = []
+        largest = self.buckets[-1]
+        for start in range(0, len(images), largest):
+            chunk_img = images[start:start + largest]
+            chunk_feat = features[start:start + largest]
+            size = len(chunk_img)
+            bucket = self.bucket_for(size)
+
+            if size < bucket:
+                chunk_img = np.concatenate([chunk_img, np.zeros((bucket - size,) + chunk_img.shape[1:], np.float32)])
+                chunk_feat = np.concatenate([chunk_feat, np.zeros((bucket - size, 7), np.float32)])
+
+            auth, conf = self.functions[bucket](tf.constant(chunk_img), tf.constant(chunk_feat))
+            authenticity.append(auth.numpy().reshape(-1)[:size])
+            confidence.append(conf.numpy().reshape(-1)[:size])
+
+        return np.concatenate(authenticity), np.concatenate(confidence)
+
+    def trace_count(self):
+        """Number of traces of the underlying function (constant after load)"""
+        return self._serve.experimental_get_tracing_count()
+
+
+def benchmark(model_path, requests, max_batch, seed=42):
+    """Compare per-request model.predict with the traced bucketed function"""
+    rng = np.random.default_rng(seed)
+    sizes = rng.integers(1, max_batch + 1, requests)
+    size = trainer.IMAGE_SIZE
+    pool_img = rng.random((max_batch, size, size, 3), dtype=np.float32)
+    pool_feat = rng.random((max_batch, 7), dtype=np.float32)
+
+    results = {}
+
+    model = keras.models.load_model(model_path, compile=False)
+    latencies = []
+    for n in sizes:
+        t0 = time.perf_counter()
+        model.predict([pool_img[:n], pool_feat[:n]], verbose=0)
+        latencies.append((time.perf_counter() - t0) * 1000)
+    results['keras_predict'] = latencies
+
+    start = time.perf_counter()
+    traced = TracedLabubuModel.load(model_path, buckets=[b for b in DEFAULT_BUCKETS if b <= max_batch] + [max_batch])
+    load_seconds = time.perf_counter() - start
+    traces_after_load = traced.trace_count()
+    latencies = []
+    for n in sizes:
+        t0 = time.perf_counter()
+        traced.predict(pool_img[:n], pool_feat[:n])
+        latencies.append((time.perf_counter() - t0) * 1000)
+    results['traced_buckets'] = latencies
+
+    summary = {}
+    for name, values in results.items():
+        values = np.array(values)
+        summary[name] = {
+            'first_call_ms': float(values[0]),
+            'p50_ms': float(np.percentile(values, 50)),
+            'p99_ms': float(np.percentile(values, 99)),
+            'max_ms': float(values.max())
+        }
+    summary['traced_buckets']['load_and_warmup_seconds'] = load_seconds
+    summary['traced_buckets']['retraces_while_serving'] = traced.trace_count() - traces_after_load
+
+    print(f"\n{'Mode':<16}{'first ms':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name in results:
+        r = summary[name]
+        print(f"{name:<16}{r['first_call_ms']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['max_ms']:>10.1f}")
+    print(f"\n🔁 Retraces while serving: {summary['traced_buckets']['retraces_while_serving']}")
+    return summary
+
+
+def main():
+    """Benchmark traced bucketed inference against per-request model.predict"""
+    parser = argparse.ArgumentParser(description='Benchmark fixed-signature bucketed inference')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--max-batch', type=int, default=32)
+    parser.add_argument('--output', default='models/traced_inference_benchmark.json')
+    trainer.add_threading_arguments(parser)
+    args = parser.parse_args()
+
+    trainer.configure_threading(
+        args.intra_op_threads, args.inter_op_threads,
+        profile='inference', config_file=args.threading_config
+    )
+
+    if not Path(args.model).exists():
+        print(f"❌ No trained model found at '{args.model}'")
+        return
+
+    summary = benchmark(args.model, args.requests, args.max_batch)
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(summary, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
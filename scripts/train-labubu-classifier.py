@@ -1,69 +1,521 @@
 import os
 import json
+import time
+import random
+import shutil
+import argparse
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 import cv2
-from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix
-import matplotlib.pyplot as plt
 from pathlib import Path
 
+from script_loader import load_script
+
+evaluation = load_script('evaluation-report')
+duplicates = load_script('perceptual-hash')
+snapshot = load_script('dataset-snapshot')
+plots = load_script('render-training-plots')
+split_manifest = load_script('split-manifest')
+decoding = load_script('image-decoding')
+
+IMAGE_SIZE = 224
+# Snapshot columns read by load_records(), the feature vector and the evaluation report
+RECORD_COLUMNS = ('id', 'filename', 'series', 'variant', 'authenticity',
+                  'metadata.angle', 'metadata.quality', 'metadata.lighting', 'metadata.background',
+                  'features.paintQuality', 'features.sculptDetails', 'features.packagingAuth',
+                  'features.materialTexture')
+THREADING_CONFIG_FILE = 'models/threading_config.json'
+
+
+def configure_threading(intra_op_threads=None, inter_op_threads=None, decode_workers=None,
+                        profile='training', config_file=THREADING_CONFIG_FILE):
+    """Set TensorFlow thread pools from explicit values or the auto-tuned config file
+
+    Explicit arguments win over the file. Must run before TensorFlow
+    executes any op, so call it first thing in main().
+    """
+    settings = {}
+    if config_file and Path(config_file).exists():
+        with open(config_file, 'r') as f:
+            settings = json.load(f).get(profile, {})
+        print(f"🧵 Loaded {profile} threading config from '{config_file}'")
+
+    overrides = {
+        'intra_op_threads': intra_op_threads,
+        'inter_op_threads': inter_op_threads,
+        'decode_workers': decode_workers,
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+
+    if settings.get('intra_op_threads'):
+        tf.config.threading.set_intra_op_parallelism_threads(settings['intra_op_threads'])
+    if settings.get('inter_op_threads'):
+        tf.config.threading.set_inter_op_parallelism_threads(settings['inter_op_threads'])
+
+    if settings:
+        print(f"🧵 Threads: intra-op {settings.get('intra_op_threads', 'default')}, "
+              f"inter-op {settings.get('inter_op_threads', 'default')}, "
+              f"decode workers {settings.get('decode_workers', 1)}")
+    return settings
+
+
+def add_threading_arguments(parser):
+    """Add the shared thread-pool CLI flags to an argument parser"""
+    parser.add_argument('--intra-op-threads', type=int, default=None,
+                        help='Threads used inside a single TensorFlow op')
+    parser.add_argument('--inter-op-threads', type=int, default=None,
+                        help='TensorFlow ops allowed to run concurrently')
+    parser.add_argument('--threading-config', default=THREADING_CONFIG_FILE,
+                        help='Auto-tuned config file, used for any flag not given')
+    return parser
+
+
+def add_split_arguments(parser):
+    """Add the flags that decide which rows the model trains and validates on"""
+    parser.add_argument('--dedup', choices=duplicates.DEDUP_MODES, default='none',
+                        help="Drop near-duplicates or keep each duplicate cluster on one side of the split")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="Train on matching records only, e.g. status=approved or 'series=Series 1,Series 2'")
+    parser.add_argument('--split', choices=split_manifest.SPLIT_MODES, default='random',
+                        help="'manifest' uses the persisted per-sample assignments from split-manifest.py")
+    return parser
+
+
+def preprocess_image(img, size=IMAGE_SIZE):
+    """Convert a decoded BGR image into the normalized RGB model input"""
+    img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+    img = cv2.resize(img, (size, size))
+    return img.astype(np.float32) / 255.0
+
+
+# JPEG header parsing and reduced decoding are shared with the feature and hash scripts
+REDUCED_DECODE_FLAGS = decoding.REDUCED_DECODE_FLAGS
+JPEG_SOF_MARKERS = decoding.JPEG_SOF_MARKERS
+read_jpeg_size = decoding.read_jpeg_size
+
+
+def choose_decode_scale(width, height, size=IMAGE_SIZE):
+    """Pick the largest libjpeg reduction that keeps both sides at least `size` px"""
+    return decoding.choose_decode_scale(width, height, size)
+
+
+def read_image(path, reduced=False, size=IMAGE_SIZE):
+    """Decode an image, optionally at 1/2, 1/4 or 1/8 scale for JPEGs"""
+    return decoding.read_image(path, reduced=reduced, size=size)
+
+
+def resize_images(images, size):
+    """Resize a batch of preprocessed images to size x size"""
+    if images.shape[1] == size and images.shape[2] == size:
+        return images
+    return np.stack([cv2.resize(img, (size, size), interpolation=cv2.INTER_AREA) for img in images])
+
+
+def parse_schedule(value):
+    """Parse a progressive-resizing schedule like '10:128,10:160,80:224'"""
+    schedule = []
+    for stage in value.split(','):
+        epochs, resolution = stage.split(':')
+        schedule.append((int(epochs), int(resolution)))
+    return schedule
+
+
+def build_feature_vector(item):
+    """Build the 7-value manual feature vector from a metadata record"""
+    return [
+        item['features']['paintQuality'] / 100,
+        item['features']['sculptDetails'] / 100,
+        item['features']['packagingAuth'] / 100,
+        item['features']['materialTexture'] / 100,
+        1 if item['metadata']['quality'] == 'high' else 0.5,
+        1 if item['metadata']['lighting'] == 'natural' else 0.5,
+        1 if item['metadata']['background'] == 'clean' else 0.5
+    ]
+
+
+class ImageIndex:
+    """In-memory listing of the per-class image directories
+
+    Each class directory is listed with a single os.scandir pass instead of
+    one exists() stat per metadata record. The listing is cached together
+    with the directory mtimes, so an unchanged dataset skips the scan.
+    """
+
+    def __init__(self, images_dir, cache_file=None):
+        self.images_dir = Path(images_dir)
+        self.cache_file = Path(cache_file) if cache_file else self.images_dir.parent / '.image_index.json'
+        self.files = {}
+        self.from_cache = False
+
+    def _dir_mtimes(self):
+        mtimes = {'.': os.stat(self.images_dir).st_mtime_ns}
+        with os.scandir(self.images_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    mtimes[entry.name] = entry.stat().st_mtime_ns
+        return mtimes
+
+    def load(self):
+        """Return {class_name: set(filenames)}, rescanning only changed directories"""
+        if not self.images_dir.exists():
+            self.files = {}
+            return self.files
+
+        mtimes = self._dir_mtimes()
+        cached = {}
+        if self.cache_file.exists():
+            try:
+                with open(self.cache_file, 'r') as f:
+                    cached = json.load(f)
+            except (OSError, ValueError):
+                cached = {}
+
+        cached_dirs = cached.get('dirs', {})
+        self.files = {}
+        rescanned = False
+        for name, mtime in mtimes.items():
+            if name == '.':
+                continue
+            entry = cached_dirs.get(name)
+            if entry and entry['mtime_ns'] == mtime:
+                self.files[name] = set(entry['files'])
+                continue
+            with os.scandir(self.images_dir / name) as entries:
+                self.files[name] = {e.name for e in entries if e.is_file()}
+            rescanned = True
+
+        self.from_cache = not rescanned and set(cached_dirs) == set(self.files)
+        if not self.from_cache:
+            self._save(mtimes)
+        return self.files
+
+    def _save(self, mtimes):
+        data = {
+            'dirs': {
+                name: {'mtime_ns': mtimes[name], 'files': sorted(files)}
+                for name, files in self.files.items()
+            }
+        }
+        try:
+            with open(self.cache_file, 'w') as f:
+                json.dump(data, f)
+        except OSError as e:
+            print(f"⚠️ Could not write image index cache: {e}")
+
+    def resolve(self, metadata):
+        """Split records into (present, missing) and list orphaned image files"""
+        files = self.load()
+        present = []
+        missing = []
+        referenced = {}
+
+        for item in metadata:
+            class_files = files.get(item['authenticity'], ())
+            if item['filename'] in class_files:
+                present.append(item)
+                referenced.setdefault(item['authenticity'], set()).add(item['filename'])
+            else:
+                missing.append(item)
+
+        orphaned = sorted(
+            f"{name}/{filename}"
+            for name, class_files in files.items()
+            for filename in class_files - referenced.get(name, set())
+        )
+        return present, missing, orphaned
+
+
+class EpochTimer(keras.callbacks.Callback):
+    """Add wall-clock seconds since the run started to the epoch logs
+
+    `origin` is a time.perf_counter() value taken when train() began, so
+    data loading, model rebuilds between stages and resizing are counted,
+    not just the epochs themselves.
+    """
+
+    def __init__(self, start_seconds=0.0, origin=None):
+        super().__init__()
+        self.start_seconds = start_seconds
+        self.origin = time.perf_counter() if origin is None else origin
+
+    def on_epoch_end(self, epoch, logs=None):
+        if logs is not None:
+            logs['elapsed_seconds'] = self.start_seconds + time.perf_counter() - self.origin
+
+
+class RunEarlyStopping(keras.callbacks.EarlyStopping):
+    """EarlyStopping that restores the best weights once per run, not once per fit
+
+    Progressive training calls fit once per resolution stage, and Keras
+    restores the best weights at the end of every fit. Until the last
+    stage (or an actual early stop) the weights are left as they are.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.final_stage = True
+
+    def on_train_end(self, logs=None):
+        if self.final_stage or self.stopped_epoch > 0:
+            super().on_train_end(logs)
+
+
+def time_to_accuracy(history, target, metric='val_authenticity_accuracy'):
+    """Return (epoch, seconds) when `metric` first reached `target`, or None"""
+    for epoch, value in enumerate(history.get(metric, [])):
+        if value >= target:
+            return epoch + 1, history['elapsed_seconds'][epoch]
+    return None
+
+
+class ResumableTrainingCheckpoint(keras.callbacks.Callback):
+    """Persist everything needed to continue a run exactly where it stopped
+
+    Saves weights and optimizer slots, the epoch number, learning rate,
+    EarlyStopping / ReduceLROnPlateau / ModelCheckpoint counters and the
+    Python, NumPy and TensorFlow RNG state every `interval` epochs.
+    """
+
+    CALLBACK_STATE = {
+        'EarlyStopping': ['wait', 'stopped_epoch', 'best', 'best_epoch'],
+        'RunEarlyStopping': ['wait', 'stopped_epoch', 'best', 'best_epoch'],
+        'ReduceLROnPlateau': ['wait', 'best', 'cooldown_counter'],
+        'ModelCheckpoint': ['best'],
+    }
+
+    def __init__(self, state_dir='models/checkpoints', interval=1, tracked_callbacks=None, resume_state=None):
+        super().__init__()
+        self.state_dir = Path(state_dir)
+        self.interval = max(1, interval)
+        self.tracked_callbacks = tracked_callbacks or []
+        self.resume_state = resume_state
+        self.history = resume_state['history'] if resume_state else {}
+        self.carried = None
+
+    @classmethod
+    def load_state(cls, state_dir):
+        """Return the saved state dict, or None if there is nothing to resume"""
+        state_file = Path(state_dir) / 'training_state.json'
+        if not state_file.exists():
+            return None
+        with open(state_file, 'r') as f:
+            return json.load(f)
+
+    @staticmethod
+    def restore_model(model, state_dir):
+        """Load saved weights and optimizer slots into a freshly compiled model"""
+        state_dir = Path(state_dir)
+        optimizer = model.optimizer
+        optimizer.build(model.trainable_variables)
+        model.load_weights(state_dir / 'model.weights.h5')
+
+        with np.load(state_dir / 'optimizer.npz') as data:
+            saved = [data[f'arr_{i}'] for i in range(len(data.files))]
+        if len(saved) != len(optimizer.variables):
+            raise ValueError(
+                f"Saved optimizer has {len(saved)} variables but the model expects {len(optimizer.variables)}"
+            )
+        for variable, value in zip(optimizer.variables, saved):
+            variable.assign(value)
+
+    @staticmethod
+    def _to_json(value):
+        if isinstance(value, (np.floating, np.integer)):
+            return value.item()
+        return value
+
+    def carry_over(self):
+        """Hand the tracked callbacks' state to the next fit of the same run
+
+        Keras callbacks reset themselves in on_train_begin, so without this
+        every progressive stage would start with fresh patience counters,
+        best values and best weights.
+        """
+        self.carried = []
+        for callback in self.tracked_callbacks:
+            attrs = list(self.CALLBACK_STATE.get(type(callback).__name__, []))
+            if isinstance(callback, keras.callbacks.EarlyStopping):
+                attrs.append('best_weights')
+            self.carried.append((callback, {attr: getattr(callback, attr) for attr in attrs
+                                            if hasattr(callback, attr)}))
+
+    def on_train_begin(self, logs=None):
+        # Runs after the tracked callbacks reset themselves, so restored values stick
+        if self.carried:
+            for callback, attrs in self.carried:
+                for attr, value in attrs.items():
+                    setattr(callback, attr, value)
+            self.carried = None
+            return
+        if not self.resume_state:
+            return
+
+        for callback in self.tracked_callbacks:
+            saved = self.resume_state['callbacks'].get(type(callback).__name__, {})
+            for attr, value in saved.items():
+                setattr(callback, attr, value)
+            if isinstance(callback, keras.callbacks.EarlyStopping):
+                best_weights_file = self.state_dir / 'early_stopping_best.npz'
+                if best_weights_file.exists():
+                    with np.load(best_weights_file) as data:
+                        callback.best_weights = [data[f'arr_{i}'] for i in range(len(data.files))]
+
+        self.model.optimizer.learning_rate.assign(self.resume_state['learning_rate'])
+
+        rng = self.resume_state['rng']
+        random.setstate((rng['python'][0], tuple(rng['python'][1]), rng['python'][2]))
+        np.random.set_state((rng['numpy'][0], np.array(rng['numpy'][1], dtype=np.uint32), *rng['numpy'][2:]))
+        tf.random.get_global_generator().state.assign(np.array(rng['tensorflow'], dtype=np.int64))
+
+        print(f"♻️ Resumed after epoch {self.resume_state['epoch'] + 1}")
+
+    def on_epoch_end(self, epoch, logs=None):
+        for key, value in (logs or {}).items():
+            self.history.setdefault(key, []).append(float(value))
+
+        if (epoch + 1) % self.interval == 0:
+            self.save(epoch)
+
+    def on_train_end(self, logs=None):
+        if self.history:
+            epochs_run = len(next(iter(self.history.values())))
+            self.save(epochs_run - 1, completed=bool(self.model.stop_training))
+
+    def save(self, epoch, completed=False):
+        """Write the state to a temporary directory and swap it in atomically"""
+        tmp_dir = self.state_dir.with_name(self.state_dir.name + '.tmp')
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+
+        self.model.save_weights(tmp_dir / 'model.weights.h5')
+        np.savez(tmp_dir / 'optimizer.npz', *[np.asarray(v) for v in self.model.optimizer.variables])
+
+        callbacks_state = {}
+        for callback in self.tracked_callbacks:
+            attrs = self.CALLBACK_STATE.get(type(callback).__name__, [])
+            callbacks_state[type(callback).__name__] = {
+                attr: self._to_json(getattr(callback, attr)) for attr in attrs if hasattr(callback, attr)
+            }
+            if isinstance(callback, keras.callbacks.EarlyStopping) and callback.best_weights is not None:
+                np.savez(tmp_dir / 'early_stopping_best.npz', *callback.best_weights)
+
+        python_state = random.getstate()
+        numpy_state = np.random.get_state()
+        state = {
+            'epoch': epoch,
+            'completed': completed,
+            'learning_rate': float(np.asarray(self.model.optimizer.learning_rate)),
+            'callbacks': callbacks_state,
+            'history': self.history,
+            'rng': {
+                'python': [python_state[0], list(python_state[1]), python_state[2]],
+                'numpy': [numpy_state[0], numpy_state[1].tolist(), *[self._to_json(v) for v in numpy_state[2:]]],
+                'tensorflow': tf.random.get_global_generator().state.numpy().tolist()
+            }
+        }
+        with open(tmp_dir / 'training_state.json', 'w') as f:
+            json.dump(state, f)
+
+        shutil.rmtree(self.state_dir, ignore_errors=True)
+        tmp_dir.rename(self.state_dir)
+
+
 class LabubuClassifier:
-    def __init__(self, data_dir='./training-data'):
+    def __init__(self, data_dir='./training-data', reduced_decode=False, decode_workers=1, dedup='none',
+                 filters=None, plot_mode='background', split='random'):
         self.data_dir = Path(data_dir)
         self.images_dir = self.data_dir / 'images'
         self.metadata_file = self.data_dir / 'metadata.json'
         self.model = None
         self.class_names = ['authentic', 'fake']
-        
+        self.records = []
+        # Decode JPEGs at the smallest DCT scale that still covers the model input
+        self.reduced_decode = reduced_decode
+        # Threads decoding images in parallel (OpenCV releases the GIL)
+        self.decode_workers = decode_workers
+        # How near-duplicate clusters from perceptual-hash.py are handled when splitting
+        self.dedup = dedup
+        # Row filters such as {'status': 'approved'}, pushed down to the columnar snapshot
+        self.filters = filters or {}
+        # Render plots in a detached process ('background'), in-process ('inline') or not at all ('none')
+        self.plot_mode = plot_mode
+        # 'random' re-splits every run; 'manifest' keeps each sample id in its persisted split
+        self.split = split
+        self.splits = None
+        
+    def load_records(self):
+        """Metadata records that have an image on disk, after filters and the split manifest"""
+        # Load metadata (from the columnar snapshot when one is up to date)
+        metadata = snapshot.load_records(self.data_dir, self.filters, RECORD_COLUMNS)
+        if self.split == 'manifest':
+            # Held-out test rows are never decoded
+            self.splits, metadata = split_manifest.prepare(self.data_dir, metadata, dedup=self.dedup)
+        
+        # Resolve which records have images with one directory scan per class
+        index = ImageIndex(self.images_dir)
+        present, missing, orphaned = index.resolve(metadata)
+        source = "cached index" if index.from_cache else "directory scan"
+        print(f"🗂️ {len(present)} images found via {source} | "
+              f"{len(missing)} missing | {len(orphaned)} orphaned files")
+        return present
+    
     def load_dataset(self):
         """Load and preprocess the training dataset"""
         print("📂 Loading dataset...")
-        
-        # Load metadata
-        with open(self.metadata_file, 'r') as f:
-            metadata = json.load(f)
+        present = self.load_records()
         
         images = []
         labels = []
         features = []
+        self.records = []
         
-        for item in metadata:
+        def load_image(item):
             img_path = self.images_dir / item['authenticity'] / item['filename']
+            return preprocess_image(read_image(img_path, reduced=self.reduced_decode))
+        
+        if self.decode_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.decode_workers) as pool:
+                decoded = list(pool.map(load_image, present))
+        else:
+            decoded = map(load_image, present)
+        
+        for item, img in zip(present, decoded):
+            # Load and preprocess image
+            images.append(img)
+            labels.append(1 if item['authenticity'] == 'authentic' else 0)
             
-            if img_path.exists():
-                # Load and preprocess image
-                img = cv2.imread(str(img_path))
-                img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-                img = cv2.resize(img, (224, 224))
-                img = img.astype(np.float32) / 255.0
-                
-                images.append(img)
-                labels.append(1 if item['authenticity'] == 'authentic' else 0)
-                
-                # Extract manual features for ensemble learning
-                feature_vector = [
-                    item['features']['paintQuality'] / 100,
-                    item['features']['sculptDetails'] / 100,
-                    item['features']['packagingAuth'] / 100,
-                    item['features']['materialTexture'] / 100,
-                    1 if item['metadata']['quality'] == 'high' else 0.5,
-                    1 if item['metadata']['lighting'] == 'natural' else 0.5,
-                    1 if item['metadata']['background'] == 'clean' else 0.5
-                ]
-                features.append(feature_vector)
+            # Extract manual features for ensemble learning
+            features.append(build_feature_vector(item))
+            self.records.append(item)
         
         print(f"✅ Loaded {len(images)} images")
         return np.array(images), np.array(labels), np.array(features)
     
-    def create_model(self):
+    def split_indices(self, labels):
+        """Train and validation indices into the loaded dataset
+
+        Anything evaluated against this model (distilled students, quantized
+        exports) must use this too, so it never scores rows the model trained on.
+        """
+        groups = None
+        if self.dedup != 'none':
+            groups = duplicates.load_duplicate_groups(self.data_dir, self.records)
+            if groups is None:
+                print("⚠️ No duplicates.json found, run perceptual-hash.py first; using a plain split")
+        if self.split == 'manifest':
+            return split_manifest.split_indices(self.splits, self.records, groups, self.dedup)
+        return duplicates.split_indices(labels, groups, self.dedup, test_size=0.2, random_state=42)
+    
+    def create_model(self, image_size=IMAGE_SIZE):
         """Create a multi-input CNN model"""
-        print("🏗️ Creating model architecture...")
+        print(f"🏗️ Creating model architecture ({image_size}x{image_size})...")
         
         # Image input branch
-        image_input = keras.Input(shape=(224, 224, 3), name='image')
+        image_input = keras.Input(shape=(image_size, image_size, 3), name='image')
         
         # Use pre-trained EfficientNetB0 as backbone
         backbone = keras.applications.EfficientNetB0(
@@ -117,9 +569,48 @@ class LabubuClassifier:
         print("✅ Model created")
         return self.model
     
-    def train(self, epochs=50, batch_size=32):
-        """Train the model"""
+    def resize_model(self, image_size):
+        """Rebuild the model at a new input resolution, keeping weights and optimizer state"""
+        old_model = self.model
+        self.create_model(image_size=image_size)
+        self.model.set_weights(old_model.get_weights())
+        
+        if old_model.optimizer.built:
+            self.model.optimizer.build(self.model.trainable_variables)
+            for new_var, old_var in zip(self.model.optimizer.variables, old_model.optimizer.variables):
+                new_var.assign(old_var)
+            self.model.optimizer.learning_rate.assign(old_model.optimizer.learning_rate)
+        return self.model
+    
+    def train(self, epochs=50, batch_size=32, resume=False, checkpoint_dir='models/checkpoints',
+              checkpoint_interval=1, schedule=None, target_accuracy=None,
+              best_model_path='models/labubu_classifier_best.h5', report_path='models/evaluation_report_cnn.json'):
+        """Train the model, optionally resuming from the last saved training state
+
+        `schedule` enables progressive resizing: a list of (epochs, resolution)
+        stages, e.g. [(10, 128), (10, 160), (80, 224)]. The last stage must
+        train at full resolution so the saved model matches inference.
+        """
         print("🚀 Starting training...")
+        run_start = time.perf_counter()
+        
+        if schedule:
+            if schedule[-1][1] != IMAGE_SIZE:
+                raise ValueError(f"The last progressive stage must train at {IMAGE_SIZE} px")
+            epochs = sum(stage_epochs for stage_epochs, _ in schedule)
+        else:
+            schedule = [(epochs, IMAGE_SIZE)]
+        
+        resume_state = None
+        if resume:
+            resume_state = ResumableTrainingCheckpoint.load_state(checkpoint_dir)
+            if resume_state is None:
+                print(f"⚠️ No training state in '{checkpoint_dir}', starting from epoch 1")
+            elif resume_state['completed'] or resume_state['epoch'] + 1 >= epochs:
+                print("✅ Saved run already finished, nothing to resume")
+                self.create_model()
+                ResumableTrainingCheckpoint.restore_model(self.model, checkpoint_dir)
+                return None
         
         # Load data
         images, labels, features = self.load_dataset()
@@ -131,10 +622,12 @@ class LabubuClassifier:
         # Create confidence labels (higher for clear authentic/fake cases)
         confidence_labels = np.abs(labels - 0.5) * 2  # Convert to 0-1 confidence
         
-        # Split data
-        X_img_train, X_img_val, X_feat_train, X_feat_val, y_auth_train, y_auth_val, y_conf_train, y_conf_val = train_test_split(
-            images, features, labels, confidence_labels, test_size=0.2, random_state=42, stratify=labels
-        )
+        # Split data (indices keep track of each sample's metadata record)
+        idx_train, idx_val = self.split_indices(labels)
+        X_img_train, X_img_val = images[idx_train], images[idx_val]
+        X_feat_train, X_feat_val = features[idx_train], features[idx_val]
+        y_auth_train, y_auth_val = labels[idx_train], labels[idx_val]
+        y_conf_train, y_conf_val = confidence_labels[idx_train], confidence_labels[idx_val]
         
         print(f"📊 Training set: {len(X_img_train)} samples")
         print(f"📊 Validation set: {len(X_img_val)} samples")
@@ -150,36 +643,87 @@ class LabubuClassifier:
         )
         
         # Callbacks
+        previous_elapsed = resume_state['history'].get('elapsed_seconds', [0.0])[-1] if resume_state else 0.0
+        early_stopping = RunEarlyStopping(patience=10, restore_best_weights=True)
+        best_checkpoint = keras.callbacks.ModelCheckpoint(
+            best_model_path,
+            save_best_only=True,
+            monitor='val_authenticity_accuracy',
+            mode='max'
+        )
         callbacks = [
-            keras.callbacks.EarlyStopping(patience=10, restore_best_weights=True),
+            EpochTimer(previous_elapsed, origin=run_start),
+            early_stopping,
             keras.callbacks.ReduceLROnPlateau(factor=0.5, patience=5),
-            keras.callbacks.ModelCheckpoint(
-                'models/labubu_classifier_best.h5',
-                save_best_only=True,
-                monitor='val_authenticity_accuracy'
-            )
+            best_checkpoint
         ]
+        # Must come last so it restores the other callbacks after they reset
+        checkpoint = ResumableTrainingCheckpoint(
+            checkpoint_dir, interval=checkpoint_interval, tracked_callbacks=list(callbacks),
+            resume_state=resume_state
+        )
+        callbacks.append(checkpoint)
         
         # Create model if not exists
+        initial_epoch = 0
         if self.model is None:
             self.create_model()
+        if resume_state is not None:
+            ResumableTrainingCheckpoint.restore_model(self.model, checkpoint_dir)
+            initial_epoch = resume_state['epoch'] + 1
+        
+        # Train, one fit per resolution stage; callback state carries over between them
+        stage_start = 0
+        for stage, (stage_epochs, resolution) in enumerate(schedule):
+            stage_end = stage_start + stage_epochs
+            if stage_end <= initial_epoch:
+                stage_start = stage_end
+                continue
+            
+            if self.model.input_shape[0][1] != resolution:
+                print(f"📐 Stage at {resolution}x{resolution} for epochs {stage_start + 1}-{stage_end}")
+                self.resize_model(resolution)
+            early_stopping.final_stage = stage == len(schedule) - 1
+            # The best-model file must match the inference input, so only full-resolution epochs compete
+            stage_callbacks = [c for c in callbacks if c is not best_checkpoint or resolution == IMAGE_SIZE]
+            
+            history = self.model.fit(
+                [resize_images(X_img_train, resolution), X_feat_train],
+                {'authenticity': y_auth_train, 'confidence': y_conf_train},
+                validation_data=(
+                    [resize_images(X_img_val, resolution), X_feat_val],
+                    {'authenticity': y_auth_val, 'confidence': y_conf_val}
+                ),
+                epochs=stage_end,
+                initial_epoch=max(stage_start, initial_epoch),
+                batch_size=batch_size,
+                callbacks=stage_callbacks,
+                verbose=1
+            )
+            # Only the first fit after a resume restores saved state
+            checkpoint.resume_state = None
+            checkpoint.carry_over()
+            stage_start = stage_end
+            
+            if self.model.stop_training:
+                break
         
-        # Train
-        history = self.model.fit(
-            [X_img_train, X_feat_train],
-            {'authenticity': y_auth_train, 'confidence': y_conf_train},
-            validation_data=(
-                [X_img_val, X_feat_val],
-                {'authenticity': y_auth_val, 'confidence': y_conf_val}
-            ),
-            epochs=epochs,
-            batch_size=batch_size,
-            callbacks=callbacks,
-            verbose=1
-        )
+        if self.model.input_shape[0][1] != IMAGE_SIZE:
+            self.resize_model(IMAGE_SIZE)
+        
+        # Include the epochs from before the resume in the plotted history
+        history.history = checkpoint.history
+        
+        if target_accuracy is not None:
+            reached = time_to_accuracy(history.history, target_accuracy)
+            if reached:
+                print(f"⏱️ Reached {target_accuracy:.1%} val accuracy at epoch {reached[0]} after {reached[1]:.1f}s")
+            else:
+                print(f"⏱️ Did not reach {target_accuracy:.1%} val accuracy")
         
         # Evaluate
-        self.evaluate_model(X_img_val, X_feat_val, y_auth_val)
+        self.evaluate_model(X_img_val, X_feat_val, y_auth_val, [self.records[i] for i in idx_val],
+                            report_path=report_path)
         
         # Plot training history
         self.plot_training_history(history)
@@ -187,8 +731,9 @@ class LabubuClassifier:
         print("✅ Training completed!")
         return history
     
-    def evaluate_model(self, X_img_val, X_feat_val, y_auth_val):
-        """Evaluate model performance"""
+    def evaluate_model(self, X_img_val, X_feat_val, y_auth_val, records_val=None,
+                       report_path='models/evaluation_report_cnn.json'):
+        """Evaluate model performance, broken down by series, variant, angle and lighting"""
         print("📊 Evaluating model...")
         
         predictions = self.model.predict([X_img_val, X_feat_val])
@@ -202,50 +747,63 @@ class LabubuClassifier:
         print(cm)
         
         # Calculate accuracy by series (if metadata available)
+        if records_val is not None:
+            report = evaluation.build_report(records_val, y_auth_val, predictions[0])
+            evaluation.print_report(report, 'series')
+            evaluation.write_report(report, report_path)
+        
         accuracy = np.mean(auth_pred == y_auth_val)
         print(f"\n🎯 Overall Accuracy: {accuracy:.3f}")
     
     def plot_training_history(self, history):
-        """Plot training metrics"""
-        fig, axes = plt.subplots(2, 2, figsize=(12, 10))
-        
-        # Authenticity accuracy
-        axes[0, 0].plot(history.history['authenticity_accuracy'], label='Train')
-        axes[0, 0].plot(history.history['val_authenticity_accuracy'], label='Val')
-        axes[0, 0].set_title('Authenticity Accuracy')
-        axes[0, 0].legend()
-        
-        # Authenticity loss
-        axes[0, 1].plot(history.history['authenticity_loss'], label='Train')
-        axes[0, 1].plot(history.history['val_authenticity_loss'], label='Val')
-        axes[0, 1].set_title('Authenticity Loss')
-        axes[0, 1].legend()
-        
-        # Confidence MAE
-        axes[1, 0].plot(history.history['confidence_mae'], label='Train')
-        axes[1, 0].plot(history.history['val_confidence_mae'], label='Val')
-        axes[1, 0].set_title('Confidence MAE')
-        axes[1, 0].legend()
-        
-        # Total loss
-        axes[1, 1].plot(history.history['loss'], label='Train')
-        axes[1, 1].plot(history.history['val_loss'], label='Val')
-        axes[1, 1].set_title('Total Loss')
-        axes[1, 1].legend()
-        
-        plt.tight_layout()
-        plt.savefig('training_history.png', dpi=300, bbox_inches='tight')
-        plt.show()
-        
-        print("📊 Training plots saved as 'training_history.png'")
+        """Plot training metrics without blocking on rendering"""
+        try:
+            plots.submit('history', {'history': history.history}, 'training_history.png', mode=self.plot_mode)
+            if self.plot_mode == 'background':
+                print("📊 Rendering training plots to 'training_history.png' in the background")
+            elif self.plot_mode == 'inline':
+                print("📊 Training plots saved as 'training_history.png'")
+        except Exception as e:
+            print(f"⚠️ Could not generate plots: {e}")
 
 def main():
     """Main training function"""
+    parser = argparse.ArgumentParser(description='Train the Labubu CNN classifier')
+    parser.add_argument('--epochs', type=int, default=100)
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--resume', action='store_true', help='Continue from the last saved training state')
+    parser.add_argument('--checkpoint-dir', default='models/checkpoints')
+    parser.add_argument('--checkpoint-interval', type=int, default=1, help='Save training state every N epochs')
+    parser.add_argument('--progressive', type=parse_schedule, default=None,
+                        help="Progressive resizing stages as epochs:resolution, e.g. '10:128,10:160,80:224'")
+    parser.add_argument('--target-accuracy', type=float, default=None,
+                        help='Report the time taken to reach this validation accuracy')
+    parser.add_argument('--reduced-decode', action='store_true',
+                        help='Decode JPEGs at 1/2, 1/4 or 1/8 scale when that still covers 224 px')
+    parser.add_argument('--decode-workers', type=int, default=None, help='Parallel image decoding threads')
+    add_split_arguments(parser)
+    parser.add_argument('--plots', choices=plots.PLOT_MODES, default='background',
+                        help="Render training plots in a detached process, in-process, or skip them")
+    add_threading_arguments(parser)
+    args = parser.parse_args()
+    
+    threading_settings = configure_threading(
+        args.intra_op_threads, args.inter_op_threads, args.decode_workers,
+        profile='training', config_file=args.threading_config
+    )
+    
     # Create models directory
     os.makedirs('models', exist_ok=True)
     
     # Initialize and train classifier
-    classifier = LabubuClassifier()
+    classifier = LabubuClassifier(
+        reduced_decode=args.reduced_decode,
+        decode_workers=threading_settings.get('decode_workers', 1),
+        dedup=args.dedup,
+        filters=snapshot.parse_filters(args.filter),
+        plot_mode=args.plots,
+        split=args.split
+    )
     
     # Check if training data exists
     if not classifier.metadata_file.exists():
@@ -254,7 +812,15 @@ def main():
         return
     
     # Train the model
-    classifier.train(epochs=100, batch_size=16)
+    classifier.train(
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        resume=args.resume,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_interval=args.checkpoint_interval,
+        schedule=args.progressive,
+        target_accuracy=args.target_accuracy
+    )
     
     # Save final model
     classifier.model.save('models/labubu_classifier_final.h5')
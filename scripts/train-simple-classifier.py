@@ -1,21 +1,45 @@
 import os
 import json
+import argparse
 import numpy as np
 from pathlib import Path
-import matplotlib.pyplot as plt
-from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 import joblib
 
+from script_loader import load_script
+
+evaluation = load_script('evaluation-report')
+duplicates = load_script('perceptual-hash')
+snapshot = load_script('dataset-snapshot')
+plots = load_script('render-training-plots')
+split_manifest = load_script('split-manifest')
+
+# Snapshot columns read by load_dataset() and the evaluation report
+RECORD_COLUMNS = ('id', 'series', 'variant', 'authenticity',
+                  'metadata.angle', 'metadata.quality', 'metadata.lighting', 'metadata.background',
+                  'features.paintQuality', 'features.sculptDetails', 'features.packagingAuth',
+                  'features.materialTexture')
+
 class SimpleLabubuClassifier:
-    def __init__(self, data_dir='./training-data'):
+    def __init__(self, data_dir='./training-data', dedup='none', filters=None, plot_mode='background',
+                 split='random'):
         self.data_dir = Path(data_dir)
         self.metadata_file = self.data_dir / 'metadata.json'
         self.model = None
         self.scaler = StandardScaler()
         self.label_encoder = LabelEncoder()
+        self.records = []
+        # How near-duplicate clusters from perceptual-hash.py are handled when splitting
+        self.dedup = dedup
+        # Row filters such as {'status': 'approved'}, pushed down to the columnar snapshot
+        self.filters = filters or {}
+        # Render plots in a detached process ('background'), in-process ('inline') or not at all ('none')
+        self.plot_mode = plot_mode
+        # 'random' re-splits every run; 'manifest' keeps each sample id in its persisted split
+        self.split = split
+        self.splits = None
         
     def load_dataset(self):
         """Load the training dataset from metadata"""
@@ -31,8 +55,11 @@ class SimpleLabubuClassifier:
             print("   npx tsx scripts/generate-sample-training-data.ts")
             return None, None
         
-        with open(self.metadata_file, 'r') as f:
-            metadata = json.load(f)
+        # Read from the columnar snapshot when one is up to date
+        metadata = snapshot.load_records(self.data_dir, self.filters, RECORD_COLUMNS)
+        if self.split == 'manifest':
+            # Held-out test rows are left out; the validation split is the evaluation set
+            self.splits, metadata = split_manifest.prepare(self.data_dir, metadata, dedup=self.dedup)
         
         if len(metadata) == 0:
             print("❌ No training data found in metadata!")
@@ -41,6 +68,7 @@ class SimpleLabubuClassifier:
             return None, None
         
         print(f"📊 Found {len(metadata)} training samples")
+        self.records = metadata
         
         # Extract features and labels
         features = []
@@ -83,28 +111,24 @@ class SimpleLabubuClassifier:
             print("❌ No training data available!")
             return None
         
-        # Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
+        # Split data (indices keep track of each sample's metadata record)
+        groups = None
+        if self.dedup != 'none':
+            groups = duplicates.load_duplicate_groups(self.data_dir, self.records)
+            if groups is None:
+                print("⚠️ No duplicates.json found, run perceptual-hash.py first; using a plain split")
+        if self.split == 'manifest':
+            idx_train, idx_test = split_manifest.split_indices(self.splits, self.records, groups, self.dedup)
+        else:
+            idx_train, idx_test = duplicates.split_indices(y, groups, self.dedup, test_size=0.2, random_state=42)
+        X_train, X_test, y_train, y_test = X[idx_train], X[idx_test], y[idx_train], y[idx_test]
         
         print(f"📊 Training set: {len(X_train)} samples")
         print(f"📊 Test set: {len(X_test)} samples")
         
-        # Scale features
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        # Train Random Forest classifier
-        self.model = RandomForestClassifier(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            class_weight='balanced'
-        )
-        
         print("🌳 Training Random Forest classifier...")
-        self.model.fit(X_train_scaled, y_train)
+        X_train_scaled = self.fit(X_train, y_train)
+        X_test_scaled = self.scaler.transform(X_test)
         
         # Evaluate
         train_pred = self.model.predict(X_train_scaled)
@@ -124,6 +148,12 @@ class SimpleLabubuClassifier:
         cm = confusion_matrix(y_test, test_pred)
         print(cm)
         
+        # Per-series / variant / angle / lighting breakdown
+        test_scores = self.model.predict_proba(X_test_scaled)[:, 1]
+        report = evaluation.build_report([self.records[i] for i in idx_test], y_test, test_scores)
+        evaluation.print_report(report, 'series')
+        evaluation.write_report(report, 'models/evaluation_report_simple.json')
+        
         # Feature importance
         feature_names = [
             'Paint Quality', 'Sculpt Details', 'Packaging Auth', 'Material Texture',
@@ -151,6 +181,18 @@ class SimpleLabubuClassifier:
             'feature_importance': feature_importance
         }
     
+    def fit(self, X_train, y_train):
+        """Fit the scaler and Random Forest, returning the scaled training features"""
+        X_train_scaled = self.scaler.fit_transform(X_train)
+        self.model = RandomForestClassifier(
+            n_estimators=100,
+            max_depth=10,
+            random_state=42,
+            class_weight='balanced'
+        )
+        self.model.fit(X_train_scaled, y_train)
+        return X_train_scaled
+    
     def save_model(self):
         """Save the trained model"""
         os.makedirs('models', exist_ok=True)
@@ -193,53 +235,37 @@ class SimpleLabubuClassifier:
         }
     
     def plot_results(self, feature_importance, confusion_matrix):
-        """Plot training results"""
+        """Plot training results without blocking on rendering"""
         try:
-            fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
-            
-            # Feature importance plot
-            features, importances = zip(*feature_importance)
-            ax1.barh(range(len(features)), importances)
-            ax1.set_yticks(range(len(features)))
-            ax1.set_yticklabels(features)
-            ax1.set_xlabel('Importance')
-            ax1.set_title('Feature Importance')
-            ax1.grid(axis='x', alpha=0.3)
-            
-            # Confusion matrix plot
-            im = ax2.imshow(confusion_matrix, interpolation='nearest', cmap=plt.cm.Blues)
-            ax2.figure.colorbar(im, ax=ax2)
-            ax2.set(xticks=np.arange(confusion_matrix.shape[1]),
-                    yticks=np.arange(confusion_matrix.shape[0]),
-                    xticklabels=['Counterfeit', 'Authentic'],
-                    yticklabels=['Counterfeit', 'Authentic'],
-                    title='Confusion Matrix',
-                    ylabel='True label',
-                    xlabel='Predicted label')
-            
-            # Add text annotations to confusion matrix
-            thresh = confusion_matrix.max() / 2.
-            for i in range(confusion_matrix.shape[0]):
-                for j in range(confusion_matrix.shape[1]):
-                    ax2.text(j, i, format(confusion_matrix[i, j], 'd'),
-                            ha="center", va="center",
-                            color="white" if confusion_matrix[i, j] > thresh else "black")
-            
-            plt.tight_layout()
-            plt.savefig('training_results.png', dpi=300, bbox_inches='tight')
-            plt.show()
-            
-            print("📊 Results plots saved as 'training_results.png'")
+            plots.submit('results', {
+                'feature_importance': feature_importance,
+                'confusion_matrix': confusion_matrix
+            }, 'training_results.png', mode=self.plot_mode)
+            if self.plot_mode == 'background':
+                print("📊 Rendering results plots to 'training_results.png' in the background")
+            elif self.plot_mode == 'inline':
+                print("📊 Results plots saved as 'training_results.png'")
         except Exception as e:
             print(f"⚠️ Could not generate plots: {e}")
-            print("This is normal if you don't have matplotlib display configured")
 
 def main():
     """Main training function"""
     print("🎯 Simple Labubu Classifier Training")
     print("=" * 50)
     
-    classifier = SimpleLabubuClassifier()
+    parser = argparse.ArgumentParser(description='Train the simple Labubu classifier')
+    parser.add_argument('--dedup', choices=duplicates.DEDUP_MODES, default='none',
+                        help="Drop near-duplicates or keep each duplicate cluster on one side of the split")
+    parser.add_argument('--filter', action='append', default=[],
+                        help="Train on matching records only, e.g. status=approved or 'series=Series 1,Series 2'")
+    parser.add_argument('--split', choices=split_manifest.SPLIT_MODES, default='random',
+                        help="'manifest' uses the persisted per-sample assignments from split-manifest.py")
+    parser.add_argument('--plots', choices=plots.PLOT_MODES, default='background',
+                        help="Render result plots in a detached process, in-process, or skip them")
+    args = parser.parse_args()
+    
+    classifier = SimpleLabubuClassifier(dedup=args.dedup, filters=snapshot.parse_filters(args.filter),
+                                        plot_mode=args.plots, split=args.split)
     
     # Check if training data exists
     if not classifier.metadata_file.exists():
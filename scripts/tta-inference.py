@@ -0,0 +1,171 @@
+import json
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+from tensorflow import keras
+from pathlib import Path
+
+from script_loader import load_script
+
+trainer = load_script('train-labubu-classifier')
+
+# (y1, x1, y2, x2) crop box in normalized coordinates and a brightness factor.
+# Swapping x1 and x2 makes crop_and_resize mirror the crop horizontally.
+TTA_VIEWS = [
+    ((0.0, 0.0, 1.0, 1.0), 1.0),     # original
+    ((0.0, 1.0, 1.0, 0.0), 1.0),     # horizontal flip
+    ((0.05, 0.05, 0.95, 0.95), 1.0),  # center crop
+    ((0.0, 0.0, 1.0, 1.0), 0.9),     # darker
+    ((0.0, 0.0, 1.0, 1.0), 1.1),     # brighter
+    ((0.05, 0.95, 0.95, 0.05), 1.0),  # flipped center crop
+    ((0.0, 0.0, 0.9, 0.9), 1.0),     # top-left crop
+    ((0.1, 0.1, 1.0, 1.0), 1.0),     # bottom-right crop
+]
+
+# Score band the analyze-image route labels "suspicious"
+SUSPICIOUS_RANGE = (0.4, 0.75)
+
+
+def make_views(images, k):
+    """Build K augmented views of every image in one crop_and_resize call
+
+    Returns an array of shape (N * K, H, W, 3) ordered image-major, so
+    views of image i are rows i*K .. i*K + K - 1.
+    """
+    if k > len(TTA_VIEWS):
+        raise ValueError(f"At most {len(TTA_VIEWS)} views are supported")
+
+    images = np.asarray(images, dtype=np.float32)
+    n, height, width = images.shape[:3]
+    boxes = np.array([box for box, _ in TTA_VIEWS[:k]] * n, dtype=np.float32)
+    box_indices = np.repeat(np.arange(n, dtype=np.int32), k)
+    brightness = np.array([factor for _, factor in TTA_VIEWS[:k]] * n, dtype=np.float32)
+
+    views = tf.image.crop_and_resize(images, boxes, box_indices, (height, width))
+    views = tf.clip_by_value(views * brightness[:, None, None, None], 0.0, 1.0)
+    return views.numpy()
+
+
+class TTAPredictor:
+    """Average the classifier's outputs over K augmented views per image
+
+    `predict_fn(images, features)` must return (authenticity, confidence)
+    arrays; all views of all pending images go through it in one call.
+    """
+
+    def __init__(self, predict_fn, k=4):
+        self.predict_fn = predict_fn
+        self.k = k
+
+    def predict(self, images, features, k=None):
+        """Return mean authenticity, mean confidence and the per-image view spread"""
+        k = k or self.k
+        features = np.asarray(features, dtype=np.float32)
+        views = make_views(images, k)
+        view_features = np.repeat(features, k, axis=0)
+
+        authenticity, confidence = self.predict_fn(views, view_features)
+        authenticity = np.asarray(authenticity).reshape(-1, k)
+        confidence = np.asarray(confidence).reshape(-1, k)
+        return authenticity.mean(axis=1), confidence.mean(axis=1), authenticity.std(axis=1)
+
+    def predict_borderline(self, images, features, k=None, suspicious_range=SUSPICIOUS_RANGE):
+        """Single-view pass for everything, TTA only for scores in the suspicious band"""
+        authenticity, confidence = self.predict_fn(np.asarray(images, np.float32), np.asarray(features, np.float32))
+        authenticity = np.asarray(authenticity).reshape(-1).copy()
+        confidence = np.asarray(confidence).reshape(-1).copy()
+
+        low, high = suspicious_range
+        borderline = np.flatnonzero((authenticity >= low) & (authenticity <= high))
+        if len(borderline):
+            tta_auth, tta_conf, _ = self.predict(np.asarray(images)[borderline], np.asarray(features)[borderline], k)
+            authenticity[borderline] = tta_auth
+            confidence[borderline] = tta_conf
+        return authenticity, confidence, borderline
+
+
+def keras_predict_fn(model):
+    def predict_fn(images, features):
+        authenticity, confidence = model([images, features], training=False)
+        return np.asarray(authenticity).reshape(-1), np.asarray(confidence).reshape(-1)
+    return predict_fn
+
+
+def benchmark(model, images, features, ks, runs=3):
+    """Time batched TTA against running each view of each image separately"""
+    predict_fn = keras_predict_fn(model)
+    tta = TTAPredictor(predict_fn)
+    results = []
+
+    # Warm up the batch shapes used below
+    for k in ks:
+        tta.predict(images, features, k)
+    predict_fn(images[:1], features[:1])
+
+    for k in ks:
+        start = time.perf_counter()
+        for _ in range(runs):
+            tta.predict(images, features, k)
+        batched_ms = (time.perf_counter() - start) / runs * 1000
+
+        start = time.perf_counter()
+        for _ in range(runs):
+            for i in range(len(images)):
+                views = make_views(images[i:i + 1], k)
+                for view in views:
+                    predict_fn(view[None], features[i:i + 1])
+        looped_ms = (time.perf_counter() - start) / runs * 1000
+
+        results.append({
+            'k': k,
+            'images': len(images),
+            'batched_ms': batched_ms,
+            'looped_ms': looped_ms,
+            'batched_ms_per_image': batched_ms / len(images),
+            'speedup': looped_ms / batched_ms
+        })
+
+    print(f"\n{'K':>4}{'batched ms':>12}{'looped ms':>12}{'ms/img':>10}{'speedup':>10}")
+    for r in results:
+        print(f"{r['k']:>4}{r['batched_ms']:>12.1f}{r['looped_ms']:>12.1f}"
+              f"{r['batched_ms_per_image']:>10.1f}{r['speedup']:>9.1f}x")
+    return results
+
+
+def main():
+    """Benchmark how batched test-time augmentation scales with K"""
+    parser = argparse.ArgumentParser(description='Benchmark batched test-time augmentation')
+    parser.add_argument('--model', default='models/labubu_classifier_final.h5')
+    parser.add_argument('--images', type=int, default=8, help='Pending requests per batch')
+    parser.add_argument('--views', default='1,2,4,8', help='Values of K to benchmark')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--output', default='models/tta_benchmark.json')
+    trainer.add_threading_arguments(parser)
+    args = parser.parse_args()
+
+    trainer.configure_threading(
+        args.intra_op_threads, args.inter_op_threads,
+        profile='inference', config_file=args.threading_config
+    )
+
+    if not Path(args.model).exists():
+        print(f"❌ No trained model found at '{args.model}'")
+        return
+
+    model = keras.models.load_model(args.model, compile=False)
+    rng = np.random.default_rng(42)
+    size = trainer.IMAGE_SIZE
+    images = rng.random((args.images, size, size, 3), dtype=np.float32)
+    features = rng.random((args.images, 7), dtype=np.float32)
+
+    results = benchmark(model, images, features, [int(k) for k in args.views.split(',')], args.runs)
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import tempfile
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from script_loader import load_script
+
+
+def power_grid(limit, extra=()):
+    """Powers of two up to `limit`, plus any extra values within range"""
+    values = {1}
+    value = 2
+    while value <= limit:
+        values.add(value)
+        value *= 2
+    values.update(v for v in extra if 1 <= v <= limit)
+    return sorted(values)
+
+
+def measure_tensorflow(sample_file, intra, inter, batch_size, steps):
+    """Worker mode: time training and inference steps under one thread-pool setting"""
+    trainer = load_script('train-labubu-classifier')
+    trainer.configure_threading(intra, inter, config_file=None)
+
+    with np.load(sample_file) as data:
+        images, features, labels = data['images'], data['features'], data['labels']
+    reps = -(-batch_size // len(images))
+    images = np.concatenate([images] * reps)[:batch_size]
+    features = np.concatenate([features] * reps)[:batch_size]
+    labels = np.concatenate([labels] * reps)[:batch_size].astype(np.float32)
+    targets = {'authenticity': labels, 'confidence': np.abs(labels - 0.5) * 2}
+
+    classifier = trainer.LabubuClassifier()
+    model = classifier.create_model()
+
+    # Warm up both paths so graph building is not timed
+    model.train_on_batch([images, features], targets)
+    model([images, features], training=False)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        model.train_on_batch([images, features], targets)
+    train_rate = batch_size * steps / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        model([images, features], training=False)
+    inference_rate = batch_size * steps / (time.perf_counter() - start)
+
+    latencies = []
+    for i in range(steps * 4):
+        t0 = time.perf_counter()
+        model([images[i % batch_size:i % batch_size + 1], features[i % batch_size:i % batch_size + 1]], training=False)
+        latencies.append((time.perf_counter() - t0) * 1000)
+
+    return {
+        'intra_op_threads': intra,
+        'inter_op_threads': inter,
+        'train_samples_per_sec': train_rate,
+        'inference_samples_per_sec': inference_rate,
+        'inference_p50_ms': float(np.percentile(latencies, 50))
+    }
+
+
+def sample_records(trainer, data_dir, size, seed=42):
+    """A fixed random subset of at most `size` records whose images exist"""
+    metadata = trainer.snapshot.load_records(data_dir)
+    present, _, _ = trainer.ImageIndex(Path(data_dir) / 'images').resolve(metadata)
+    rng = np.random.default_rng(seed)
+    indices = np.sort(rng.choice(len(present), size=min(size, len(present)), replace=False))
+    return [present[i] for i in indices]
+
+
+def decode_images(trainer, paths, workers):
+    """Decode and preprocess `paths` exactly as the trainer's loader does"""
+    def load(path):
+        return trainer.preprocess_image(trainer.read_image(path))
+
+    if workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(load, paths))
+    return [load(path) for path in paths]
+
+
+def measure_decoding(trainer, paths, workers):
+    """Time decoding the sampled paths with a given number of decode threads"""
+    start = time.perf_counter()
+    decode_images(trainer, paths, workers)
+    elapsed = time.perf_counter() - start
+    return {'decode_workers': workers, 'images': len(paths), 'images_per_sec': len(paths) / elapsed}
+
+
+def main():
+    """Grid-search TensorFlow and decode parallelism and save the best settings"""
+    parser = argparse.ArgumentParser(description='Auto-tune CPU thread pools for training and inference')
+    parser.add_argument('--data-dir', default='./training-data')
+    parser.add_argument('--decode-sample', type=int, default=512, help='Images decoded per decode-worker setting')
+    parser.add_argument('--sample', type=int, default=64, help='Samples used for the TensorFlow benchmarks')
+    parser.add_argument('--batch-size', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=5)
+    parser.add_argument('--max-threads', type=int, default=os.cpu_count())
+    parser.add_argument('--output', default='models/threading_config.json')
+    # Internal: run one measurement in a fresh process
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--sample-file', help=argparse.SUPPRESS)
+    parser.add_argument('--intra', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--inter', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = measure_tensorflow(args.sample_file, args.intra, args.inter, args.batch_size, args.steps)
+        print('RESULT ' + json.dumps(result))
+        return
+
+    trainer = load_script('train-labubu-classifier')
+    max_threads = max(1, args.max_threads)
+
+    records = sample_records(trainer, args.data_dir, max(args.decode_sample, args.sample))
+    if not records:
+        print("❌ No training data found!")
+        return
+    paths = [Path(args.data_dir) / 'images' / item['authenticity'] / item['filename'] for item in records]
+    decode_paths = paths[:args.decode_sample]
+
+    # One untimed pass so every setting reads the files from the same (warm) page cache
+    print(f"🧵 Tuning decode workers on {len(decode_paths)} images...")
+    decode_images(trainer, decode_paths, max_threads)
+    decode_results = []
+    for workers in power_grid(max_threads):
+        result = measure_decoding(trainer, decode_paths, workers)
+        decode_results.append(result)
+        print(f"  {workers} workers: {result['images_per_sec']:.1f} img/s")
+    best_decode = max(decode_results, key=lambda r: r['images_per_sec'])
+
+    # Only the small sample used by the model benchmarks is kept in memory
+    rng = np.random.default_rng(42)
+    indices = rng.choice(len(records), size=min(args.sample, len(records)), replace=False)
+    images = np.array(decode_images(trainer, [paths[i] for i in indices], best_decode['decode_workers']))
+    features = np.array([trainer.build_feature_vector(records[i]) for i in indices])
+    labels = np.array([1 if records[i]['authenticity'] == 'authentic' else 0 for i in indices])
+
+    tf_results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sample_file = Path(tmp_dir) / 'sample.npz'
+        np.savez(sample_file, images=images, features=features, labels=labels)
+        del images
+
+        # Thread pools are fixed once TensorFlow starts, so each setting runs in its own process
+        for intra in power_grid(max_threads, extra=[max_threads]):
+            for inter in power_grid(min(4, max_threads)):
+                print(f"🧵 intra-op {intra}, inter-op {inter}...", end=' ', flush=True)
+                proc = subprocess.run(
+                    [sys.executable, __file__, '--worker', '--sample-file', str(sample_file),
+                     '--intra', str(intra), '--inter', str(inter),
+                     '--batch-size', str(args.batch_size), '--steps', str(args.steps)],
+                    capture_output=True, text=True
+                )
+                lines = [line for line in proc.stdout.splitlines() if line.startswith('RESULT ')]
+                if proc.returncode != 0 or not lines:
+                    print("failed")
+                    continue
+                result = json.loads(lines[-1][len('RESULT '):])
+                tf_results.append(result)
+                print(f"train {result['train_samples_per_sec']:.1f}/s | "
+                      f"infer {result['inference_samples_per_sec']:.1f}/s | "
+                      f"p50 {result['inference_p50_ms']:.1f} ms")
+
+    if not tf_results:
+        print("❌ All TensorFlow measurements failed")
+        return
+
+    best_train = max(tf_results, key=lambda r: r['train_samples_per_sec'])
+    best_inference = max(tf_results, key=lambda r: r['inference_samples_per_sec'])
+
+    config = {
+        'training': {
+            'intra_op_threads': best_train['intra_op_threads'],
+            'inter_op_threads': best_train['inter_op_threads'],
+            'decode_workers': best_decode['decode_workers']
+        },
+        'inference': {
+            'intra_op_threads': best_inference['intra_op_threads'],
+            'inter_op_threads': best_inference['inter_op_threads']
+        },
+        'host': {'cpu_count': os.cpu_count()},
+        'measurements': {'decode': decode_results, 'tensorflow': tf_results}
+    }
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(config, f, indent=2)
+
+    print(f"\n🏆 Training: {config['training']}")
+    print(f"🏆 Inference: {config['inference']}")
+    print(f"💾 Threading config saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import json
+import time
+import argparse
+import shutil
+import tempfile
+import numpy as np
+from pathlib import Path
+
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_MATCH_COUNT = 10
+
+
+def l2_normalize(vectors):
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+def merge_top_k(best_scores, best_indices, scores, indices, k):
+    """Keep the k highest scores per row across the running best and a new block"""
+    scores = np.concatenate([best_scores, scores], axis=1)
+    indices = np.concatenate([best_indices, indices], axis=1)
+    if scores.shape[1] > k:
+        part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, part, axis=1)
+        indices = np.take_along_axis(indices, part, axis=1)
+    return scores, indices
+
+
+class ExactVectorIndex:
+    """Exact cosine top-k over a (memory-mapped) reference embedding matrix
+
+    A local stand-in for the `find_similar_images` RPC: results are limited
+    to `match_count` rows with similarity >= `similarity_threshold`, best
+    first. References are scanned in blocks so the matrix never has to be
+    fully resident; float16 storage halves the on-disk and page-cache size
+    at the cost of an upcast per block.
+    """
+
+    def __init__(self, embeddings, ids, records=None, block_size=65536):
+        """`records` optionally maps id -> fields (series, variant, ...) merged into results"""
+        if len(embeddings) != len(ids):
+            raise ValueError(f"{len(embeddings)} embeddings but {len(ids)} ids")
+        self.embeddings = embeddings
+        self.ids = list(ids)
+        self.records = records or {}
+        self.block_size = block_size
+
+    @classmethod
+    def load(cls, embeddings_dir, dtype='float32', mmap=True, **kwargs):
+        """Open embeddings.npy (or embeddings.f16.npy for dtype='float16') plus ids.txt"""
+        embeddings_dir = Path(embeddings_dir)
+        filename = 'embeddings.f16.npy' if dtype == 'float16' else 'embeddings.npy'
+        embeddings = np.load(embeddings_dir / filename, mmap_mode='r' if mmap else None)
+        with open(embeddings_dir / 'ids.txt', 'r') as f:
+            ids = [line.rstrip('\n') for line in f if line.strip()]
+        return cls(embeddings, ids, **kwargs)
+
+    def search(self, queries, similarity_threshold=DEFAULT_THRESHOLD, match_count=DEFAULT_MATCH_COUNT):
+        """Return one list of {'id', 'similarity', ...record} dicts per query"""
+        queries = l2_normalize(queries)
+        n_queries = len(queries)
+        k = min(match_count, len(self.ids))
+        if k == 0:
+            return [[] for _ in range(n_queries)]
+
+        best_scores = np.full((n_queries, 0), -np.inf, dtype=np.float32)
+        best_indices = np.zeros((n_queries, 0), dtype=np.int64)
+        queries_t = np.ascontiguousarray(queries.T)
+
+        for start in range(0, len(self.embeddings), self.block_size):
+            block = np.asarray(self.embeddings[start:start + self.block_size], dtype=np.float32)
+            scores = (block @ queries_t).T
+            # Rows below the threshold can never be returned, so drop them early
+            scores[scores < similarity_threshold] = -np.inf
+
+            block_k = min(k, scores.shape[1])
+            part = np.argpartition(-scores, block_k - 1, axis=1)[:, :block_k]
+            block_scores = np.take_along_axis(scores, part, axis=1)
+            best_scores, best_indices = merge_top_k(best_scores, best_indices, block_scores, part + start, k)
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_indices = np.take_along_axis(best_indices, order, axis=1)
+
+        results = []
+        for scores, indices in zip(best_scores, best_indices):
+            matches = []
+            for score, index in zip(scores, indices):
+                if not np.isfinite(score):
+                    break
+                item_id = self.ids[index]
+                matches.append({**self.records.get(item_id, {}), 'id': item_id, 'similarity': float(score)})
+            results.append(matches)
+        return results
+
+
+def convert_to_float16(embeddings_dir, chunk_rows=1_000_000):
+    """Write embeddings.f16.npy next to embeddings.npy"""
+    embeddings_dir = Path(embeddings_dir)
+    source = np.load(embeddings_dir / 'embeddings.npy', mmap_mode='r')
+    target = np.lib.format.open_memmap(
+        embeddings_dir / 'embeddings.f16.npy', mode='w+', dtype=np.float16, shape=source.shape
+    )
+    for start in range(0, len(source), chunk_rows):
+        target[start:start + chunk_rows] = source[start:start + chunk_rows].astype(np.float16)
+    target.flush()
+    print(f"💾 float16 copy saved to '{embeddings_dir / 'embeddings.f16.npy'}'")
+
+
+def synthesize_references(path, rows, dim, dtype, chunk_rows=500_000, seed=42):
+    """Write `rows` random unit vectors to a .npy memmap without holding them in memory"""
+    rng = np.random.default_rng(seed)
+    matrix = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(rows, dim))
+    for start in range(0, rows, chunk_rows):
+        n = min(chunk_rows, rows - start)
+        matrix[start:start + n] = l2_normalize(rng.standard_normal((n, dim), dtype=np.float32)).astype(dtype)
+    matrix.flush()
+    del matrix
+    return np.load(path, mmap_mode='r')
+
+
+def benchmark(sizes, dim, n_queries, dtypes, block_size, threshold, match_count, work_dir=None):
+    """Time batched top-k queries across reference set sizes and storage types
+
+    One synthetic matrix exists at a time (10M x 512 float32 is ~20 GB);
+    a size that does not fit in the free space under `work_dir` is skipped.
+    """
+    results = []
+    rng = np.random.default_rng(7)
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        for size in sizes:
+            for dtype in dtypes:
+                path = Path(tmp_dir) / f'refs_{size}_{dtype}.npy'
+                needed = size * dim * np.dtype(dtype).itemsize
+                free = shutil.disk_usage(tmp_dir).free
+                if needed > free:
+                    print(f"⚠️ Skipping {size:,} references ({dtype}): needs {needed / 1e9:.1f} GB, "
+                          f"{free / 1e9:.1f} GB free in '{tmp_dir}' (see --work-dir)")
+                    continue
+                print(f"🧪 {size:,} references ({dtype})...", end=' ', flush=True)
+                matrix = synthesize_references(path, size, dim, dtype)
+                index = ExactVectorIndex(matrix, [str(i) for i in range(size)], block_size=block_size)
+
+                # Queries near known references so the threshold returns matches
+                targets = rng.integers(0, size, n_queries)
+                queries = np.asarray(matrix[np.sort(targets)], dtype=np.float32)
+                queries += rng.normal(0, 0.02, queries.shape).astype(np.float32)
+
+                index.search(queries[:1], threshold, match_count)
+                start = time.perf_counter()
+                matches = index.search(queries, threshold, match_count)
+                elapsed = time.perf_counter() - start
+
+                result = {
+                    'references': size,
+                    'dtype': dtype,
+                    'queries': n_queries,
+                    'seconds': elapsed,
+                    'queries_per_sec': n_queries / elapsed,
+                    'ms_per_query': elapsed / n_queries * 1000,
+                    'mean_matches': float(np.mean([len(m) for m in matches])),
+                    'storage_mb': path.stat().st_size / 1e6
+                }
+                results.append(result)
+                print(f"{result['queries_per_sec']:.1f} q/s ({result['ms_per_query']:.2f} ms/query)")
+
+                del index, matrix
+                path.unlink()
+    return results
+
+
+def main():
+    """Benchmark exact top-k cosine search, or query a saved embedding matrix"""
+    parser = argparse.ArgumentParser(description='Exact top-k cosine similarity search')
+    parser.add_argument('--embeddings-dir', default=None, help='Convert or query a saved matrix instead')
+    parser.add_argument('--to-float16', action='store_true', help='Write a float16 copy of the matrix')
+    parser.add_argument('--sizes', default='10000,100000,1000000,10000000', help='Reference set sizes to benchmark')
+    parser.add_argument('--dim', type=int, default=512)
+    parser.add_argument('--queries', type=int, default=64)
+    parser.add_argument('--dtypes', default='float32,float16')
+    parser.add_argument('--block-size', type=int, default=65536)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--match-count', type=int, default=DEFAULT_MATCH_COUNT)
+    parser.add_argument('--work-dir', default=None,
+                        help='Where the synthetic matrices are written (default: the system temp dir)')
+    parser.add_argument('--output', default='models/vector_search_benchmark.json')
+    args = parser.parse_args()
+
+    if args.embeddings_dir and args.to_float16:
+        convert_to_float16(args.embeddings_dir)
+        return
+
+    if args.embeddings_dir:
+        # Self-query: every reference should find itself first
+        index = ExactVectorIndex.load(args.embeddings_dir, block_size=args.block_size)
+        queries = np.asarray(index.embeddings[:args.queries], dtype=np.float32)
+        for item_id, matches in zip(index.ids, index.search(queries, args.threshold, args.match_count)):
+            top = ', '.join(f"{m['id']} ({m['similarity']:.3f})" for m in matches[:3])
+            print(f"  {item_id}: {top}")
+        return
+
+    results = benchmark(
+        [int(s) for s in args.sizes.split(',')], args.dim, args.queries,
+        args.dtypes.split(','), args.block_size, args.threshold, args.match_count, args.work_dir
+    )
+
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"📊 Benchmark saved to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import json
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from pathlib import Path
+
+
+def model_version(model_path, extra=''):
+    """Short content hash of a model file, so retrained weights never hit old verdicts"""
+    model_path = Path(model_path)
+    if not model_path.exists():
+        return f'unversioned{extra}'
+    digest = hashlib.sha256()
+    with open(model_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()[:16] + extra
+
+
+class VerdictCache:
+    """Size-bounded LRU of inference results keyed by decoded pixels and model version
+
+    Keys hash the exact preprocessed model input rather than the uploaded
+    bytes, so uploads that decode to identical pixels (the same file sent
+    again, or with its metadata stripped) share one entry. A lossy
+    re-encode changes the pixels and gets its own entry; near-duplicates
+    are deliberately not merged, since the cached verdict must be the one
+    the model gives for this exact input. Entries
+    older than `ttl_seconds` are treated as misses. With `persist_path`
+    set, live entries are loaded at startup and written back by save().
+    """
+
+    def __init__(self, max_entries=10000, ttl_seconds=24 * 3600, persist_path=None, version='unversioned'):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.persist_path = Path(persist_path) if persist_path else None
+        self.version = version
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        if self.persist_path and self.persist_path.exists():
+            self.load()
+
+    def key(self, image, features=None):
+        """blake2b over the model version, the pixel array and the side features"""
+        digest = hashlib.blake2b(self.version.encode(), digest_size=16)
+        image = np.ascontiguousarray(image)
+        digest.update(str(image.shape).encode())
+        digest.update(image.data)
+        if features is not None:
+            digest.update(np.ascontiguousarray(features, dtype=np.float32).data)
+        return digest.hexdigest()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, result = entry
+            if time.time() - stored_at > self.ttl_seconds:
+                del self.entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return result
+
+    def put(self, key, result):
+        with self.lock:
+            self.entries[key] = (time.time(), result)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'expired': self.expired,
+                'evictions': self.evictions,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'model_version': self.version
+            }
+
+    def save(self):
+        """Write unexpired entries (oldest first, so LRU order survives a restart)"""
+        if not self.persist_path:
+            return
+        now = time.time()
+        with self.lock:
+            live = [[key, stored_at, result] for key, (stored_at, result) in self.entries.items()
+                    if now - stored_at <= self.ttl_seconds]
+        self.persist_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.persist_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'version': self.version, 'entries': live}, f)
+        tmp_path.replace(self.persist_path)
+        print(f"💾 Saved {len(live)} cached verdicts to '{self.persist_path}'")
+
+    def load(self):
+        """Restore entries written for the same model version"""
+        try:
+            with open(self.persist_path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not read verdict cache '{self.persist_path}': {e}")
+            return
+        if data.get('version') != self.version:
+            print("🔄 Verdict cache was written for another model version, starting empty")
+            return
+
+        now = time.time()
+        with self.lock:
+            for key, stored_at, result in data['entries'][-self.max_entries:]:
+                if now - stored_at <= self.ttl_seconds:
+                    self.entries[key] = (stored_at, result)
+        print(f"📦 Loaded {len(self.entries)} cached verdicts from '{self.persist_path}'")
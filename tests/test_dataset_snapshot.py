@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from script_loader import load_script
+
+snapshot = load_script('dataset-snapshot')
+
+
+def make_item(i, paint):
+    return {'id': f'img_{i}', 'filename': f'img_{i}.jpg', 'series': f'Series {i % 3 + 1}', 'variant': 'Pink',
+            'authenticity': 'authentic' if i % 2 else 'fake', 'source': 'test', 'status': 'approved',
+            'uploadedAt': '2024-01-01T00:00:00Z',
+            'metadata': {'angle': 'front', 'quality': 'high', 'lighting': 'natural', 'background': 'clean'},
+            'features': {'paintQuality': paint, 'sculptDetails': 90, 'packagingAuth': 90.5,
+                         'materialTexture': 90}}
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    with open(tmp_path / 'metadata.json', 'w') as f:
+        json.dump([make_item(i, 80 if i % 4 == 0 else 60 + i) for i in range(12)], f)
+    return tmp_path
+
+
+def test_numeric_equality_matches_on_both_paths(data_dir):
+    filters = snapshot.parse_filters(['features.paintQuality=80'])
+    assert filters == {'features.paintQuality': [80.0]}
+
+    from_json = snapshot.load_records(data_dir, filters)
+    snapshot.export_snapshot(data_dir, chunk_rows=4)
+    from_snapshot = snapshot.load_records(data_dir, filters)
+
+    assert [item['id'] for item in from_json] == ['img_0', 'img_4', 'img_8']
+    assert [item['id'] for item in from_snapshot] == ['img_0', 'img_4', 'img_8']
+
+
+def test_numeric_in_list_and_fractional_value(data_dir):
+    snapshot.export_snapshot(data_dir, chunk_rows=4)
+    filters = snapshot.parse_filters(['features.paintQuality=61,80', 'features.packagingAuth=90.5'])
+    records = snapshot.load_records(data_dir, filters, columns=['id'])
+    assert [item['id'] for item in records] == ['img_0', 'img_1', 'img_4', 'img_8']
+
+
+def test_non_numeric_value_on_numeric_column_is_rejected():
+    with pytest.raises(ValueError):
+        snapshot.parse_filter('features.paintQuality=high')
+
+
+def test_snapshot_returns_the_same_feature_values_as_metadata_json(data_dir):
+    with open(data_dir / 'metadata.json', 'r') as f:
+        items = json.load(f)
+    items[1]['features']['paintQuality'] = 25.9
+    with open(data_dir / 'metadata.json', 'w') as f:
+        json.dump(items, f)
+
+    from_json = snapshot.load_records(data_dir)
+    snapshot.export_snapshot(data_dir, chunk_rows=4)
+    from_snapshot = snapshot.load_records(data_dir)
+    assert [item['features'] for item in from_snapshot] == [item['features'] for item in from_json]
@@ -0,0 +1,62 @@
+import json
+
+from script_loader import load_script
+
+dataset_stats = load_script('dataset-stats')
+
+
+def make_item(i, authenticity='authentic'):
+    return {'id': f'img_{i}', 'filename': f'img_{i}.jpg', 'series': f'Series {i % 3 + 1}', 'variant': 'Pink',
+            'authenticity': authenticity, 'source': 'test',
+            'metadata': {'angle': 'front', 'quality': 'high', 'lighting': 'natural', 'background': 'clean'},
+            'features': {'paintQuality': 90, 'sculptDetails': 90, 'packagingAuth': 90, 'materialTexture': 90},
+            'status': 'approved' if i % 2 else 'pending'}
+
+
+def test_counters_match_a_recount_after_append(tmp_path):
+    with open(tmp_path / 'metadata.json', 'w') as f:
+        json.dump([make_item(i) for i in range(5)], f, indent=2)
+
+    stats = dataset_stats.DatasetStats(tmp_path).load()
+    stats.append([make_item(5, 'fake'), make_item(6)])
+    stats.append([make_item(7, 'fake')])
+
+    with open(tmp_path / 'metadata.json', 'r') as f:
+        assert [item['id'] for item in json.load(f)] == [f'img_{i}' for i in range(8)]
+    mismatches, _ = stats.verify()
+    assert mismatches == {}
+    summary = stats.summary()
+    assert (summary['total'], summary['authentic'], summary['fake']) == (8, 6, 2)
+    assert summary['byStatus'] == {'approved': 4, 'pending': 4}
+
+
+def test_appended_stats_are_fresh_for_the_next_reader(tmp_path, capsys):
+    stats = dataset_stats.DatasetStats(tmp_path)
+    stats.append([make_item(0)])
+
+    reloaded = dataset_stats.DatasetStats(tmp_path).load()
+    assert 'recounting' not in capsys.readouterr().out
+    assert reloaded.summary() == stats.summary()
+
+
+def test_append_to_empty_array(tmp_path):
+    (tmp_path / 'metadata.json').write_text('[]\n')
+    dataset_stats.DatasetStats(tmp_path).load().append([make_item(0, 'fake')])
+    with open(tmp_path / 'metadata.json', 'r') as f:
+        assert [item['id'] for item in json.load(f)] == ['img_0']
+
+
+def test_missing_field_counts_survive_a_reload(tmp_path):
+    items = [make_item(i) for i in range(3)]
+    for item in items:
+        del item['variant']
+    with open(tmp_path / 'metadata.json', 'w') as f:
+        json.dump(items[:1], f, indent=2)
+
+    dataset_stats.DatasetStats(tmp_path).load().append(items[1:2])
+    reloaded = dataset_stats.DatasetStats(tmp_path).load().append(items[2:])
+
+    assert reloaded.summary()['byVariant'] == {'null': 3}
+    assert dataset_stats.DatasetStats(tmp_path).load().summary()['byVariant'] == {'null': 3}
+    mismatches, _ = reloaded.verify()
+    assert mismatches == {}
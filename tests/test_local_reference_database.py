@@ -0,0 +1,52 @@
+import threading
+
+import numpy as np
+
+from script_loader import load_script
+
+reference_db = load_script('local-reference-database')
+
+
+def test_second_import_updates_rows_in_place(tmp_path):
+    db = reference_db.LocalReferenceDatabase(tmp_path / 'reference.db', embedding_dim=8)
+    images = reference_db.synthetic_images(50, embedding_dim=8)
+    db.batch_add_reference_images(images, batch_size=20)
+    matrix_size = db.embeddings_path.stat().st_size
+
+    images[0]['variant'] = 'Relabelled'
+    images[0]['embedding'] = np.ones(8, dtype=np.float32)
+    ids = db.batch_add_reference_images(images, batch_size=20)
+
+    assert ids == [image['id'] for image in images]
+    assert db.get_training_stats()['totalImages'] == 50
+    assert db.embeddings_path.stat().st_size == matrix_size
+    match = db.find_similar_images(np.ones(8), threshold=0.99, match_count=1)
+    assert [(m['id'], m['variant']) for m in match] == [(images[0]['id'], 'Relabelled')]
+    db.close()
+
+
+def test_reimport_without_embeddings_keeps_them(tmp_path):
+    db = reference_db.LocalReferenceDatabase(tmp_path / 'reference.db', embedding_dim=8)
+    images = reference_db.synthetic_images(10, embedding_dim=8)
+    db.batch_add_reference_images(images)
+    db.batch_add_reference_images([{**image, 'embedding': None} for image in images])
+    assert len(db.find_similar_images(images[3]['embedding'], threshold=-1.0, match_count=20)) == 10
+    db.close()
+
+
+def test_concurrent_adds_return_their_own_ids(tmp_path):
+    db = reference_db.LocalReferenceDatabase(tmp_path / 'reference.db', embedding_dim=8)
+    results = {}
+
+    def add(n):
+        image = {**reference_db.synthetic_images(1, start=n)[0]}
+        results[n] = (image['id'], [db.add_reference_image(image) for _ in range(20)])
+
+    threads = [threading.Thread(target=add, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for expected, returned in results.values():
+        assert set(returned) == {expected}
+    db.close()
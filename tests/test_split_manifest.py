@@ -0,0 +1,91 @@
+import json
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from script_loader import load_script
+
+split_manifest = load_script('split-manifest')
+
+REPO_METADATA = Path(__file__).resolve().parent.parent / 'training-data' / 'metadata.json'
+
+
+def make_records(n, prefix='sample'):
+    return [{'id': f'{prefix}_{i}', 'authenticity': 'authentic' if i % 3 else 'fake',
+             'series': f'Series {i % 6 + 1}'} for i in range(n)]
+
+
+def test_small_stratified_dataset_fills_every_split(tmp_path):
+    with open(REPO_METADATA, 'r') as f:
+        records = json.load(f)
+    manifest = split_manifest.SplitManifest(tmp_path)
+    assert manifest.assign(records) == len(records)
+    manifest.check(records)
+
+    for label in ('authentic', 'fake'):
+        splits = Counter(manifest.assignments[item['id']] for item in records if item['authenticity'] == label)
+        assert all(splits[split] for split in split_manifest.SPLITS)
+
+
+def random_records(n, series=12, seed=0):
+    rng = np.random.default_rng(seed)
+    return [{'id': f'rec_{i}', 'authenticity': 'authentic' if rng.random() < 0.6 else 'fake',
+             'series': f'S{rng.integers(series) + 1}'} for i in range(n)]
+
+
+def assert_strata_balanced(manifest, records):
+    strata = Counter(split_manifest.stratum(item) for item in records)
+    for key, row in manifest.summary(records).items():
+        for split in split_manifest.SPLITS:
+            target = manifest.fractions[split] * strata[key]
+            assert abs(row[split] - target) <= 1.5, (key, row)
+
+
+def test_each_label_and_series_stratum_is_split_by_the_fractions(tmp_path):
+    records = random_records(600)
+    manifest = split_manifest.SplitManifest(tmp_path)
+    manifest.assign(records)
+    assert_strata_balanced(manifest, records)
+
+    again = split_manifest.SplitManifest(tmp_path)
+    again.assign(list(reversed(records)))
+    assert again.assignments == manifest.assignments
+
+
+def test_batched_additions_stay_stratified(tmp_path):
+    records = random_records(1200, seed=1)
+    manifest = split_manifest.SplitManifest(tmp_path)
+    for start in range(0, len(records), 150):
+        manifest.assign(records[:start + 150])
+    assert_strata_balanced(manifest, records)
+
+
+def test_existing_assignments_are_kept(tmp_path):
+    records = make_records(300)
+    manifest = split_manifest.SplitManifest(tmp_path)
+    manifest.assign(records[:200])
+    manifest.save()
+    before = dict(manifest.assignments)
+
+    reloaded = split_manifest.SplitManifest(tmp_path).load()
+    assert reloaded.assign(records) == 100
+    assert all(reloaded.assignments[item_id] == split for item_id, split in before.items())
+
+
+def test_duplicate_groups_share_a_split(tmp_path):
+    records = make_records(60)
+    groups = [i // 4 for i in range(len(records))]
+    manifest = split_manifest.SplitManifest(tmp_path)
+    manifest.assign(records, groups)
+    for group in set(groups):
+        assert len({manifest.assignments[records[i]['id']] for i in range(len(records)) if groups[i] == group}) == 1
+
+
+def test_empty_split_fails_loudly(tmp_path):
+    records = make_records(2)
+    manifest = split_manifest.SplitManifest(tmp_path)
+    manifest.assign(records)
+    with pytest.raises(ValueError, match='empty'):
+        manifest.check(records)